@@ -0,0 +1,118 @@
+"""
+Compares querying a ticker/year-partitioned dataset (`guard fetch --dataset`,
+`guard query`) with globbing and re-parsing the per-run export files that
+plain `--export-format` runs leave behind.
+
+Both stores receive the same `--runs` overlapping fetches of `--tickers`
+tickers: each run covers the `--window` years of daily bars up to one month
+after the previous run, as a monthly scheduled job would. The exports get one
+file per ticker and run; the dataset upserts every run into its partitions.
+
+Query: closes of two tickers in one calendar year where volume exceeds a
+threshold, and the same for every ticker.
+
+Reports write time, files and bytes on disk, and per query the wall time and
+files opened.
+
+Usage:
+    python benchmarks/bench_dataset.py --tickers 50 --runs 24 --export-format csv
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.helpers.dataset import DatasetWriter, query_dataset  # noqa: E402
+from commands.helpers.readers import load_export, write_arrow_format  # noqa: E402
+from commands.helpers.sources import StubSource  # noqa: E402
+
+
+def disk_usage(root):
+    files = [path for path in glob.glob(os.path.join(root, "**", "*"), recursive=True) if os.path.isfile(path)]
+    return len(files), sum(os.path.getsize(path) for path in files)
+
+
+def glob_query(root, tickers, year, threshold):
+    """What a user does with plain exports: read every file of the tickers, dedupe, filter."""
+    paths = [path for ticker in tickers for path in sorted(glob.glob(os.path.join(root, f"{ticker}_data_*")))]
+    pieces = []
+    for path in paths:
+        frame = load_export(path)
+        frame.insert(0, "Ticker", os.path.basename(path).split("_data_")[0])
+        pieces.append(frame)
+    data = pd.concat(pieces, ignore_index=True)
+    data["Date"] = pd.to_datetime(data["Date"], utc=True).dt.tz_convert("America/New_York")
+    data = data.drop_duplicates(["Ticker", "Date"], keep="last").sort_values(["Ticker", "Date"])
+    data = data[(data["Date"].dt.year == year) & (data["Volume"] > threshold)]
+    return data[["Ticker", "Date", "Close"]], len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=24, help="Overlapping monthly fetches")
+    parser.add_argument("--window", type=int, default=2, help="Years of daily bars per fetch")
+    parser.add_argument("--export-format", default="csv", choices=["csv", "parquet"])
+    parser.add_argument("--year", type=int, default=2023)
+    parser.add_argument("--volume", type=float, default=2e6, help="Volume threshold of the query")
+    args = parser.parse_args()
+
+    stub = StubSource(latency=0)
+    tickers = [f"T{index:04d}" for index in range(args.tickers)]
+    ends = pd.date_range(end=f"{args.year + 1}-06-01", periods=args.runs, freq="MS")
+    root = tempfile.mkdtemp(prefix="invest_guard_dataset_")
+    exports, dataset = os.path.join(root, "exports"), os.path.join(root, "dataset")
+    os.makedirs(exports)
+
+    try:
+        export_seconds = dataset_seconds = 0.0
+        for end in ends:
+            start = end - pd.DateOffset(years=args.window)
+            index = stub.index(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+            frames = {ticker: stub.history(ticker, index).reset_index() for ticker in tickers}
+
+            started = time.perf_counter()
+            for ticker, frame in frames.items():
+                path = os.path.join(exports, f"{ticker}_data_{start:%Y-%m-%d}_to_{end:%Y-%m-%d}.{args.export_format}")
+                if args.export_format == "csv":
+                    frame.to_csv(path, index=False)
+                else:
+                    write_arrow_format(frame, path, "parquet")
+            export_seconds += time.perf_counter() - started
+
+            started = time.perf_counter()
+            with DatasetWriter(dataset) as writer:
+                for ticker, frame in frames.items():
+                    writer.write(frame.assign(Ticker=ticker))
+            dataset_seconds += time.perf_counter() - started
+
+        for name, path, seconds in (("exports", exports, export_seconds), ("dataset", dataset, dataset_seconds)):
+            files, size = disk_usage(path)
+            print(f"{name:<8} write {seconds:7.3f}s  files={files:<6} size={size / 2**20:8.1f} MB")
+
+        for label, selection in (("2 tickers", tickers[:2]), ("all tickers", tickers)):
+            started = time.perf_counter()
+            baseline, opened = glob_query(exports, selection, args.year, args.volume)
+            glob_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            result, stats = query_dataset(dataset, "1d", selection, f"{args.year}-01-01", f"{args.year + 1}-01-01",
+                                          ["close"], [f"volume > {args.volume}"])
+            query_seconds = time.perf_counter() - started
+
+            assert len(result) == len(baseline), (len(result), len(baseline))
+            print(f"{label:<12} glob {glob_seconds:7.3f}s files={opened:<6} | query {query_seconds:7.3f}s "
+                  f"files={stats['files']:<4} rows={stats['rows']:<6} speedup={glob_seconds / query_seconds:6.1f}x")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Measures the multi-ticker fetch speedup against the offline stub source.
+
+Usage:
+    python benchmarks/bench_fetch_many.py --tickers 2000 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.helpers.batch import fetch_many  # noqa: E402
+from commands.helpers.sources import StubSource  # noqa: E402
+
+
+def run(tickers, latency, batch_size, max_workers):
+    source = StubSource(latency=latency)
+    started = time.perf_counter()
+    frames, failures = fetch_many(tickers, source, "2024-01-01", "2024-02-01",
+                                  batch_size=batch_size, max_workers=max_workers)
+    elapsed = time.perf_counter() - started
+    return elapsed, source.requests, len(frames), len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=500, help="Number of synthetic tickers")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated seconds per upstream request")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    tickers = [f"T{index:05d}" for index in range(args.tickers)]
+    modes = [
+        ("serial", 1, 1),
+        ("batched", args.batch_size, 1),
+        ("batched+pool", args.batch_size, args.max_workers),
+    ]
+    baseline = None
+    for label, batch_size, max_workers in modes:
+        elapsed, requests, fetched, failed = run(tickers, args.latency, batch_size, max_workers)
+        baseline = baseline or elapsed
+        print(f"{label:<14} {elapsed:8.3f}s  requests={requests:<6} fetched={fetched:<6} "
+              f"failed={failed:<4} speedup={baseline / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
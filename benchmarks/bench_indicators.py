@@ -0,0 +1,108 @@
+"""
+Compares the NumPy indicator engine (commands/helpers/indicators.py) with
+naive pandas rolling/ewm code of the kind used in ad-hoc analysis scripts.
+
+For each size it times a full computation of SMA, EMA, RSI, MACD, VWAP, ATR
+and volatility, then the cost of one more bar: pandas recomputes the whole
+history, while the engine resumes from its saved state. It also reports the
+largest difference between the two results. Before timing, it checks the
+EMA against pandas' ewm(adjust=False) for smoothing factors up to 1
+(period 1), including when resuming from a previous average.
+
+Usage:
+    python benchmarks/bench_indicators.py --rows 1000,100000,1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.helpers.indicators import compute, ema  # noqa: E402
+from commands.helpers.sources import StubSource  # noqa: E402
+
+
+def naive_pandas(frame):
+    close, high, low, volume = frame["Close"], frame["High"], frame["Low"], frame["Volume"]
+    result = pd.DataFrame(index=frame.index)
+    result["SMA 20"] = close.rolling(20).mean()
+    result["EMA 20"] = close.ewm(span=20, adjust=False, min_periods=20).mean()
+    fast = close.ewm(span=12, adjust=False).mean()
+    slow = close.ewm(span=26, adjust=False).mean()
+    result["MACD"] = (fast - slow).where(np.arange(len(close)) >= 25)
+    signal = (fast - slow).ewm(span=9, adjust=False).mean()
+    result["MACD Signal"] = signal.where(np.arange(len(close)) >= 33)
+    result["MACD Hist"] = (fast - slow - signal).where(np.arange(len(close)) >= 33)
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    result["RSI 14"] = 100 - 100 / (1 + gain / loss)
+    previous_close = close.shift()
+    true_range = pd.concat([high - low, (high - previous_close).abs(), (low - previous_close).abs()], axis=1).max(axis=1)
+    result["ATR 14"] = true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    result["Volatility 20"] = np.log(close / previous_close).rolling(20).std() * np.sqrt(252)
+    day = frame.index.date
+    typical = (high + low + close) / 3 * volume
+    result["VWAP"] = typical.groupby(day).cumsum() / volume.groupby(day).cumsum()
+    return result
+
+
+def check_ema(values):
+    """Largest difference between `ema` and pandas over smoothing factors down from 1, whole and resumed."""
+    series = pd.Series(values)
+    worst = 0.0
+    for alpha in (1.0, 2 / 3, 2 / 21, 1 / 14):
+        expected = series.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        half = len(values) // 2
+        head = ema(values[:half], alpha)
+        resumed = np.concatenate((head, ema(values[half:], alpha, previous=head[-1])))
+        worst = max(worst, np.abs(ema(values, alpha) - expected).max(), np.abs(resumed - expected).max())
+    return worst
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,100000,1000000", help="Comma-separated bar counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stub = StubSource(latency=0)
+    sample = stub.history("AAPL", pd.date_range("2020-01-02", periods=1000, freq="D", name="Date"))["Close"]
+    print(f"ema vs pandas ewm(adjust=False), alpha 1 to 1/14: max diff {check_ema(sample.to_numpy()):.2e}")
+    for rows in (int(value) for value in args.rows.split(",")):
+        index = pd.date_range("2020-01-02 14:30", periods=rows + 1, freq="1min", tz="UTC", name="Date")
+        frame = stub.history("AAPL", index.tz_convert("America/New_York"))
+        history, latest = frame.iloc[:-1], frame
+
+        pandas_full, reference = timed(lambda: naive_pandas(history), args.repeat)
+        engine_full, (computed, state) = timed(lambda: compute(history), args.repeat)
+        difference = np.nanmax(np.abs(computed[reference.columns].to_numpy() - reference.to_numpy()))
+
+        pandas_append, _ = timed(lambda: naive_pandas(latest), args.repeat)
+        engine_append, _ = timed(lambda: compute(latest.iloc[-1:], state=_copy(state)), args.repeat)
+
+        print(f"rows={rows:<9} full: pandas {pandas_full * 1000:9.2f}ms  engine {engine_full * 1000:9.2f}ms "
+              f"({pandas_full / engine_full:5.1f}x)   +1 bar: pandas {pandas_append * 1000:9.2f}ms  "
+              f"engine {engine_append * 1000:7.3f}ms ({pandas_append / engine_append:8.1f}x)   max diff {difference:.2e}")
+
+
+def _copy(state):
+    from commands.helpers.indicators import IndicatorState
+    return IndicatorState.from_dict(state.to_dict())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures the cost of refreshing a quote board across many tickers against the
+local Yahoo API fixture (benchmarks/fixtures/chart_server.py).
+
+Modes:
+    history        the old live path: one chart request per ticker for the
+                   day's bars, of which only the last price is used
+    quotes (cold)  `guard fetch --quote` with an empty reference-data cache:
+                   bulk quote requests asking for quote and reference fields
+    quotes (warm)  the same with company name, exchange and shares
+                   outstanding served from the reference cache, so the bulk
+                   requests ask only for the quote fields
+
+Reports wall time, upstream requests and response bytes per refresh.
+
+Usage:
+    python benchmarks/bench_quotes.py --tickers 500 --latency 0.02
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_sources import free_port, server_call, start_fixture  # noqa: E402
+from commands.helpers.batch import fetch_many  # noqa: E402
+from commands.helpers.cache import ReferenceCache  # noqa: E402
+from commands.helpers.quotes import fetch_quotes  # noqa: E402
+from commands.helpers.sources import YahooSource  # noqa: E402
+
+
+class CountingYahooSource(YahooSource):
+    """YahooSource that adds up the size of every response body."""
+
+    received = 0
+
+    async def create_session(self, limit):
+        import aiohttp
+
+        async def count(session, context, params):
+            CountingYahooSource.received += int(params.response.headers.get("Content-Length", 0))
+        tracing = aiohttp.TraceConfig()
+        tracing.on_request_end.append(count)
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit), trace_configs=[tracing],
+                                     cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+
+def measure(base_url, work):
+    server_call(base_url, "/_reset", "POST")
+    CountingYahooSource.received = 0
+    started = time.perf_counter()
+    rows = work()
+    elapsed = time.perf_counter() - started
+    return elapsed, server_call(base_url, "/_stats")["requests"], CountingYahooSource.received, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=500, help="Number of synthetic tickers")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server-side seconds per response")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_fixture(port, args.latency)
+    tickers = [f"T{index:05d}" for index in range(args.tickers)]
+    source = CountingYahooSource(base_url=base_url)
+    reference = ReferenceCache(os.path.join(tempfile.mkdtemp(prefix="invest_guard_quotes_"), "reference.sqlite"))
+
+    def history():
+        frames, _ = fetch_many(tickers, source, period="1d", max_workers=args.max_in_flight, rate_limit=0)
+        return len(frames)
+
+    def quotes():
+        table, _ = fetch_quotes(tickers, source, reference, max_workers=args.max_in_flight, rate_limit=0)
+        return len(table)
+
+    try:
+        for name, work in (("history", history), ("quotes (cold)", quotes), ("quotes (warm)", quotes)):
+            elapsed, requests, received, rows = measure(base_url, work)
+            print(f"{name:<14} {elapsed:7.3f}s  requests={requests:<5} received={received / 1024:9.1f} KiB  rows={rows}")
+    finally:
+        reference.close()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares resample_ohlcv (commands/helpers/resample.py) with pandas
+DataFrame.resample().agg() on synthetic one-minute bars in New York time.
+
+For each target interval it times both and reports whether they produce the
+same bars. Hourly bars are aligned to the 9:30 session open on the wall clock,
+which pandas cannot express across daylight saving changes, so that interval
+is the only one expected to differ, around the transitions.
+
+Usage:
+    python benchmarks/bench_resample.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.helpers.resample import resample_ohlcv  # noqa: E402
+from commands.helpers.sources import StubSource  # noqa: E402
+
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum",
+       "Dividends": "sum", "Stock Splits": "max"}
+TARGETS = [
+    ("5m", dict(rule="5min")),
+    ("1h", dict(rule="1h", offset="30min")),
+    ("1d", dict(rule="1D")),
+    ("1wk", dict(rule="W-MON", label="left", closed="left")),
+    ("1mo", dict(rule="MS")),
+]
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stub = StubSource(latency=0, now="2024-06-28 20:00:00+00:00")
+    index = pd.date_range(end="2024-06-28 20:00", periods=args.rows, freq="1min", tz="UTC",
+                          name="Date").tz_convert("America/New_York")
+    frame = stub.history("AAPL", index)
+    print(f"{args.rows} one-minute bars")
+
+    for interval, options in TARGETS:
+        ours, ours_time = best_of(args.repeat, lambda: resample_ohlcv(frame, interval, "United States"))
+        reference, pandas_time = best_of(
+            args.repeat, lambda: frame.resample(**options).agg(AGG).dropna(subset=["Open"]))
+        same = (len(ours) == len(reference) and (ours.index == reference.index).all()
+                and np.allclose(ours.to_numpy(float), reference.to_numpy(float)))
+        print(f"{interval:<4} {len(ours):>8} bars   resample_ohlcv {ours_time * 1000:7.1f} ms   "
+              f"pandas {pandas_time * 1000:7.1f} ms   {'same' if same else 'differs'}")
+
+
+if __name__ == "__main__":
+    main()
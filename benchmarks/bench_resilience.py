@@ -0,0 +1,113 @@
+"""
+Measures the resilience layer of the fetch engine against a flaky, slow
+stand-in for an upstream API (the stub source with `flaky` timeouts and a
+`slow` tail of requests).
+
+Scenarios, each starting --requests single-ticker history requests at
+--arrivals per second:
+    no retries       the engine with --retries 0
+    retries          exponential backoff with jitter (--retries 3)
+    retries + hedge  also hedging requests slower than the recent p95
+    coalescing       --callers concurrent callers asking for the same tickers
+    outage           every request times out, without and with the circuit breaker
+    http errors      the Yahoo adapter against the chart API fixture answering
+                     --http-errors of requests with a plain-text 429 or HTML 503,
+                     without and with retries
+
+Reports the share of requests that succeeded, per-request latency
+percentiles, upstream requests, retries and hedges.
+
+Usage:
+    python benchmarks/bench_resilience.py --requests 400 --flaky 0.1 --slow 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_sources import free_port, start_fixture  # noqa: E402
+from commands.helpers.resilience import get_health, retry_policy  # noqa: E402
+from commands.helpers.sources import StubSource, YahooSource, run_engine  # noqa: E402
+
+
+def run(label, source, tickers, arrivals, retries, hedge=None, breaker=True):
+    source.name = f"bench-{label}"
+    health = get_health(source.name)
+    if not breaker:
+        health.breaker.threshold = float("inf")
+
+    async def timed(engine, index, ticker):
+        await asyncio.sleep(index / arrivals)
+        started = time.perf_counter()
+        try:
+            await engine.history(ticker, "2024-01-01", "2024-02-01")
+            return time.perf_counter() - started, True
+        except Exception:
+            return time.perf_counter() - started, False
+
+    async def work(engine):
+        return await asyncio.gather(*(timed(engine, index, ticker) for index, ticker in enumerate(tickers)))
+
+    started = time.perf_counter()
+    with retry_policy(argparse.Namespace(retries=retries, hedge=hedge)):
+        # No cap on requests in flight, so latencies show upstream behaviour rather than queueing
+        results = run_engine(source, work, max_in_flight=len(tickers), rate_limit=0)
+    elapsed = time.perf_counter() - started
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    failures = sum(not ok for _, ok in results)
+    stats = health.snapshot()
+    print(f"{label:<16} ok={1 - failures / len(results):6.1%} p50={np.percentile(latencies, 50):7.0f}ms "
+          f"p95={np.percentile(latencies, 95):7.0f}ms p99={np.percentile(latencies, 99):7.0f}ms "
+          f"max={latencies.max():7.0f}ms wall={elapsed:6.2f}s upstream={stats['requests']:<5} "
+          f"retries={stats['retries']:<4} hedged={stats['hedged']:<4} coalesced={stats['coalesced']:<5} "
+          f"rejected={stats['rejected']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per upstream request")
+    parser.add_argument("--flaky", type=float, default=0.1, help="Share of requests that time out")
+    parser.add_argument("--slow", type=float, default=0.05, help="Share of requests in the slow tail")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra seconds of a slow request")
+    parser.add_argument("--arrivals", type=float, default=200, help="Requests started per second")
+    parser.add_argument("--callers", type=int, default=8, help="Concurrent callers in the coalescing scenario")
+    parser.add_argument("--http-errors", type=float, default=0.2, help="Share of fixture responses that are non-JSON 429/503s")
+    args = parser.parse_args()
+
+    tickers = [f"T{index:04d}" for index in range(args.requests)]
+
+    def stub(flaky=args.flaky, slow=args.slow):
+        return StubSource(latency=args.latency, flaky=flaky, slow=slow, slow_latency=args.slow_latency)
+
+    print(f"{args.requests} requests, {args.latency * 1000:.0f} ms each, {args.flaky:.0%} time out, "
+          f"{args.slow:.0%} take {args.slow_latency:.1f}s longer")
+    run("no retries", stub(), tickers, args.arrivals, retries=0)
+    run("retries", stub(), tickers, args.arrivals, retries=3)
+    run("retries + hedge", stub(), tickers, args.arrivals, retries=3, hedge=0.0)
+    # Each ticker asked for by --callers callers in a row, as by clients of the daemon polling one universe
+    shared = [ticker for ticker in tickers[:max(1, args.requests // args.callers)] for _ in range(args.callers)]
+    run("coalescing", stub(flaky=0.0, slow=0.0), shared, args.arrivals, retries=3)
+    run("outage", stub(flaky=1.0, slow=0.0), tickers, args.arrivals, retries=3, breaker=False)
+    run("outage+breaker", stub(flaky=1.0, slow=0.0), tickers, args.arrivals, retries=3)
+
+    port = free_port()
+    server = start_fixture(port, args.latency, args.http_errors)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        run("http no retries", YahooSource(base_url), tickers, args.arrivals, retries=0, breaker=False)
+        run("http retries", YahooSource(base_url), tickers, args.arrivals, retries=3)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
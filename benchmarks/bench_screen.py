@@ -0,0 +1,95 @@
+"""
+Times `guard screen` filter evaluation over a synthetic daily universe.
+
+Three ways of evaluating "close >= 0.9 * highest(252)" are compared:
+
+    pandas loop    per-ticker rolling() calls in one process
+    pickled pool   the same per-ticker code in a process pool, each worker
+                   receiving its tickers' DataFrames pickled
+    shared memory  screen(): histories packed once into shared memory and
+                   evaluated whole with NumPy, in this process (workers=1)
+                   or by the screening pool, first while it starts (cold)
+                   and then reusing its processes (warm)
+
+Histories are generated up front, so only evaluation is measured. Results of
+the three are checked to agree. Finally the full rule set
+"close > sma(200) and volume > 2 * sma(20, volume)", "close >= 0.97 * highest(252)"
+is timed with ranking, as screen() runs it by default: in-process below
+PARALLEL_ROWS bars, on the pool above.
+
+Usage:
+    python benchmarks/bench_screen.py --tickers 5000 --bars 300 --workers 4
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.helpers.screening import CHUNK_TICKERS, PARALLEL_ROWS, screen, shutdown_pool  # noqa: E402
+from commands.helpers.sources import StubSource  # noqa: E402
+
+FILTER = "close >= 0.9 * highest(252)"
+FILTERS = ["close > sma(200) and volume > 2 * sma(20, volume)", "close >= 0.97 * highest(252)"]
+
+
+def pandas_matches(frames):
+    matches = []
+    for ticker, frame in frames.items():
+        close, high = frame["Close"], frame["High"]
+        if len(frame) >= 252 and close.iloc[-1] >= 0.9 * high.rolling(252).max().iloc[-1]:
+            matches.append(ticker)
+    return matches
+
+
+def chunks(frames, size):
+    items = list(frames.items())
+    return [dict(items[first:first + size]) for first in range(0, len(items), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--bars", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    stub = StubSource(latency=0, now="2024-06-28 20:00:00+00:00")
+    index = pd.date_range(end="2024-06-28", periods=args.bars, freq="B", tz="America/New_York", name="Date")
+    frames = {f"T{number:05d}": stub.history(f"T{number:05d}", index) for number in range(args.tickers)}
+    pieces = chunks(frames, CHUNK_TICKERS)
+    print(f"{args.tickers} tickers x {args.bars} bars, {args.workers} workers, "
+          f"{sum(len(pickle.dumps(piece)) for piece in pieces) / 2**20:.1f}MB if pickled")
+
+    started = time.perf_counter()
+    expected = pandas_matches(frames)
+    print(f"pandas loop    {time.perf_counter() - started:8.3f}s  {len(expected)} matches")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=get_context("spawn")) as pool:
+        pooled = [ticker for matches in pool.map(pandas_matches, pieces) for ticker in matches]
+    print(f"pickled pool   {time.perf_counter() - started:8.3f}s  {len(pooled)} matches")
+
+    for workers, label in ((1, "in-process"), (args.workers, "pool, cold"), (args.workers, "pool, warm")):
+        started = time.perf_counter()
+        matches = screen(frames, [FILTER], None, workers=workers, parallel_rows=0)
+        print(f"shared memory  {time.perf_counter() - started:8.3f}s  {len(matches)} matches ({label}, workers={workers})")
+        assert sorted(ticker for ticker, _ in matches) == sorted(expected)
+    assert sorted(pooled) == sorted(expected)
+    shutdown_pool()
+
+    rows = args.tickers * args.bars
+    started = time.perf_counter()
+    matches = screen(frames, FILTERS, "change(20)", workers=args.workers)
+    print(f"full screen    {time.perf_counter() - started:8.3f}s  {len(matches)} matches for {' / '.join(FILTERS)} "
+          f"({'pool' if rows >= PARALLEL_ROWS else 'in-process'}, {rows / 1e6:.1f}M bars)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures per-invocation latency of `guard fetch` run in-process versus
+forwarded to a `guard serve` daemon.
+
+A daemon is started on a scratch socket with a scratch cache, the cache is
+warmed with one fetch, and then the same cached single-ticker fetch is run
+--repeat times each way as a separate `guard` process, as a pipeline would.
+Reports median and 95th percentile wall time per invocation.
+
+Usage:
+    python benchmarks/bench_serve.py --repeat 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GUARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "guard")
+FETCH = ["fetch", "-t", "AAPL", "-s", "stub", "--asset-type", "stock",
+         "--start-date", "2024-01-01", "--end-date", "2024-06-01", "--view", "summary", "--plain"]
+
+
+def invoke(env, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, GUARD, *FETCH], env=env, check=True, capture_output=True)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+
+def wait_for(path, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise RuntimeError("guard serve did not start")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="invest_guard_serve_")
+    socket_path = os.path.join(scratch, "guard.sock")
+    env = dict(os.environ, HOME=scratch, INVEST_GUARD_CACHE_DIR=os.path.join(scratch, "cache"),
+               INVEST_GUARD_SOCKET=socket_path)
+    local_env = dict(env, INVEST_GUARD_NO_DAEMON="1")
+
+    subprocess.run([sys.executable, GUARD, *FETCH], env=local_env, check=True, capture_output=True)
+    local = invoke(local_env, args.repeat)
+
+    server = subprocess.Popen([sys.executable, GUARD, "serve"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(socket_path)
+        forwarded = invoke(env, args.repeat)
+    finally:
+        subprocess.run([sys.executable, GUARD, "serve", "--stop"], env=env, capture_output=True)
+        server.wait(timeout=30)
+
+    for name, (median, p95) in (("in-process", local), ("via daemon", forwarded)):
+        print(f"{name:<12} median {median * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms")
+    print(f"speedup      {local[0] / forwarded[0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measures HTTP source throughput and connection reuse against the local chart
+API fixture (benchmarks/fixtures/chart_server.py), without network access.
+
+The fixture runs in its own process so server work does not compete with the
+client's event loop.
+
+Modes:
+    serial         one request in flight, pooled connection
+    no-keepalive   requests in flight, but a new connection per request
+    pooled         requests in flight over pooled keep-alive connections
+
+Usage:
+    python benchmarks/bench_sources.py --tickers 500 --latency 0.05 --max-in-flight 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+from commands.helpers.batch import fetch_many_async  # noqa: E402
+from commands.helpers.sources import YahooSource  # noqa: E402
+
+
+class UnpooledYahooSource(YahooSource):
+    """YahooSource that closes the connection after every response."""
+
+    async def create_session(self, limit):
+        import aiohttp
+
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit, force_close=True))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fixture(port, latency, errors=0.0):
+    server = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "fixtures", "chart_server.py"),
+                               "--port", str(port), "--latency", str(latency), "--errors", str(errors)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return server
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("Chart API fixture did not start")
+
+
+def server_call(base_url, path, method="GET"):
+    with urllib.request.urlopen(urllib.request.Request(base_url + path, method=method)) as response:
+        return json.load(response)
+
+
+async def run(source_class, base_url, tickers, max_in_flight, rate_limit):
+    server_call(base_url, "/_reset", "POST")
+    source = source_class(base_url=base_url)
+    started = time.perf_counter()
+    frames, failures = await fetch_many_async(tickers, source, "2024-01-01", "2024-04-01",
+                                              batch_size=len(tickers), max_workers=max_in_flight,
+                                              rate_limit=rate_limit)
+    elapsed = time.perf_counter() - started
+    stats = server_call(base_url, "/_stats")
+    return elapsed, stats["requests"], stats["connections"], len(frames), len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=200, help="Number of synthetic tickers")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server-side seconds per response")
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--rate-limit", type=float, default=0, help="Requests per second (0 disables limiting)")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_fixture(port, args.latency)
+    tickers = [f"T{index:05d}" for index in range(args.tickers)]
+    modes = [
+        ("serial", YahooSource, 1),
+        ("no-keepalive", UnpooledYahooSource, args.max_in_flight),
+        ("pooled", YahooSource, args.max_in_flight),
+    ]
+    baseline = None
+    try:
+        for name, source_class, max_in_flight in modes:
+            elapsed, requests, connections, fetched, failed = asyncio.run(
+                run(source_class, base_url, tickers, max_in_flight, args.rate_limit))
+            baseline = baseline or elapsed
+            print(f"{name:<14} {elapsed:7.3f}s  {requests / elapsed:8.1f} req/s  requests={requests:<6} "
+                  f"connections={connections:<6} fetched={fetched:<6} failed={failed:<4} "
+                  f"speedup={baseline / elapsed:6.1f}x")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
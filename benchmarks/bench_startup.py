@@ -0,0 +1,113 @@
+"""
+Measures `guard` startup: wall time and import profile for argument parsing
+paths that should never load the data stack.
+
+Each scenario runs in a fresh interpreter. The script exits non-zero if a
+heavy module is imported while parsing or printing help, or if the median
+wall time exceeds --max-ms, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --max-ms 250 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Modules that must stay unloaded until a command actually executes
+HEAVY_MODULES = ["pandas", "numpy", "yfinance", "holidays", "tabulate", "colorama", "retry", "rich", "pyarrow", "aiohttp"]
+
+SCENARIOS = {
+    "help": ["--help"],
+    "fetch-help": ["fetch", "--help"],
+    "bad-option": ["fetch", "--no-such-option"],
+}
+
+RUNNER = """
+import json, sys
+sys.path.insert(0, {src!r})
+sys.argv = ["guard"] + {argv!r}
+import cli
+try:
+    cli.run()
+except SystemExit:
+    pass
+sys.__stderr__.write("HEAVY=" + json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)) + "\\n")
+"""
+
+
+def run_scenario(argv, importtime=False):
+    code = RUNNER.format(src=os.path.abspath(SRC_DIR), argv=argv, heavy=HEAVY_MODULES)
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    heavy = []
+    for line in result.stderr.splitlines():
+        if line.startswith("HEAVY="):
+            heavy = json.loads(line[len("HEAVY="):])
+    return elapsed, heavy, result.stderr
+
+
+def top_imports(stderr, limit):
+    """Parses `-X importtime` output into the slowest top-level imports."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            continue  # nested import, already counted in its parent's cumulative time
+        entries.append((int(cumulative_us), name.strip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per scenario")
+    parser.add_argument("--max-ms", type=float, default=300.0, help="Fail if a scenario's median exceeds this")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports to report")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "max_ms": args.max_ms, "scenarios": {}}
+    failed = False
+    for name, argv in SCENARIOS.items():
+        timings = []
+        heavy = []
+        for _ in range(args.repeat):
+            elapsed, heavy, _ = run_scenario(argv)
+            timings.append(elapsed * 1000)
+        _, _, importtime_output = run_scenario(argv, importtime=True)
+        median = statistics.median(timings)
+        slowest = top_imports(importtime_output, args.top)
+
+        ok = not heavy and median <= args.max_ms
+        failed = failed or not ok
+        report["scenarios"][name] = {
+            "argv": argv,
+            "median_ms": round(median, 2),
+            "min_ms": round(min(timings), 2),
+            "heavy_modules": heavy,
+            "slowest_imports_us": slowest,
+            "ok": ok,
+        }
+        print(f"{name:<12} median={median:7.1f}ms min={min(timings):7.1f}ms "
+              f"heavy={','.join(heavy) or '-':<20} {'OK' if ok else 'FAIL'}")
+        for cumulative_us, module in slowest:
+            print(f"    {cumulative_us / 1000:7.1f}ms  {module}")
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
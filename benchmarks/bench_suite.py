@@ -0,0 +1,237 @@
+"""
+Offline benchmark suite for the fetch, transform, render and export stages.
+
+Every stage runs against the deterministic stub source (one-minute bars up
+to a pinned clock), so results depend only on the code and the machine:
+
+    fetch       fetch_many() through the source adapter layer
+    transform   merging per-ticker frames and adding derived columns
+    render      the default preview printed by `guard fetch`
+    export:FMT  export_data() for each --formats entry
+
+Each stage is measured for every combination of --rows and --tickers and
+reports median wall time, throughput (rows/s) and peak memory. Peak memory
+is traced with tracemalloc, which sees Python and NumPy allocations but not
+Arrow's own allocator, so Parquet exports report close to zero. The full
+matrix takes a few minutes, mostly in the text exports at 1M rows.
+
+Usage:
+    python benchmarks/bench_suite.py run --json baseline.json
+    python benchmarks/bench_suite.py run --rows 1000,100000 --tickers 1,100 --json new.json
+    python benchmarks/bench_suite.py compare baseline.json new.json --threshold 0.10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+DEFAULT_ROWS = [1_000, 100_000, 1_000_000]
+DEFAULT_TICKERS = [1, 100, 1_000]
+DEFAULT_FORMATS = ["csv", "jsonl", "parquet"]
+PINNED_CLOCK = "2024-06-28 20:00:00+00:00"
+
+
+def parse_sizes(value):
+    return [int(float(item)) for item in value.split(",") if item]
+
+
+def measure(function, repeat, trace_memory):
+    """
+    Runs `function` `repeat` times and returns (median seconds, peak MB).
+    Peak memory comes from one extra traced run so tracing does not skew timings.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def build_frames(rows, tickers):
+    """Synthesizes `rows` one-minute bars spread over `tickers` tickers."""
+    import pandas as pd
+    from commands.helpers.sources import StubSource
+
+    stub = StubSource(latency=0, now=PINNED_CLOCK)
+    per_ticker = max(1, rows // tickers)
+    index = pd.date_range(end=PINNED_CLOCK, periods=per_ticker, freq="1min", name="Date").tz_convert("America/New_York")
+    return {f"T{number:05d}": stub.history(f"T{number:05d}", index) for number in range(tickers)}, per_ticker
+
+
+def stage_cases(rows, tickers, formats):
+    """Returns [(stage, function)] for one rows/tickers combination, with inputs prepared up front."""
+    import pandas as pd
+
+    from commands.fetch import LABELS, add_derived_columns, export_data
+    from commands.helpers.batch import fetch_many, to_long_format
+    from commands.helpers.render import render as render_table
+    from commands.helpers.sources import StubSource
+
+    frames, per_ticker = build_frames(rows, tickers)
+    symbols = list(frames)
+    end = pd.Timestamp(PINNED_CLOCK)
+    start = end - pd.Timedelta(minutes=per_ticker - 1)
+
+    def fetch():
+        fetched, failures = fetch_many(symbols, StubSource(latency=0, now=PINNED_CLOCK), start, end, interval="1m")
+        assert not failures and len(fetched) == len(symbols)
+
+    def transform():
+        add_derived_columns(to_long_format(frames))
+
+    data = add_derived_columns(to_long_format(frames))
+
+    def render():
+        render_table(data, LABELS, stream=io.StringIO())
+
+    cases = [("fetch", fetch), ("transform", transform), ("render", render)]
+    for export_format in formats:
+        def export(export_format=export_format):
+            with contextlib.redirect_stdout(io.StringIO()):
+                export_data(data, "bench", None, None, export_format, f"bench.{export_format}")
+        cases.append((f"export:{export_format}", export))
+    return cases, len(data)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    # Exports go to ~/Documents/invest_guard; keep them in a scratch home
+    scratch = tempfile.mkdtemp(prefix="invest_guard_bench_")
+    os.environ["HOME"] = scratch
+
+    import numpy
+    import pandas
+
+    stages = set(args.stages.split(",")) if args.stages else None
+    results = []
+    for rows in args.rows:
+        for tickers in args.tickers:
+            if tickers > rows:
+                continue
+            cases, total_rows = stage_cases(rows, tickers, args.formats)
+            for stage, function in cases:
+                if stages and stage.split(":")[0] not in stages and stage not in stages:
+                    continue
+                seconds, peak = measure(function, args.repeat, not args.no_memory)
+                result = {
+                    "stage": stage,
+                    "rows": total_rows,
+                    "tickers": tickers,
+                    "seconds": round(seconds, 6),
+                    "rows_per_sec": round(total_rows / seconds, 1) if seconds else None,
+                    "peak_mb": None if peak is None else round(peak, 3),
+                }
+                results.append(result)
+                peak_text = "-" if peak is None else f"{peak:9.1f}MB"
+                print(f"{stage:<15} rows={total_rows:<9} tickers={tickers:<6} {seconds:9.4f}s "
+                      f"{result['rows_per_sec'] or 0:>14,.0f} rows/s  peak={peak_text}", flush=True)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "pandas": pandas.__version__,
+            "numpy": numpy.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+
+def result_key(result):
+    return result["stage"], result["rows"], result["tickers"]
+
+
+def compare(args):
+    """
+    Diffs two runs matched on (stage, rows, tickers). Exits non-zero if any case
+    got slower beyond --threshold (and --min-delta) or its peak memory grew
+    beyond --memory-threshold.
+    """
+    with open(args.baseline) as handle:
+        baseline = {result_key(result): result for result in json.load(handle)["results"]}
+    with open(args.candidate) as handle:
+        candidate = {result_key(result): result for result in json.load(handle)["results"]}
+
+    regressions = 0
+    print(f"{'stage':<15} {'rows':>9} {'tickers':>7} {'base s':>10} {'new s':>10} {'time':>8} {'base MB':>9} {'new MB':>9} {'mem':>8}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        time_change = new["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+        memory_change = None
+        if old.get("peak_mb") and new.get("peak_mb") is not None:
+            memory_change = new["peak_mb"] / old["peak_mb"] - 1
+        flags = []
+        if time_change > args.threshold and new["seconds"] - old["seconds"] > args.min_delta:
+            flags.append("SLOWER")
+        if memory_change is not None and memory_change > args.memory_threshold:
+            flags.append("MORE MEMORY")
+        regressions += bool(flags)
+        memory_text = "-" if memory_change is None else f"{memory_change:+.1%}"
+        old_mb, new_mb = (("-" if result.get("peak_mb") is None else f"{result['peak_mb']:.1f}") for result in (old, new))
+        print(f"{key[0]:<15} {key[1]:>9} {key[2]:>7} {old['seconds']:>10.4f} {new['seconds']:>10.4f} "
+              f"{time_change:>+8.1%} {old_mb:>9} {new_mb:>9} {memory_text:>8}  {' '.join(flags)}")
+
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{key[0]:<15} {key[1]:>9} {key[2]:>7}  only in {'baseline' if key in baseline else 'candidate'}")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} time / {args.memory_threshold:.0%} memory")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the suite")
+    run_parser.add_argument("--rows", type=parse_sizes, default=DEFAULT_ROWS, help="Comma-separated total row counts")
+    run_parser.add_argument("--tickers", type=parse_sizes, default=DEFAULT_TICKERS, help="Comma-separated ticker counts")
+    run_parser.add_argument("--formats", type=lambda value: value.split(","), default=DEFAULT_FORMATS, help="Export formats to measure")
+    run_parser.add_argument("--stages", help="Comma-separated subset of fetch,transform,render,export")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the median is reported")
+    run_parser.add_argument("--no-memory", action="store_true", help="Skip the traced run that measures peak memory")
+    run_parser.add_argument("--json", help="Write results to this JSON file")
+
+    compare_parser = subparsers.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    compare_parser.add_argument("--min-delta", type=float, default=0.005,
+                                help="Ignore slowdowns smaller than this many seconds (timer noise on tiny cases)")
+    compare_parser.add_argument("--memory-threshold", type=float, default=0.20, help="Allowed relative peak memory growth")
+
+    args = parser.parse_args()
+    run(args) if args.mode == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measures windowed fetching of one long date range against the offline stub
+source, whose simulated transfer time grows with the bars in each response.
+
+Modes:
+    one request     the whole range in a single history() call, held in memory
+    windows x1      session windows fetched one at a time, merged in memory
+    windows xN      the same with N windows in flight
+    streamed xN     windows written to a Parquet export as they arrive
+
+Reports wall time, upstream requests and peak traced memory (tracemalloc:
+Python and NumPy allocations).
+
+Usage:
+    python benchmarks/bench_windows.py --interval 1m --start 2024-01-01 --end 2024-07-01 --max-workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from commands.helpers.sources import StubSource, fetch_history  # noqa: E402
+from commands.helpers.windows import fetch_windowed, plan_windows  # noqa: E402
+from commands.helpers.writers import open_writer  # noqa: E402
+
+
+class TransferStub(StubSource):
+    """StubSource whose responses take `latency` plus `per_bar` seconds per bar returned."""
+
+    def __init__(self, latency, per_bar, now):
+        super().__init__(latency=0, now=now)
+        self.base_latency = latency
+        self.per_bar = per_bar
+
+    async def fetch_batch(self, session, tickers, start_date=None, end_date=None, period=None, interval="1d"):
+        frames = await super().fetch_batch(session, tickers, start_date, end_date, period, interval)
+        await asyncio.sleep(self.base_latency + self.per_bar * sum(len(frame) for frame in frames.values()))
+        return frames
+
+
+def measure(function):
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = function()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2024-07-01")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per request")
+    parser.add_argument("--per-bar", type=float, default=20e-6, help="Simulated transfer seconds per bar")
+    parser.add_argument("--max-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    def source():
+        return TransferStub(args.latency, args.per_bar, now=args.end)
+
+    def one_request():
+        stub = source()
+        return stub, len(fetch_history(stub, "AAPL", args.start, args.end, interval=args.interval))
+
+    def windowed(max_workers):
+        def run():
+            stub, pieces = source(), []
+            fetch_windowed(stub, "AAPL", args.start, args.end, pieces.append, args.interval, "United States",
+                           max_in_flight=max_workers)
+            return stub, sum(len(piece) for piece in pieces)
+        return run
+
+    def streamed():
+        stub = source()
+        path = os.path.join(tempfile.mkdtemp(prefix="invest_guard_windows_"), "bars.parquet")
+        with open_writer("parquet", path) as writer:
+            fetch_windowed(stub, "AAPL", args.start, args.end, lambda frame: writer.write(frame.reset_index()),
+                           args.interval, "United States", max_in_flight=args.max_workers)
+        return stub, writer.rows_written
+
+    windows = plan_windows(args.start, args.end, args.interval, "United States")
+    print(f"{args.interval} bars {args.start} to {args.end}: {len(windows)} windows")
+    modes = [
+        ("one request", one_request),
+        ("windows x1", windowed(1)),
+        (f"windows x{args.max_workers}", windowed(args.max_workers)),
+        (f"streamed x{args.max_workers}", streamed),
+    ]
+    baseline = None
+    for name, function in modes:
+        elapsed, peak, (stub, rows) = measure(function)
+        baseline = baseline or elapsed
+        print(f"{name:<14} {elapsed:7.3f}s  requests={stub.requests:<4} rows={rows:<8} "
+              f"peak={peak:7.1f} MB  speedup={baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
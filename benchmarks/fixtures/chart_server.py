@@ -0,0 +1,185 @@
+"""
+Local stand-in for the Yahoo v8 chart and v7 quote APIs, serving synthetic
+bars and quotes from StubSource so the HTTP source adapter can be exercised
+offline.
+
+The server counts distinct client connections, which shows whether the
+client reuses pooled keep-alive connections. GET /_stats returns the counters
+and POST /_reset clears them.
+
+With --errors, that share of requests is answered the way throttling proxies
+and gateways do: alternately a plain-text 429 with Retry-After and an HTML 503.
+
+Quotes need the same cookie and crumb as Yahoo's: GET / sets the session
+cookie, GET /v1/test/getcrumb returns a crumb bound to it, and /v7/finance/quote
+answers 401 unless both are sent. POST /_expire invalidates every crumb
+issued so far, as Yahoo does when a session cookie expires.
+
+Usage:
+    python benchmarks/fixtures/chart_server.py --port 8765 --latency 0.05
+    INVEST_GUARD_YAHOO_URL=http://127.0.0.1:8765 ./guard fetch --tickers AAPL,MSFT ...
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import sys
+
+import numpy as np
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+
+from commands.helpers.sources import YAHOO_QUOTE_KEYS, StubSource  # noqa: E402
+
+
+def chart_payload(ticker, frame):
+    """Renders a history frame in the v8 chart response shape."""
+    return {"chart": {"error": None, "result": [{
+        "meta": {"symbol": ticker, "exchangeTimezoneName": str(frame.index.tz)},
+        "timestamp": (frame.index.as_unit("s").asi8).tolist(),
+        "indicators": {
+            "quote": [{key: frame[column].tolist() for key, column in
+                       (("open", "Open"), ("high", "High"), ("low", "Low"), ("close", "Close"), ("volume", "Volume"))}],
+            "adjclose": [{"adjclose": frame["Close"].tolist()}],
+        },
+    }]}}
+
+
+def create_app(latency=0.05, fail=(), errors=0.0, seed=0):
+    """
+    Returns the aiohttp application. `app["stats"]` holds the request count,
+    the ids of every connection seen, the error responses sent, the cookie and
+    crumb requests, and the quote requests refused for a missing or stale crumb.
+    """
+    stub = StubSource(latency=0, fail=fail)
+    stats = {"requests": 0, "connections": set(), "errors": 0, "handshakes": 0, "refused": 0}
+    crumbs = {}  # session cookie -> its crumb
+    rng = random.Random(seed)
+
+    def upstream_error():
+        """A non-JSON 429 or 503 for a share `errors` of requests, else None."""
+        if not errors or rng.random() >= errors:
+            return None
+        stats["errors"] += 1
+        if stats["errors"] % 2:
+            return web.Response(status=429, text="Too Many Requests", headers={"Retry-After": "0"})
+        return web.Response(status=503, text="<html><body><h1>503 Service Unavailable</h1></body></html>",
+                            content_type="text/html")
+
+    async def chart(request):
+        stats["requests"] += 1
+        stats["connections"].add(id(request.transport))
+        if latency:
+            await asyncio.sleep(latency)
+        error = upstream_error()
+        if error is not None:
+            return error
+        ticker = request.match_info["symbol"].upper()
+        if ticker in stub.fail:
+            return web.json_response({"chart": {"result": None, "error": {
+                "code": "Not Found", "description": f"No data found, symbol may be delisted: {ticker}"}}}, status=404)
+
+        params = request.query
+        if "period1" in params:
+            start = np.datetime64(int(params["period1"]), "s")
+            end = np.datetime64(int(params["period2"]), "s")
+            index = stub.index(str(start), str(end))
+        else:
+            index = stub.index(period=params.get("range", "1d"))
+        return web.json_response(chart_payload(ticker, stub.history(ticker, index)))
+
+    async def cookie(request):
+        stats["handshakes"] += 1
+        response = web.Response(status=404, text="Not Found")
+        response.set_cookie("A3", secrets.token_hex(16))
+        return response
+
+    async def get_crumb(request):
+        stats["handshakes"] += 1
+        session = request.cookies.get("A3")
+        if session is None:
+            return web.Response(status=401, text="Unauthorized")
+        crumbs[session] = crumbs.get(session) or secrets.token_urlsafe(8)
+        return web.Response(text=crumbs[session])
+
+    async def quote(request):
+        stats["requests"] += 1
+        stats["connections"].add(id(request.transport))
+        if latency:
+            await asyncio.sleep(latency)
+        error = upstream_error()
+        if error is not None:
+            return error
+        crumb = crumbs.get(request.cookies.get("A3"))
+        if crumb is None or request.query.get("crumb") != crumb:
+            stats["refused"] += 1
+            return web.json_response({"finance": {"result": None, "error": {
+                "code": "Unauthorized", "description": "Invalid Crumb"}}}, status=401)
+        symbols = [symbol.upper() for symbol in request.query.get("symbols", "").split(",") if symbol]
+        keys = set(request.query.get("fields", "").split(",")) | {"symbol"}
+        days = stub.index(period="252d")
+        results = [
+            {"symbol": symbol, **{YAHOO_QUOTE_KEYS[field]: value for field, value in stub.quote(symbol, days).items()
+                                  if YAHOO_QUOTE_KEYS[field] in keys}}
+            for symbol in symbols if symbol not in stub.fail
+        ]
+        return web.json_response({"quoteResponse": {"result": results, "error": None}})
+
+    async def get_stats(request):
+        return web.json_response({"requests": stats["requests"], "connections": len(stats["connections"]),
+                                  "errors": stats["errors"], "handshakes": stats["handshakes"],
+                                  "refused": stats["refused"]})
+
+    async def reset_stats(request):
+        stats["requests"] = stats["errors"] = stats["handshakes"] = stats["refused"] = 0
+        stats["connections"].clear()
+        return web.json_response({})
+
+    async def expire_crumbs(request):
+        crumbs.clear()
+        return web.json_response({})
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/v8/finance/chart/{symbol}", chart)
+    app.router.add_get("/", cookie)
+    app.router.add_get("/v1/test/getcrumb", get_crumb)
+    app.router.add_get("/v7/finance/quote", quote)
+    app.router.add_get("/_stats", get_stats)
+    app.router.add_post("/_reset", reset_stats)
+    app.router.add_post("/_expire", expire_crumbs)
+    return app
+
+
+async def start_server(host="127.0.0.1", port=0, latency=0.05, fail=(), errors=0.0):
+    """
+    Starts the server in the running event loop.
+
+    Returns:
+        tuple: (runner, base_url, stats); call `await runner.cleanup()` to stop it.
+    """
+    app = create_app(latency=latency, fail=fail, errors=errors)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}", app["stats"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each response is delayed")
+    parser.add_argument("--fail", default="", help="Comma-separated tickers that return an upstream error")
+    parser.add_argument("--errors", type=float, default=0.0, help="Share of requests answered with a non-JSON 429 or 503")
+    args = parser.parse_args()
+    fail = [symbol for symbol in args.fail.split(",") if symbol]
+    web.run_app(create_app(args.latency, fail, args.errors), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
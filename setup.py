@@ -15,8 +15,12 @@ setup(
         'yfinance',
         'pandas',
         'numpy',
+        'aiohttp',
         'tqdm',
     ],
+    extras_require={
+        'arrow': ['pyarrow'],
+    },
     author='Phoenix Interface',
     author_email='info@phoenixui.cloud',
     description='Invest Guard is a command-line interface (CLI) tool for fetching and analyzing financial data from various sources. With Invest Guard, you can easily retrieve stock prices, market trends, and other relevant financial information directly from your terminal.',
@@ -1,13 +1,16 @@
 import argparse
-from commands import fetch
+import importlib
 import logging
+import sys
+from commands import parsers
+from commands.helpers import daemon
 
 def setup_parser():
      parser = argparse.ArgumentParser(description="Investment data CLI")
      subparsers = parser.add_subparsers(title="commands", dest="command")
 
      #  add subcommands from other modules
-     fetch.setup_subparser(subparsers)
+     parsers.setup_subparsers(subparsers)
 
 
      return parser
@@ -20,9 +23,24 @@ def run():
      parser = setup_parser()
      args = parser.parse_args()
 
-     if args.command == "fetch":
-         fetch.execute(args)
-
-     else:
+     if args.command not in parsers.COMMANDS:
          parser.error("No command specified.")
-     
\ No newline at end of file
+
+     # A running `guard serve` already has the data stack loaded
+     if daemon.should_forward(args):
+         code = daemon.forward(sys.argv[1:])
+         if code is not None:
+             sys.exit(code)
+
+     # Command modules pull in the data stack, so they are only imported once a command runs
+     _, module_name = parsers.COMMANDS[args.command]
+     command = importlib.import_module(module_name, parsers.__package__)
+     from commands.helpers.resilience import retry_policy
+     with retry_policy(args):
+         if getattr(args, "profile", None):
+             from commands.helpers import profiling
+             with profiling.profiled(args.profile, cprofile=args.cprofile, command=sys.argv[1:]), \
+                     profiling.span(args.command, "command"):
+                 command.execute(args)
+         else:
+             command.execute(args)
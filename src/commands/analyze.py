@@ -0,0 +1,156 @@
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+from .fetch import colors, disable_colors, display_data, export_data, export_path, open_cache
+from .helpers.batch import fetch_many, parse_tickers, to_long_format
+from .helpers.defaults import DEFAULT_ANALYZE_DAYS
+from .helpers.indicators import DEFAULT_PARAMS, INDICATORS, compute, load_states, save_states
+from .helpers.profiling import span
+from .helpers.sources import INTRADAY_FREQUENCIES, get_source
+from .helpers.writers import open_writer
+
+logger = logging.getLogger(__name__)
+
+# Regular US session length, used to annualize intraday volatility
+SESSION_MINUTES = 390
+
+
+def indicator_params(args):
+    """
+    Builds the indicator parameters from the command line.
+
+    Raises:
+        ValueError: If an indicator name or the --macd spans are invalid.
+    """
+    indicators = [name.strip().lower() for name in args.indicators.split(",")] if args.indicators else list(INDICATORS)
+    unknown = [name for name in indicators if name not in INDICATORS]
+    if unknown:
+        raise ValueError(f"Unknown indicator(s): {', '.join(unknown)}. Choose from {', '.join(INDICATORS)}.")
+    try:
+        macd = tuple(int(value) for value in args.macd.split(","))
+    except ValueError:
+        macd = ()
+    if len(macd) != 3:
+        raise ValueError(f"--macd expects three spans FAST,SLOW,SIGNAL, got {args.macd!r}")
+
+    periods_per_year = DEFAULT_PARAMS["periods_per_year"]
+    if args.interval in INTRADAY_FREQUENCIES:
+        minutes = pd.Timedelta(INTRADAY_FREQUENCIES[args.interval]).total_seconds() / 60
+        periods_per_year = periods_per_year * SESSION_MINUTES / minutes
+    params = {
+        "sma": args.sma,
+        "ema": args.ema,
+        "rsi": args.rsi,
+        "macd": macd,
+        "atr": args.atr,
+        "volatility": args.volatility,
+        "periods_per_year": periods_per_year,
+        # Saved running averages only make sense for the same set of indicators
+        "indicators": tuple(indicators),
+    }
+    return params, indicators
+
+
+def date_range(args, states):
+    """
+    Resolves the history to download. Without --start-date, a run that can
+    resume every ticker from saved state only downloads from the oldest
+    saved bar onwards; otherwise the last DEFAULT_ANALYZE_DAYS days are used.
+
+    Returns:
+        tuple: (start_date, end_date) as YYYY-MM-DD strings
+    """
+    end = pd.Timestamp(args.end_date) if args.end_date else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+    if args.start_date:
+        start = pd.Timestamp(args.start_date)
+    elif states:
+        start = pd.Timestamp(min(state.last_time for state in states.values()), tz="UTC").tz_localize(None).normalize()
+    else:
+        start = end - pd.Timedelta(days=DEFAULT_ANALYZE_DAYS)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def resumable_state(ticker, frame, state, params):
+    """
+    Returns the saved state for `ticker` if it can be continued with `frame`,
+    else None so the indicators are recomputed from the first bar.
+    """
+    if state is None:
+        return None
+    if state.params != params:
+        logger.info("%s: indicator parameters changed, recomputing from scratch", ticker)
+        return None
+    if frame.index.as_unit("ns")[0].value > state.last_time:
+        # Bars between the saved state and this download are missing
+        logger.info("%s: fetched history starts after the saved state, recomputing from scratch", ticker)
+        return None
+    return state
+
+
+def analyze_command(args):
+    if args.plain:
+        disable_colors()
+    params, indicators = indicator_params(args)
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file)
+    if not tickers:
+        logger.warning("No ticker symbols provided.")
+        return
+
+    saved = load_states(args.state) if args.state else {}
+    resumable = {ticker: saved[ticker] for ticker in tickers if ticker in saved and saved[ticker].params == params}
+    start_date, end_date = date_range(args, resumable if len(resumable) == len(tickers) else {})
+
+    cache = open_cache(args)
+    source = get_source(args.source)
+    logger.info("Fetching %d tickers from %s (%s to %s, %s bars)...",
+                len(tickers), args.source, start_date, end_date, args.interval)
+    started = datetime.now()
+    try:
+        frames, failures = fetch_many(tickers, source, start_date, end_date, interval=args.interval,
+                                      batch_size=args.batch_size, max_workers=args.max_workers,
+                                      cache=cache, refresh=args.refresh, rate_limit=args.rate_limit)
+    finally:
+        if cache is not None:
+            logger.info(cache.summary())
+            cache.close()
+    for ticker, reason in failures.items():
+        logger.warning(colors().red + "Failed to fetch data for %s: %s" + colors().reset, ticker, reason)
+
+    results = {}
+    with span("analyze:indicators", tickers=len(frames)):
+        for ticker, frame in frames.items():
+            state = resumable_state(ticker, frame, saved.get(ticker), params)
+            values, saved[ticker] = compute(frame, params, indicators, state)
+            logger.info("%s: %d new bars (%d total)", ticker, len(values), saved[ticker].count)
+            if not values.empty:
+                values.insert(0, "Close", frame["Close"].iloc[len(frame) - len(values):].to_numpy())
+                results[ticker] = values
+    logger.info("Analyzed %d/%d tickers in %.2fs.", len(frames), len(tickers),
+                (datetime.now() - started).total_seconds())
+
+    if args.state:
+        save_states(args.state, saved)
+
+    data = to_long_format(results)
+    if data.empty:
+        logger.info("No new bars to analyze.")
+        return
+    display_data(data, args)
+
+    if args.append and args.export_format:
+        filepath = export_path("analyze", start_date, end_date, args.export_format, args.export_filename)
+        with span("export", format=args.export_format, rows=len(data)), \
+                open_writer(args.export_format, filepath, append=True, compression=args.compression) as writer:
+            writer.write(data)
+        print(f"Data exported successfully to {filepath} ({writer.rows_written} rows).")
+    elif args.export_format:
+        export_data(data, "analyze", start_date, end_date, args.export_format, args.export_filename, args.compression)
+
+
+def execute(args):
+    try:
+        analyze_command(args)
+    except ValueError as e:
+        logger.error(str(e))
@@ -0,0 +1,102 @@
+import logging
+import os
+from datetime import datetime
+
+from .analyze import date_range
+from .fetch import bar_market, colors, disable_colors, display_data, export_path, open_cache
+from .helpers.batch import fetch_many, parse_tickers
+from .helpers.correlation import (
+    PanelBuilder,
+    correlation_matrix,
+    extreme_pairs,
+    open_matrix,
+    panel_returns,
+    rolling_matrices,
+    save_labels,
+    window_ends,
+)
+from .helpers.profiling import span
+from .helpers.sources import get_source
+
+logger = logging.getLogger(__name__)
+
+
+def correlate_command(args):
+    if args.plain:
+        disable_colors()
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file)
+    if len(tickers) < 2:
+        logger.warning("guard correlate needs at least two ticker symbols.")
+        return
+    if args.window is not None and (args.window < 2 or args.step < 1):
+        raise ValueError("--window must be at least 2 and --step at least 1.")
+
+    start_date, end_date = date_range(args, {})
+    market = bar_market(args.asset_type, args.timezone)
+    panel = PanelBuilder(start_date, end_date, args.interval, market)
+    cache = open_cache(args)
+    source = get_source(args.source)
+    logger.info("Fetching %d tickers from %s (%s to %s, %s bars)...",
+                len(tickers), args.source, start_date, end_date, args.interval)
+    started = datetime.now()
+    try:
+        # Each history is reduced to its aligned closes as it arrives
+        _, failures = fetch_many(tickers, source, start_date, end_date, interval=args.interval,
+                                 batch_size=args.batch_size, max_workers=args.max_workers, cache=cache,
+                                 refresh=args.refresh, on_result=panel.add, rate_limit=args.rate_limit)
+    finally:
+        if cache is not None:
+            logger.info(cache.summary())
+            cache.close()
+    for ticker, reason in failures.items():
+        logger.warning(colors().red + "Failed to fetch data for %s: %s" + colors().reset, ticker, reason)
+    fetched = datetime.now()
+
+    with span("correlate:panel", tickers=len(panel.series)):
+        dates, names, prices = panel.build(tickers)
+        dates, names, returns, removed = panel_returns(dates, names, prices, args.returns, args.missing,
+                                                       args.max_gap, args.min_coverage)
+    if panel.off_grid:
+        logger.info("Dropped %d bars outside the %s sessions.", panel.off_grid, market or "calendar")
+    for ticker, coverage in removed.items():
+        logger.warning("%s has returns on %.0f%% of the dates (below --min-coverage); left out.", ticker, coverage * 100)
+    if len(names) < 2 or not len(returns):
+        logger.warning("Not enough aligned returns to correlate.")
+        return
+    logger.info("Return panel: %d dates x %d tickers (%s returns, missing: %s).",
+                len(dates), len(names), args.returns, args.missing)
+
+    label = f"correlate_{args.method}" + (f"_rolling{args.window}" if args.window else "")
+    path = args.output or export_path(label, start_date, end_date, "npy", None)
+    with span("correlate:matrix", tickers=len(names), method=args.method, window=args.window or 0):
+        if args.window:
+            ends = window_ends(len(returns), args.window, args.step)
+            if not ends:
+                logger.warning("The panel has %d dates, fewer than --window %d.", len(returns), args.window)
+                return
+            matrix = open_matrix(path, (len(ends), len(names), len(names)), args.dtype)
+            rolling_matrices(returns, args.window, args.method, args.step, matrix, args.block_size, args.min_periods)
+            labels = dates[[end - 1 for end in ends]]
+        else:
+            matrix = open_matrix(path, (len(names), len(names)), args.dtype)
+            correlation_matrix(returns, args.method, matrix, args.block_size, args.min_periods)
+            labels = dates[[0, -1]]
+        matrix.flush()
+    labels = labels.strftime("%Y-%m-%d" if args.interval == "1d" else "%Y-%m-%d %H:%M%z")
+    save_labels(path, names, labels, method=args.method, returns=args.returns, missing=args.missing,
+                window=args.window, step=args.step if args.window else None, start_date=start_date, end_date=end_date)
+    logger.info("%s matrix %s computed in %.2fs (fetch %.2fs).", args.method.capitalize(),
+                " x ".join(map(str, matrix.shape)), (datetime.now() - fetched).total_seconds(),
+                (fetched - started).total_seconds())
+    print(f"Matrix written to {path} ({os.path.getsize(path) / 2**20:.1f} MB; labels in {os.path.splitext(path)[0]}.json).")
+
+    # The strongest and weakest pairs of the full sample, or of the last window
+    pairs = extreme_pairs(matrix[-1] if args.window else matrix, names, args.rows, args.block_size)
+    display_data(pairs.rename(columns={"Value": args.method.capitalize()}), args)
+
+
+def execute(args):
+    try:
+        correlate_command(args)
+    except ValueError as e:
+        logger.error(str(e))
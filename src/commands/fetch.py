@@ -1,16 +1,26 @@
+import contextvars
 import logging
-from datetime import time, datetime, timedelta
+from collections import namedtuple
+from datetime import datetime
 import os
+import time
 import pandas as pd
-import pytz
-from pytz import UTC
-import yfinance as yf
 from colorama import Fore, Style
-from retry import retry
-from urllib3.exceptions import NewConnectionError
-import holidays
-from tabulate import tabulate
 from .helpers.fetch_help import display_help
+from .helpers.sessions import MARKET_TIMES, calendar_for
+from .helpers.cache import OHLCVCache, ReferenceCache
+from .helpers.writers import WRITERS, open_writer
+from .helpers.defaults import ARROW_FORMATS
+from .helpers.readers import check_ipc_compression, write_arrow_format
+from .helpers.sources import fetch_history, get_source
+from .helpers.batch import fetch_many, parse_tickers, to_long_format
+from .helpers.quotes import fetch_quotes
+from .helpers.render import show
+from .helpers.resample import StreamingResampler, resample_ohlcv, source_intervals
+from .helpers.windows import fetch_windowed
+from .helpers.dataset import DatasetWriter
+from .helpers.profiling import span
+from .parsers import setup_fetch_parser
 import numpy as np
 
 # Set up logging configuration
@@ -39,120 +49,217 @@ LABELS = {
     "forward_dividend_yield": "Forward Dividend & Yield",
     "ex_dividend_date": "Ex-Dividend Date",
     "1y_target_est": "1y Target Est",
-    "current_price": "Current Price" 
+    "current_price": "Current Price",
+    "currency": "Currency",
+    "shares_outstanding": "Shares Outstanding",
 }
 
-# Color codes
-COLOR_GREEN = Fore.GREEN
-COLOR_YELLOW = Fore.YELLOW
-COLOR_RED = Fore.RED
-COLOR_BLUE = Fore.BLUE
-COLOR_RESET = Style.RESET_ALL
-
-# Market timezones and open/close times
-MARKET_TIMES = {
-    "United States": {"timezone": "US/Eastern", "open_time": time(9, 30), "close_time": time(16)},
-    "Europe": {"timezone": "Europe/Berlin", "open_time": time(9), "close_time": time(17, 30)},
-    "Asia": {"timezone": "Asia/Tokyo", "open_time": time(9), "close_time": time(15)},
-    "Australia": {"timezone": "Australia/Sydney", "open_time": time(10), "close_time": time(16)},
-    "Hong Kong": {"timezone": "Asia/Hong_Kong", "open_time": time(9, 30), "close_time": time(16)},
-    "India": {"timezone": "Asia/Kolkata", "open_time": time(9, 15), "close_time": time(15, 30)},
-    "Canada": {"timezone": "America/Toronto", "open_time": time(9, 30), "close_time": time(16)},
-    "Nigeria": {"timezone": "Africa/Lagos", "open_time": time(10), "close_time": time(16)},
-    "South Africa": {"timezone": "Africa/Johannesburg", "open_time": time(9, 30), "close_time": time(17)},
-    "Kenya": {"timezone": "Africa/Nairobi", "open_time": time(9, 30), "close_time": time(15)},
-    "Ghana": {"timezone": "Africa/Accra", "open_time": time(10), "close_time": time(16)},
-    "Egypt": {"timezone": "Africa/Cairo", "open_time": time(10), "close_time": time(15)},
-    "Morocco": {"timezone": "Africa/Casablanca", "open_time": time(9, 30), "close_time": time(16, 30)},
-    # Add more African markets as needed
-}
+# Color codes. They live in a context variable, so --plain blanks them for the
+# running command only, not for other commands served by the same daemon.
+Colors = namedtuple("Colors", "green yellow red blue reset")
+ANSI_COLORS = Colors(Fore.GREEN, Fore.YELLOW, Fore.RED, Fore.BLUE, Style.RESET_ALL)
+PLAIN_COLORS = Colors("", "", "", "", "")
+_colors = contextvars.ContextVar("colors", default=ANSI_COLORS)
+
+def colors():
+    """Returns the color codes of the running command."""
+    return _colors.get()
+
+def disable_colors():
+    """Blanks the color codes of the running command so --plain output carries no ANSI escapes."""
+    _colors.set(PLAIN_COLORS)
+
+def resolve_market(default_timezone="US/Eastern", provided_timezone=None):
+    """Returns the MARKET_TIMES key to use, preferring the provided one."""
+    for market in (provided_timezone, default_timezone):
+        if market in MARKET_TIMES:
+            return market
+    raise ValueError(f"Market timezone '{provided_timezone}' not found.")
 
 def is_market_open(default_timezone="US/Eastern", provided_timezone=None):
     try:
-        market_info = MARKET_TIMES.get(provided_timezone, MARKET_TIMES.get(default_timezone))
-        if not market_info:
-            raise ValueError(f"Market timezone '{provided_timezone}' not found.")
-        
-        timezone = pytz.timezone(market_info["timezone"])
-        now = datetime.now(timezone)
-        open_time = timezone.localize(datetime.combine(now.date(), market_info["open_time"]))
-        close_time = timezone.localize(datetime.combine(now.date(), market_info["close_time"]))
-
-        if now.weekday() >= 5 or now.strftime('%Y-%m-%d') in holidays.CountryHoliday("US"):
-            return False, COLOR_RED + "Reason: Today is a holiday or weekend." + COLOR_RESET
-        elif open_time <= now <= close_time:
+        market = resolve_market(default_timezone, provided_timezone)
+        now = pd.Timestamp.now(tz="UTC")
+        calendar = calendar_for(market, now)
+
+        if calendar.is_open(now)[0]:
             return True, ""
+
+        color = colors()
+        local_now = now.tz_convert(calendar.timezone)
+        next_open_time = calendar.next_open(now)[0]
+        if not calendar.is_session(local_now.date())[0]:
+            holiday = calendar.holiday_name(local_now.date())
+            closure_reason = color.red + (f"Reason: Today is a holiday ({holiday})." if holiday else "Reason: Today is a weekend.") + color.reset
         else:
-            # Calculate the next open time
-            next_open_date = now.date() + timedelta(days=1)
-            next_open_time = timezone.localize(datetime.combine(next_open_date, market_info["open_time"]))
-            closure_reason = COLOR_RED + "Reason: Market is closed outside of trading hours." + COLOR_RESET
-            next_open_message = COLOR_YELLOW + f"Next market open: {next_open_time.strftime('%Y-%m-%d %H:%M')} ({market_info['timezone']})" + COLOR_RESET
-            return False, closure_reason + "\n" + next_open_message
+            closure_reason = color.red + "Reason: Market is closed outside of trading hours." + color.reset
+        next_open_message = color.yellow + f"Next market open: {next_open_time.strftime('%Y-%m-%d %H:%M')} ({calendar.timezone})" + color.reset
+        return False, closure_reason + "\n" + next_open_message
     except Exception as e:
         raise ValueError(f"Market timezone '{provided_timezone}' not found: {e}")
 
-@retry((ConnectionError, NewConnectionError), delay=5, backoff=2, tries=3)
-def calculate_market_cap(current_price, volume):
+def calculate_dollar_volume(current_price, volume):
     """
-    Calculate market capitalization.
-    Market Cap = Current Price * Volume
+    Calculate the traded value of a bar.
+    Dollar Volume = Current Price * Volume
+
+    This is not market capitalization, which needs the shares outstanding;
+    `--quote` reports that one.
+
+    Accepts scalars or whole NumPy arrays/Series, so a full history is priced
+    in one vectorized multiplication.
     """
     try:
-        current_price = float(current_price)
-        volume = float(volume)
-        return current_price * volume
-    except ValueError:
+        return np.asarray(current_price, dtype="float64") * np.asarray(volume, dtype="float64")
+    except (TypeError, ValueError):
         # Handle the case where either current_price or volume cannot be converted to float
         return None  # Or any appropriate error handling logic
 
 
+def add_derived_columns(history):
+    """
+    Stamps the fetch time and computes Dollar Volume for a whole history frame in
+    place, column-wise.
+
+    Returns:
+        DataFrame: The same frame, for chaining.
+    """
+    with span("transform:derived_columns", rows=len(history)):
+        history['Timestamp'] = pd.Timestamp.now().floor("s")
+        with span("transform:dollar_volume"):
+            history['Dollar Volume'] = calculate_dollar_volume(history['Close'].to_numpy(), history['Volume'].to_numpy())
+    return history
+
 
-def fetch_data(asset_type, ticker, start_date=None, end_date=None, market_open=None):
-    data = {}
+def resolve_interval(source, interval, cache=None, tickers=(), start_date=None, end_date=None, refresh=False):
+    """
+    Picks the bar interval to download for bars of `interval`.
+
+    When every ticker's [start_date, end_date) is already cached at an
+    interval that can be resampled into `interval`, that one is used so no
+    download is needed. Otherwise `interval` itself is downloaded if the
+    source offers it, or else the coarsest native interval that can build it.
+
+    Raises:
+        ValueError: If the source has no interval that can build `interval`.
+    """
+    candidates = source_intervals(interval, source.intervals)
+    if cache is not None and start_date and end_date and not refresh:
+        for candidate in candidates:
+            if all(not cache.missing_ranges(source.name, ticker, candidate, start_date, end_date) for ticker in tickers):
+                return candidate
+    return interval if interval in source.intervals else candidates[0]
+
+def bar_market(asset_type, timezone=None):
+    """MARKET_TIMES key whose sessions align resampled bars; None for assets trading around the clock."""
+    if asset_type in ["crypto", "currency"]:
+        return None
+    return resolve_market("United States", timezone)
+
+def fetch_data(asset_type, ticker, start_date=None, end_date=None, market_open=None, cache=None, refresh=False, source=None,
+               interval="1d", market=None, on_window=None, max_workers=None, rate_limit=None):
+    """
+    Fetches price history for a ticker through a source adapter (Yahoo by default).
+
+    Bars of an `interval` the source does not serve, or that can be built from
+    finer bars already cached, are resampled from the interval chosen by
+    resolve_interval(), aligned to the sessions of `market`. Date ranges are
+    fetched in windows by fetch_range().
+
+    Returns:
+        DataFrame: One row per bar with a 'Date' column, the OHLCV columns and the
+        derived 'Timestamp' and 'Dollar Volume' columns; None when a date range is
+        streamed to `on_window`.
+    """
+    source = source or get_source("yahoo")
     try:
-        stock = yf.Ticker(ticker)
-        
+        base = resolve_interval(source, interval, cache, [ticker], start_date, end_date, refresh)
         if start_date and end_date:
-            # Fetch historical data based on dates
-            history = stock.history(start=start_date, end=end_date)
-            if not history.empty:
-                history['Timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                history['Market Cap'] = history.apply(lambda row: calculate_market_cap(row['Close'], row['Volume']), axis=1)
-                
-                data = history.reset_index().to_dict(orient='records')
-            else:
-                raise ValueError("No historical data available for the specified date range.")
-        else:
+            return fetch_range(source, ticker, start_date, end_date, base, interval, market, cache, refresh,
+                               on_window, max_workers, rate_limit)
+        elif market_open or asset_type in ["crypto", "currency"]:
             # Fetch live data or historical data when the market is open
-            if market_open or asset_type in ["crypto", "currency"]:
-                live_data = stock.history(period="1d")
-                if not live_data.empty:
-                    live_data['Timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    live_data['Market Cap'] = live_data.apply(lambda row: calculate_market_cap(row['Close'], row['Volume']), axis=1)
-                    data = live_data.reset_index().to_dict(orient='records')
-                else:
-                    raise ValueError("No live data available.")
-            else:
-                # Fetch historical data for traditional market-dependent assets when the market is closed
-                history = stock.history(period="2d")
-                if len(history) >= 2:
-                     history['Timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                     history['Market Cap'] = history.apply(lambda row: calculate_market_cap(row['Close'], row['Volume']), axis=1)
-                     data = history.reset_index().to_dict(orient='records')
-                else:
-                    raise ValueError("No historical data available when the market was closed.")
-                
+            history = fetch_history(source, ticker, period="1d", interval=base)
+            if history.empty:
+                raise ValueError("No live data available.")
+        else:
+            # Fetch historical data for traditional market-dependent assets when the market is closed
+            history = fetch_history(source, ticker, period="2d", interval=base)
+            if len(history) < 2:
+                raise ValueError("No historical data available when the market was closed.")
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to fetch data for {ticker}: {e}")
+
+    if base != interval:
+        with span("transform:resample", rows=len(history), interval=interval):
+            history = resample_ohlcv(history, interval, market)
+        logger.info("Built %d %s bars from %s bars.", len(history), interval, base)
+    return add_derived_columns(history).reset_index()
+
+def fetch_range(source, ticker, start_date, end_date, base, interval, market=None, cache=None, refresh=False,
+                on_window=None, max_workers=None, rate_limit=None):
+    """
+    Fetches [start_date, end_date) in windows of trading sessions downloaded
+    concurrently (see fetch_windowed()), resampling `base` bars to `interval`
+    and adding the derived columns one window at a time.
 
-            
+    Args:
+        on_window: Optional callable receiving each window's finished rows in
+            order as soon as they are ready. Rows handed to it are not
+            retained, so memory stays bounded by the window size.
 
+    Returns:
+        DataFrame: All rows, or None when on_window is given.
+
+    Raises:
+        RuntimeError: If a window fails after its retries or no bars are returned.
+    """
+    resampler = StreamingResampler(interval, market) if base != interval else None
+    pieces = []
+    counts = {"bars": 0, "rows": 0}
+
+    def deliver(frame):
+        if frame.empty:
+            return
+        rows = add_derived_columns(frame).reset_index()
+        counts["rows"] += len(rows)
+        if on_window is not None:
+            on_window(rows)
+        else:
+            pieces.append(rows)
+
+    def receive(frame):
+        if frame is None or frame.empty:
+            return
+        counts["bars"] += len(frame)
+        if resampler is not None:
+            with span("transform:resample", rows=len(frame), interval=interval):
+                frame = resampler.push(frame)
+        deliver(frame)
+
+    try:
+        downloads = fetch_windowed(source, ticker, start_date, end_date, receive, base, market, cache, refresh,
+                                   max_in_flight=max_workers, rate_limit=rate_limit)
+        if resampler is not None:
+            deliver(resampler.flush())
+        if not counts["rows"]:
+            raise ValueError("No historical data available for the specified date range.")
     except Exception as e:
         raise RuntimeError(f"Failed to fetch data for {ticker}: {e}")
-        
-    return data
-def export_data(data, ticker, start_date, end_date, export_format, export_filename):
+
+    if downloads > 1:
+        logger.info("Downloaded %s in %d windows.", ticker, downloads)
+    if resampler is not None:
+        logger.info("Built %d %s bars from %d %s bars.", counts["rows"], interval, counts["bars"], base)
+    if on_window is not None:
+        return None
+    return pieces[0] if len(pieces) == 1 else pd.concat(pieces, ignore_index=True)
+
+def export_path(ticker, start_date, end_date, export_format, export_filename):
+    """Resolves the export file path under ~/Documents/invest_guard."""
     # Extract the file extension from the provided filename
-    filename, extension = os.path.splitext(export_filename)
+    filename, extension = os.path.splitext(export_filename or "")
 
     # Construct dynamic filename
     dynamic_filename = f"{ticker}_data_{start_date}_to_{end_date}.{export_format}"
@@ -160,63 +267,284 @@ def export_data(data, ticker, start_date, end_date, export_format, export_filena
     # Construct export file path
     export_dir = os.path.join(os.path.expanduser("~"), "Documents", "invest_guard")
     os.makedirs(export_dir, exist_ok=True)
-    filepath = os.path.join(export_dir, export_filename if extension else dynamic_filename)
+    return os.path.join(export_dir, export_filename if extension else dynamic_filename)
+
+def export_data(data, ticker, start_date, end_date, export_format, export_filename, compression=None):
+    with span("export", format=export_format, rows=len(data)):
+        _export_data(data, ticker, start_date, end_date, export_format, export_filename, compression)
+
+def _export_data(data, ticker, start_date, end_date, export_format, export_filename, compression=None):
+    filepath = export_path(ticker, start_date, end_date, export_format, export_filename)
+
+    if isinstance(data, list):
+        data = pd.DataFrame(data)
+    elif not isinstance(data, pd.DataFrame):
+        raise ValueError("Data must be either a DataFrame or a list of dictionaries.")
 
     # Convert 'Timestamp' column to datetime type if it's not already in datetime format
-    if isinstance(data, pd.DataFrame) and 'Timestamp' in data.columns:
-        data['Timestamp'] = pd.to_datetime(data['Timestamp'], errors='coerce')
-
-    if export_format == "xlsx":
-        # Export to Excel with pandas ExcelWriter
-        if isinstance(data, pd.DataFrame):
-            # Convert datetime to string format without timezone information
-            for col in data.columns:
-                if pd.api.types.is_datetime64_any_dtype(data[col]):
-                    data[col] = data[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-            with pd.ExcelWriter(filepath) as writer:
-                data.to_excel(writer, index=False)
-        else:
-            raise ValueError("Data must be a DataFrame when exporting to Excel.")
+    if 'Timestamp' in data.columns and not pd.api.types.is_datetime64_any_dtype(data['Timestamp']):
+        data = data.assign(Timestamp=pd.to_datetime(data['Timestamp'], errors='coerce'))
+
+    if export_format in ARROW_FORMATS:
+        # Binary columnar formats keep datetime and numeric columns typed
+        write_arrow_format(data, filepath, export_format, compression)
+    elif export_format == "xlsx":
+        # Excel cannot store timezones, so datetime columns are written as strings
+        # on a shallow copy rather than rewriting the caller's frame
+        datetime_columns = {
+            col: data[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+            for col in data.columns if pd.api.types.is_datetime64_any_dtype(data[col])
+        }
+        with pd.ExcelWriter(filepath) as writer:
+            data.assign(**datetime_columns).to_excel(writer, index=False)
+    elif export_format == "csv":
+        data.to_csv(filepath, index=False)
+    elif export_format == "json":
+        data.to_json(filepath, orient="records")
+    elif export_format == "jsonl":
+        data.to_json(filepath, orient="records", lines=True, date_format="iso")
     else:
-        # For other export formats (e.g., csv, json)
-        if isinstance(data, pd.DataFrame):
-            data = data.to_dict(orient="records")
-        elif not isinstance(data, list):
-            raise ValueError("Data must be either a DataFrame or a list of dictionaries.")
-
-        # Export data to specified format
-        if export_format == "csv":
-            pd.DataFrame(data).to_csv(filepath, index=False)
-        elif export_format == "json":
-            pd.DataFrame(data).to_json(filepath, orient="records")
-        else:
-            raise ValueError(f"Invalid export format: {export_format}")
+        raise ValueError(f"Invalid export format: {export_format}")
+
+    print(f"Data exported successfully to {filepath}.")
 
-        print(f"Data exported successfully to {filepath}.")
+def display_data(data, args):
+    """Prints fetched data with the view, columns and format chosen on the command line."""
+    try:
+        with span("render", rows=len(data), view="pager" if args.pager else args.view):
+            show(data, LABELS, args)
+    except ValueError as e:
+        logger.error(colors().red + "%s" + colors().reset, e)
+
+def open_cache(args):
+    """Returns the local OHLCV cache, or None when --no-cache is given."""
+    if args.no_cache:
+        return None
+    try:
+        return OHLCVCache(live_ttl=args.cache_ttl)
+    except Exception as e:
+        logger.warning("OHLCV cache unavailable, fetching without it: %s", e)
+        return None
+
+def open_reference_cache(args):
+    """Returns the reference-data cache used by --quote, or None when --no-cache is given."""
+    if args.no_cache:
+        return None
+    try:
+        return ReferenceCache(ttl=args.reference_ttl)
+    except Exception as e:
+        logger.warning("Reference data cache unavailable, fetching without it: %s", e)
+        return None
+
+def is_streaming(args):
+    """True when the export should go through a chunked writer (--stream or --append)."""
+    return bool(args.export_format or args.dataset) and (args.stream or args.append)
+
+def open_export(ticker, args):
+    """
+    Returns (writer, path) for the export chosen on the command line: the
+    --dataset directory, upserted partition by partition, or else a chunked
+    writer for the --export-format file. `ticker` is "multi" for long-format
+    rows carrying a Ticker column.
+    """
+    if args.dataset:
+        return DatasetWriter(args.dataset, args.interval, None if ticker == "multi" else ticker, args.compression), args.dataset
+    filepath = export_path(ticker, args.start_date, args.end_date, args.export_format, args.export_filename)
+    return open_writer(args.export_format, filepath, append=args.append,
+                       chunk_size=args.chunk_size, compression=args.compression), filepath
+
+def stream_export(data, ticker, args):
+    """Writes an already fetched frame through a chunked writer, or into the --dataset."""
+    writer, filepath = open_export(ticker, args)
+    with span("export", format=args.export_format or "dataset", rows=len(data)), writer:
+        writer.write(data)
+    print(f"Data exported successfully to {filepath} ({writer.rows_written} rows).")
+
+def stream_range(args, source, cache, market):
+    """
+    Writes a single ticker's date range to the export file window by window
+    as the windows arrive, so the range is never held in memory as a whole.
+    """
+    writer, filepath = open_export(args.ticker, args)
+    with writer:
+        def write(rows):
+            with span("export", format=args.export_format or "dataset", rows=len(rows)):
+                writer.write(rows)
+
+        fetch_data(args.asset_type, args.ticker, args.start_date, args.end_date, cache=cache, refresh=args.refresh,
+                   source=source, interval=args.interval, market=market, on_window=write,
+                   max_workers=args.max_workers, rate_limit=args.rate_limit)
+    print(f"Data exported successfully to {filepath} ({writer.rows_written} rows).")
+
+def fetch_many_command(args, cache=None):
+    """
+    Fetches every ticker given via --ticker/--tickers/--tickers-file in bulk
+    batches across a bounded worker pool and merges them into one long table.
+    """
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file)
+    if not tickers:
+        logger.warning("No ticker symbols provided.")
+        return
+
+    period = None
+    if not (args.start_date and args.end_date):
+        market_open, closure_info = is_market_open("United States", args.timezone)
+        if not market_open and args.asset_type not in ["crypto", "currency"]:
+            logger.info("Closure info: %s", closure_info)
+        period = "1d" if market_open or args.asset_type in ["crypto", "currency"] else "2d"
+
+    source = get_source(args.source)
+    base = resolve_interval(source, args.interval, cache, tickers, args.start_date, args.end_date, args.refresh)
+    market = bar_market(args.asset_type, args.timezone)
+
+    def to_interval(frame):
+        if base == args.interval:
+            return frame
+        with span("transform:resample", rows=len(frame), interval=args.interval):
+            return resample_ohlcv(frame, args.interval, market)
+
+    logger.info("Fetching %d tickers from %s (batch size %d, %d in flight, %s bars%s)...",
+                len(tickers), args.source, args.batch_size, args.max_workers, base,
+                f" resampled to {args.interval}" if base != args.interval else "")
+    started = datetime.now()
+    if is_streaming(args):
+        # Each ticker is written out as soon as it arrives instead of being held for one table
+        writer, filepath = open_export("multi", args)
+        with writer:
+            def write_ticker(ticker, frame):
+                piece = add_derived_columns(to_interval(frame)).reset_index()
+                piece.insert(0, "Ticker", ticker)
+                with span("export", format=args.export_format or "dataset", rows=len(piece)):
+                    writer.write(piece)
+                logger.info("%s: %d rows written", ticker, len(piece))
+
+            frames, failures = fetch_many(tickers, source, args.start_date, args.end_date, period,
+                                          batch_size=args.batch_size, max_workers=args.max_workers,
+                                          cache=cache, refresh=args.refresh, on_result=write_ticker,
+                                          rate_limit=args.rate_limit, interval=base)
+        fetched = len(tickers) - len(failures)
+    else:
+        frames, failures = fetch_many(tickers, source, args.start_date, args.end_date, period,
+                                      batch_size=args.batch_size, max_workers=args.max_workers,
+                                      cache=cache, refresh=args.refresh, rate_limit=args.rate_limit, interval=base)
+        frames = {ticker: to_interval(frame) for ticker, frame in frames.items()}
+        fetched = len(frames)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    for ticker, reason in failures.items():
+        logger.warning(colors().red + "Failed to fetch data for %s: %s" + colors().reset, ticker, reason)
+    logger.info("Fetched %d/%d tickers in %.2fs.", fetched, len(tickers), elapsed)
+
+    if is_streaming(args):
+        print(f"Data exported successfully to {filepath} ({writer.rows_written} rows).")
+        return
+
+    data = to_long_format(frames)
+    if data.empty:
+        logger.warning("No data fetched for %s", ", ".join(tickers))
+        return
+
+    add_derived_columns(data)
+    display_data(data, args)
+
+    if args.dataset:
+        stream_export(data, "multi", args)
+    elif args.export_format:
+        export_data(data, "multi", args.start_date, args.end_date, args.export_format, args.export_filename, args.compression)
+
+def quote_command(args):
+    """
+    Prints a quote snapshot (price, ranges, ratios, real market cap, ...) for
+    every ticker given, using the source's bulk quote endpoint instead of
+    downloading price history.
+    """
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file)
+    if not tickers:
+        logger.warning("No ticker symbols provided.")
+        return
+    if args.start_date or args.end_date:
+        logger.warning("--quote takes a snapshot of the current quote; --start-date and --end-date are ignored.")
+    if args.dataset:
+        logger.warning("--dataset stores price history, not quote snapshots; it is ignored with --quote.")
+
+    source = get_source(args.source)
+    reference = open_reference_cache(args)
+    started = datetime.now()
+    try:
+        data, failures = fetch_quotes(tickers, source, reference, refresh=args.refresh,
+                                      max_workers=args.max_workers, rate_limit=args.rate_limit)
+    except ValueError as e:
+        logger.error(colors().red + "%s" + colors().reset, e)
+        return
+    finally:
+        if reference is not None:
+            logger.info(reference.summary())
+            reference.close()
+
+    for ticker, reason in failures.items():
+        logger.warning(colors().red + "Failed to fetch a quote for %s: %s" + colors().reset, ticker, reason)
+    logger.info("Fetched %d/%d quotes in %.2fs.", len(data), len(tickers), (datetime.now() - started).total_seconds())
+    if data.empty:
+        return
+
+    display_data(data, args)
+    if args.export_format:
+        # A snapshot is one row per ticker, so it is always written in one go
+        today = started.strftime("%Y-%m-%d")
+        export_data(data, "quotes", today, today, args.export_format, args.export_filename, args.compression)
 
 def fetch_command(args):
+    if args.plain:
+        disable_colors()
     logger.info("Fetching data...")
     logger.info("Args: %s", args)  # Log the args object to verify its contents
     logger.info("Ticker: %s", args.ticker if hasattr(args, 'ticker') else None)  # Access args.ticker attribute if it exists
     logger.info("Source: %s", args.source)
     logger.info("Asset type: %s", args.asset_type)
 
-    logger.info(COLOR_YELLOW + "Checking internet connection..." + COLOR_RESET)
+    logger.info(colors().yellow + "Checking internet connection..." + colors().reset)
     connected = True  # Simulate internet check, change to actual check
 
     if not connected:
-        logger.warning(COLOR_YELLOW + "No internet connection. Retrying in 5 seconds..." + COLOR_RESET)
-        time.sleep(5)
+        logger.warning(colors().yellow + "No internet connection. Retrying in 5 seconds..." + colors().reset)
+        with span("wait:reconnect", "wait"):
+            time.sleep(5)
         connected = False
 
-    logger.info(COLOR_GREEN + "Connection established." + COLOR_RESET)
-
-    if args.source == "yahoo":
+    logger.info(colors().green + "Connection established." + colors().reset)
+
+    if is_streaming(args) and args.export_format and args.export_format not in WRITERS:
+        logger.error("Streaming export supports %s, not %s.", ", ".join(sorted(WRITERS)), args.export_format)
+        return
+    if args.export_format in ("feather", "arrow") and args.compression:
+        # Checked up front, before anything is downloaded
+        try:
+            check_ipc_compression(args.compression, args.export_format)
+        except ValueError as e:
+            logger.error(str(e))
+            return
+
+    if args.quote:
+        quote_command(args)
+        return
+
+    cache = open_cache(args)
+    if args.tickers or args.tickers_file:
+        fetch_many_command(args, cache)
+    else:
+        source = get_source(args.source)
+        market = bar_market(args.asset_type, args.timezone)
+        data, streamed = None, False
         if args.asset_type in ["stock", "etf", "currency", "commodity"]:
             if args.start_date and args.end_date:
                 logger.info("Fetching historical data...")
-                data = fetch_data(args.asset_type, args.ticker, args.start_date, args.end_date)
+                if is_streaming(args):
+                    stream_range(args, source, cache, market)
+                    streamed = True
+                else:
+                    data = fetch_data(args.asset_type, args.ticker, args.start_date, args.end_date,
+                                      cache=cache, refresh=args.refresh, source=source, interval=args.interval, market=market,
+                                      max_workers=args.max_workers, rate_limit=args.rate_limit)
             else:
                 default_timezone = args.timezone if args.timezone else "United States"
                 market_open, closure_info = is_market_open(default_timezone, args.timezone)
@@ -228,76 +556,32 @@ def fetch_command(args):
                         logger.info("Closure info: %s", closure_info)
                 if market_open or args.asset_type in ["currency", "crypto"]:
                     logger.info("Fetching live data...")
-                    data = fetch_data(args.asset_type, args.ticker)
                 else:
                     logger.info("Fetching historical data...")
-                    data = fetch_data(args.asset_type, args.ticker)
+                data = fetch_data(args.asset_type, args.ticker, market_open=market_open, source=source,
+                                  interval=args.interval, market=market)
         else:  # For crypto and other assets
             logger.info("Fetching live data...")
-            data = fetch_data(args.asset_type, args.ticker)
+            data = fetch_data(args.asset_type, args.ticker, source=source, interval=args.interval, market=market)
 
-        if data:
-            headers = [LABELS.get(key, key) for key in data[0].keys()]  # Get headers from the first data entry
-            rows = [[value for value in entry.values()] for entry in data]  # Extract values from each entry
-            table = tabulate(rows, headers=headers, tablefmt="grid")
-            print(table)
+        if data is not None and not data.empty:
+            display_data(data, args)
 
             # Check if export format is provided
-            if args.export_format:
-                # convert data to DataFrame it it's alist
-                if isinstance(data, list):
-                    data = pd.DataFrame(data)
-
+            if is_streaming(args) or args.dataset:
+                stream_export(data, args.ticker, args)
+            elif args.export_format:
                 # Export data if export option is provided
-                export_data(data, args.ticker, args.start_date, args.end_date, args.export_format, args.export_filename)
-        else:
+                export_data(data, args.ticker, args.start_date, args.end_date, args.export_format, args.export_filename, args.compression)
+        elif not streamed:
             logger.warning("No data fetched for %s", args.ticker)
 
-    else:
-        logger.warning("Invalid source specified. Only 'yahoo' source is supported.")
+    if cache is not None:
+        logger.info(cache.summary())
+        cache.close()
 
 def setup_subparser(subparsers):
-    fetch_parser = subparsers.add_parser("fetch", help="Fetch data")
-    fetch_parser.add_argument("-t", "--ticker", help="Ticker symbol", required=True)
-    fetch_parser.add_argument("-s", "--source", help="Data source", choices=["yahoo", "google"], default="yahoo")
-    fetch_parser.add_argument("-z", "--timezone", help="Timezone")
-    fetch_parser.add_argument("--asset-type", help="Asset type to fetch data for", choices=["stock", "etf", "crypto", "currency", "commodity"], required=True)
-    fetch_parser.add_argument("--start-date", help="Start date for historical data (YYYY-MM-DD)")
-    fetch_parser.add_argument("--end-date", help="End date for historical data (YYYY-MM-DD)")
-    fetch_parser.add_argument("--export-format", help="Export format for f`etched data", choices=["csv", "json", "xlsx"])
-    fetch_parser.add_argument("--export-filename", help="Export filename for fetched data")
-
-
-def execute(args):
-    if args.command == "fetch":
-        fetch_command(args)
-    else:
-        print("Invalid command. Please use 'fetch' command.")
-
-if __name__ == "__main__":
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Investment Guard CLI")
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
-
-    setup_subparser(subparsers)
-
-    args = parser.parse_args()
-
-    if args.command == "fetch":
-        execute(args)
-    else:
-        print("Invalid command. Please use 'fetch' command.")
-def setup_subparser(subparsers):
-    fetch_parser = subparsers.add_parser("fetch", help="Fetch data")
-    fetch_parser.add_argument("-t", "--ticker", help="Ticker symbol", required=True)
-    fetch_parser.add_argument("-s", "--source", help="Data source", choices=["yahoo"], default="yahoo")
-    fetch_parser.add_argument("-z", "--timezone", help="Timezone")
-    fetch_parser.add_argument("--asset-type", help="Asset type to fetch data for", choices=["stock", "etf", "crypto", "currency", "commodity"], required=True)
-    fetch_parser.add_argument("--start-date", help="Start date for historical data fetch")
-    fetch_parser.add_argument("--end-date", help="End date for historical data fetch")
-    fetch_parser.add_argument("--export-format", help="Export format for fetched data", choices=["csv", "json", "xlsx"])
-    fetch_parser.add_argument("--export-filename", help="Export filename for fetched data")
+    setup_fetch_parser(subparsers)
 
 def execute(args):
     if args.command == "fetch":
@@ -315,13 +599,8 @@ if __name__ == "__main__":
     setup_subparser(subparsers)
 
     args = parser.parse_args()
-    if args.command == "fetch":
-     execute(args)
-    else:
-        print("Invalid command. Please use 'fetch' command.")
-        display_help()
-
     if args.command == "fetch":
         execute(args)
     else:
         print("Invalid command. Please use 'fetch' command.")
+        display_help()
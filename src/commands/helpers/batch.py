@@ -0,0 +1,206 @@
+import asyncio
+import logging
+
+import pandas as pd
+
+from .defaults import DEFAULT_BATCH_SIZE, DEFAULT_MAX_WORKERS
+from .profiling import span
+from .resilience import CircuitOpenError
+from .sources import FetchEngine, run_engine
+
+logger = logging.getLogger(__name__)
+
+
+def parse_tickers(tickers=None, tickers_file=None):
+    """
+    Collects ticker symbols from a comma separated string and/or a file.
+
+    The file may hold one or more comma separated symbols per line; blank lines
+    and lines starting with '#' are ignored. Symbols are upper-cased and
+    de-duplicated while keeping their original order.
+
+    Returns:
+        list: Ticker symbols.
+    """
+    raw = []
+    if tickers:
+        raw.extend(tickers.split(","))
+    if tickers_file:
+        with open(tickers_file) as handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    raw.extend(line.split(","))
+
+    symbols = []
+    seen = set()
+    for symbol in raw:
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            symbols.append(symbol)
+    return symbols
+
+
+def chunked(items, size):
+    """Yields consecutive slices of at most `size` items."""
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+async def download_batch(engine, batch, start_date, end_date, period, interval):
+    """
+    Downloads one batch, falling back to per-ticker requests if a bulk call
+    fails so a single bad symbol does not sink the whole batch.
+
+    Returns:
+        tuple: (frames, failures) dictionaries keyed by ticker.
+    """
+    try:
+        return await engine.batch(batch, start_date, end_date, period, interval)
+    except CircuitOpenError as e:
+        # Per-ticker requests would be turned away just the same
+        return {}, dict.fromkeys(batch, str(e))
+    except Exception as e:
+        if len(batch) == 1:
+            return {}, {batch[0]: str(e)}
+        logger.warning("Bulk request for %d tickers failed (%s); retrying individually.", len(batch), e)
+
+    with span("retry:per_ticker", "retry", tickers=len(batch)):
+        results = await asyncio.gather(
+            *(engine.batch([ticker], start_date, end_date, period, interval) for ticker in batch),
+            return_exceptions=True,
+        )
+    frames, failures = {}, {}
+    for ticker, result in zip(batch, results):
+        if isinstance(result, Exception):
+            failures[ticker] = str(result)
+        else:
+            frames.update(result[0])
+            failures.update(result[1])
+    return frames, failures
+
+
+def fetch_many(tickers, source, start_date=None, end_date=None, period=None,
+               batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+               cache=None, refresh=False, interval="1d", on_result=None, rate_limit=None):
+    """
+    Fetches histories for many tickers in bulk batches with at most
+    `max_workers` upstream requests in flight.
+
+    When a cache is given and a date range is requested, tickers already cached
+    are served locally and only their missing date gaps are downloaded; tickers
+    sharing the same gaps are still batched together.
+
+    Args:
+        on_result: Optional callable receiving (ticker, frame) as soon as each
+            ticker completes. Frames handed to it are not retained, so callers
+            can stream results out with bounded memory.
+        rate_limit: Requests per second override for the source's token bucket.
+
+    Returns:
+        tuple: (frames, failures) where frames maps ticker to DataFrame in input
+        order (empty when on_result is given) and failures maps ticker to an
+        error message.
+    """
+    return run_engine(source, lambda engine: fetch_many_async(
+        tickers, source, start_date, end_date, period, batch_size=batch_size, max_workers=max_workers,
+        cache=cache, refresh=refresh, interval=interval, on_result=on_result, rate_limit=rate_limit, engine=engine,
+    ), max_in_flight=max_workers, rate_limit=rate_limit)
+
+
+async def fetch_many_async(tickers, source, start_date=None, end_date=None, period=None,
+                           batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                           cache=None, refresh=False, interval="1d", on_result=None, rate_limit=None,
+                           engine=None):
+    """
+    Coroutine behind fetch_many(). Pass a running FetchEngine to reuse its
+    pooled session; otherwise one is opened for the call.
+    """
+    use_cache = cache is not None and start_date and end_date
+    results, failures = {}, {}
+
+    def deliver(ticker, frame):
+        if on_result is not None:
+            on_result(ticker, frame)
+        else:
+            results[ticker] = frame
+
+    def deliver_cached(ticker):
+        frame = cache.load(source.name, ticker, interval, start_date, end_date)
+        if frame.empty:
+            failures[ticker] = "No data returned"
+        else:
+            deliver(ticker, frame)
+
+    pending_gaps = {}
+    if use_cache:
+        by_gaps = {}
+        for ticker in tickers:
+            if refresh:
+                cache.invalidate(source.name, ticker, interval, start_date, end_date)
+            gaps = cache.missing_ranges(source.name, ticker, interval, start_date, end_date)
+            cache.record_lookup(gaps, start_date, end_date)
+            if gaps:
+                by_gaps.setdefault(tuple(gaps), []).append(ticker)
+                pending_gaps[ticker] = len(gaps)
+            else:
+                deliver_cached(ticker)
+        jobs = [
+            (batch, gap_start, gap_end, None)
+            for gaps, group in by_gaps.items()
+            for batch in chunked(group, max(1, batch_size))
+            for gap_start, gap_end in gaps
+        ]
+    else:
+        jobs = [(batch, start_date, end_date, period) for batch in chunked(tickers, max(1, batch_size))]
+
+    if not jobs:
+        return {ticker: results[ticker] for ticker in tickers if ticker in results}, failures
+
+    async def run_job(engine, job):
+        batch, job_start, job_end, job_period = job
+        return job, await download_batch(engine, batch, job_start, job_end, job_period, interval)
+
+    async def run_all(engine):
+        for next_done in asyncio.as_completed([run_job(engine, job) for job in jobs]):
+            (batch, job_start, job_end, _), (frames, errors) = await next_done
+            failures.update(errors)
+            for ticker in batch:
+                if not use_cache:
+                    if ticker in frames:
+                        deliver(ticker, frames[ticker])
+                    elif ticker not in errors:
+                        failures[ticker] = "No data returned"
+                    continue
+                if ticker not in errors:
+                    cache.store(source.name, ticker, interval, frames.get(ticker), job_start, job_end)
+                pending_gaps[ticker] -= 1
+                if pending_gaps[ticker] == 0 and ticker not in failures:
+                    deliver_cached(ticker)
+            if use_cache:
+                cache.stats["upstream_requests"] += 1
+
+    if engine is not None:
+        await run_all(engine)
+    else:
+        async with FetchEngine(source, max_in_flight=max_workers, rate_limit=rate_limit) as engine:
+            await run_all(engine)
+
+    return {ticker: results[ticker] for ticker in tickers if ticker in results}, failures
+
+
+def to_long_format(frames):
+    """
+    Merges per-ticker histories into one long-format table with a leading
+    'Ticker' column.
+    """
+    with span("transform:merge", tickers=len(frames)):
+        pieces = []
+        for ticker, frame in frames.items():
+            piece = frame.reset_index()
+            piece.insert(0, "Ticker", ticker)
+            pieces.append(piece)
+        if not pieces:
+            return pd.DataFrame()
+        return pd.concat(pieces, ignore_index=True)
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .defaults import DEFAULT_CACHE_DIR, DEFAULT_LIVE_TTL, DEFAULT_REFERENCE_TTL
+
+logger = logging.getLogger(__name__)
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+# Tickers per reference lookup query, well below SQLite's limit on bound parameters
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL, dividends REAL, splits REAL,
+    PRIMARY KEY (source, ticker, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_key ON coverage (source, ticker, interval, start);
+CREATE TABLE IF NOT EXISTS series (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    tz TEXT,
+    PRIMARY KEY (source, ticker, interval)
+);
+CREATE TABLE IF NOT EXISTS reference (
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (source, ticker)
+) WITHOUT ROWID;
+"""
+
+
+def to_date(value):
+    """Normalizes a 'YYYY-MM-DD' string, date or timestamp into a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+class OHLCVCache:
+    """
+    On-disk SQLite cache of OHLCV bars keyed by source, ticker, interval and date.
+
+    Fetched date ranges are tracked separately from the bars themselves, so
+    weekends and holidays inside a cached range are not mistaken for gaps. A
+    range that reached into the day it was fetched on holds live bars and is
+    treated as missing again once `live_ttl` seconds have passed.
+    """
+
+    def __init__(self, path=None, live_ttl=DEFAULT_LIVE_TTL):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, "ohlcv.sqlite")
+        self.path = path
+        self.live_ttl = live_ttl
+        self.stats = {"hits": 0, "partial": 0, "misses": 0, "bars_read": 0, "bars_written": 0, "upstream_requests": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _coverage(self, source, ticker, interval):
+        return self._conn.execute(
+            "SELECT start, end, fetched_at FROM coverage WHERE source=? AND ticker=? AND interval=? ORDER BY start",
+            (source, ticker, interval),
+        ).fetchall()
+
+    def _is_expired(self, end, fetched_at, now):
+        fetched_day = date.fromtimestamp(fetched_at).isoformat()
+        return end > fetched_day and now - fetched_at > self.live_ttl
+
+    def missing_ranges(self, source, ticker, interval, start, end):
+        """
+        Returns the sub-ranges of [start, end) that are not cached or whose live
+        bars have expired.
+
+        Returns:
+            list: (start, end) date tuples, end exclusive.
+        """
+        start, end = to_date(start), to_date(end)
+        now = time.time()
+        with self._lock:
+            rows = self._coverage(source, ticker, interval)
+
+        gaps = []
+        cursor = start
+        for covered_start, covered_end, fetched_at in rows:
+            covered_start, covered_end = date.fromisoformat(covered_start), date.fromisoformat(covered_end)
+            if covered_end <= cursor or covered_start >= end:
+                continue
+            if self._is_expired(covered_end.isoformat(), fetched_at, now):
+                continue
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+            if cursor >= end:
+                break
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def record_lookup(self, gaps, start, end):
+        """Updates hit/partial/miss counters for one lookup."""
+        if not gaps:
+            self.stats["hits"] += 1
+        elif gaps == [(to_date(start), to_date(end))]:
+            self.stats["misses"] += 1
+        else:
+            self.stats["partial"] += 1
+
+    def store(self, source, ticker, interval, frame, start, end):
+        """
+        Upserts the bars in `frame` and marks [start, end) as covered.
+        """
+        start, end = to_date(start), to_date(end)
+        now = time.time()
+        today = date.fromtimestamp(now)
+
+        with self._lock, self._conn:
+            if frame is not None and not frame.empty:
+                index = pd.DatetimeIndex(frame.index)
+                tz = str(index.tz) if index.tz is not None else None
+                if tz is not None:
+                    index = index.tz_convert("UTC")
+                values = [
+                    frame[column].to_numpy(dtype="float64") if column in frame.columns
+                    else np.zeros(len(frame))
+                    for column in BAR_COLUMNS
+                ]
+                rows = zip(index.as_unit("ns").asi8.tolist(), *(column.tolist() for column in values))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((source, ticker, interval, *row) for row in rows),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)", (source, ticker, interval, tz)
+                )
+                self.stats["bars_written"] += len(frame)
+
+            # Split off the part of the range that may still be receiving live bars
+            historical_end = min(end, today)
+            if start < historical_end:
+                self._add_coverage(source, ticker, interval, start, historical_end, now)
+            if end > today:
+                live_start = max(start, today)
+                self._conn.execute(
+                    "DELETE FROM coverage WHERE source=? AND ticker=? AND interval=? AND end>? AND start<?",
+                    (source, ticker, interval, live_start.isoformat(), end.isoformat()),
+                )
+                self._conn.execute(
+                    "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+                    (source, ticker, interval, live_start.isoformat(), end.isoformat(), now),
+                )
+
+    def _add_coverage(self, source, ticker, interval, start, end, now):
+        """Merges [start, end) with any overlapping or adjacent historical ranges."""
+        start, end = start.isoformat(), end.isoformat()
+        overlapping = self._conn.execute(
+            "SELECT rowid, start, end, fetched_at FROM coverage "
+            "WHERE source=? AND ticker=? AND interval=? AND start<=? AND end>=?",
+            (source, ticker, interval, end, start),
+        ).fetchall()
+        for rowid, covered_start, covered_end, fetched_at in overlapping:
+            if covered_end > date.fromtimestamp(fetched_at).isoformat():
+                continue  # live ranges are replaced, not merged
+            start, end = min(start, covered_start), max(end, covered_end)
+            self._conn.execute("DELETE FROM coverage WHERE rowid=?", (rowid,))
+        self._conn.execute(
+            "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)", (source, ticker, interval, start, end, now)
+        )
+
+    def load(self, source, ticker, interval, start, end):
+        """
+        Reads cached bars whose local date falls within [start, end).
+
+        Returns:
+            DataFrame: Bars indexed by 'Date' in the ticker's exchange timezone.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tz FROM series WHERE source=? AND ticker=? AND interval=?", (source, ticker, interval)
+            ).fetchone()
+            tz = row[0] if row else None
+            lower = pd.Timestamp(to_date(start), tz=tz).value
+            upper = pd.Timestamp(to_date(end), tz=tz).value
+            rows = self._conn.execute(
+                "SELECT ts, open, high, low, close, volume, dividends, splits FROM bars "
+                "WHERE source=? AND ticker=? AND interval=? AND ts>=? AND ts<? ORDER BY ts",
+                (source, ticker, interval, lower, upper),
+            ).fetchall()
+
+        self.stats["bars_read"] += len(rows)
+        array = np.array(rows, dtype="float64").reshape(len(rows), len(BAR_COLUMNS) + 1)
+        index = pd.to_datetime(array[:, 0].astype("int64"), utc=tz is not None)
+        if tz is not None:
+            index = index.tz_convert(tz)
+        frame = pd.DataFrame(array[:, 1:], columns=BAR_COLUMNS, index=pd.DatetimeIndex(index, name="Date"))
+        frame["Volume"] = frame["Volume"].astype("int64")
+        return frame
+
+    def invalidate(self, source, ticker, interval, start, end):
+        """Forgets coverage overlapping [start, end) so the range is fetched again."""
+        start, end = to_date(start).isoformat(), to_date(end).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM coverage WHERE source=? AND ticker=? AND interval=? AND start<? AND end>?",
+                (source, ticker, interval, end, start),
+            )
+
+    def summary(self):
+        stats = self.stats
+        return (f"Cache: {stats['hits']} hits, {stats['partial']} partial, {stats['misses']} misses, "
+                f"{stats['upstream_requests']} upstream requests, {stats['bars_read']} bars read, "
+                f"{stats['bars_written']} bars written ({self.path})")
+
+
+class ReferenceCache:
+    """
+    Per-ticker reference data that rarely changes (company name, exchange,
+    shares outstanding), kept in the same SQLite file as the bars and served
+    for `ttl` seconds before it is fetched again.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_REFERENCE_TTL):
+        if path is None:
+            os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+            path = os.path.join(DEFAULT_CACHE_DIR, "ohlcv.sqlite")
+        self.path = path
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, source, tickers):
+        """
+        Returns:
+            dict: Ticker to its reference fields, for the tickers with fresh entries.
+        """
+        oldest = time.time() - self.ttl
+        wanted = list(dict.fromkeys(tickers))
+        entries = {}
+        with self._lock:
+            for first in range(0, len(wanted), LOOKUP_CHUNK):
+                chunk = wanted[first:first + LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT ticker, data FROM reference WHERE source=? AND fetched_at>=? "
+                    f"AND ticker IN ({', '.join('?' * len(chunk))})",
+                    (source, oldest, *chunk),
+                ).fetchall()
+                entries.update((ticker, json.loads(data)) for ticker, data in rows)
+        self.stats["hits"] += len(entries)
+        self.stats["misses"] += len(wanted) - len(entries)
+        return entries
+
+    def store(self, source, entries):
+        """Saves `entries`, a dict of ticker to reference fields."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reference VALUES (?, ?, ?, ?)",
+                ((source, ticker, json.dumps(fields), now) for ticker, fields in entries.items()),
+            )
+
+    def summary(self):
+        return f"Reference data: {self.stats['hits']} cached, {self.stats['misses']} fetched ({self.path})"
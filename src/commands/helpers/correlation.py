@@ -0,0 +1,316 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import to_date
+from .defaults import DEFAULT_CORRELATION_BLOCK, DEFAULT_MAX_GAP, DEFAULT_MIN_COVERAGE, DEFAULT_MIN_PERIODS
+from .sessions import calendar_for
+
+
+class PanelBuilder:
+    """
+    Collects each ticker's closes as its history arrives (it can be passed
+    to fetch_many() as on_result, so the frames are not retained) and aligns
+    them on one date grid.
+
+    Daily bars are placed on the trading sessions of `market` in
+    [start_date, end_date), by their local date; bars on dates that are not
+    sessions (a source's stray holiday rows) are dropped. Intraday bars are
+    aligned on their timestamps, keeping those inside a session. Without a
+    market (assets trading around the clock) every calendar day or
+    timestamp counts.
+    """
+
+    def __init__(self, start_date, end_date, interval="1d", market=None):
+        self.start, self.end = to_date(start_date), to_date(end_date)
+        self.intraday = interval != "1d"
+        self.calendar = calendar_for(market, self.start, self.end) if market else None
+        self.series = {}
+        self.off_grid = 0
+
+    def add(self, ticker, frame):
+        index = pd.DatetimeIndex(frame.index)
+        closes = frame["Close"].to_numpy(dtype="float64")
+        if self.intraday:
+            keys = (index.tz_convert("UTC") if index.tz is not None else index).as_unit("ns").asi8
+            valid = self.calendar.is_open(index) if self.calendar is not None else np.ones(len(keys), dtype=bool)
+        else:
+            local = index.tz_localize(None) if index.tz is not None else index
+            keys = local.values.astype("datetime64[D]")
+            valid = self.calendar.is_session(keys) if self.calendar is not None else np.ones(len(keys), dtype=bool)
+        valid &= np.isfinite(closes)
+        self.off_grid += int(len(keys) - valid.sum())
+        self.series[ticker] = (keys[valid], closes[valid])
+
+    def build(self, tickers=None):
+        """
+        Returns:
+            tuple: (dates as a DatetimeIndex, list of tickers, prices as a
+            dates x tickers float64 array with NaN where a ticker has no bar).
+        """
+        tickers = [ticker for ticker in (tickers or self.series) if ticker in self.series]
+        if self.intraday:
+            grid = np.unique(np.concatenate([keys for keys, _ in self.series.values()])) if self.series \
+                else np.array([], dtype="int64")
+            dates = pd.DatetimeIndex(pd.to_datetime(grid, utc=True), name="Date")
+            if self.calendar is not None:
+                dates = dates.tz_convert(self.calendar.timezone)
+        else:
+            if self.calendar is not None:
+                grid = self.calendar.sessions_between(self.start, self.end).index.values.astype("datetime64[D]")
+            else:
+                grid = np.arange(np.datetime64(self.start), np.datetime64(self.end), dtype="datetime64[D]")
+            dates = pd.DatetimeIndex(grid, name="Date")
+
+        prices = np.full((len(grid), len(tickers)), np.nan, order="F")
+        for column, ticker in enumerate(tickers):
+            keys, closes = self.series[ticker]
+            positions = np.searchsorted(grid, keys)
+            inside = positions < len(grid)
+            inside[inside] = grid[positions[inside]] == keys[inside]
+            prices[positions[inside], column] = closes[inside]
+        return dates, tickers, prices
+
+
+def forward_fill(prices, max_gap=DEFAULT_MAX_GAP):
+    """Carries each ticker's last price forward over gaps of at most `max_gap` dates."""
+    rows = np.arange(len(prices))[:, None]
+    last = np.where(np.isfinite(prices), rows, -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    fill = (last >= 0) & (rows - last <= max_gap)
+    filled = np.full_like(prices, np.nan)
+    columns = np.broadcast_to(np.arange(prices.shape[1]), prices.shape)
+    filled[fill] = prices[last[fill], columns[fill]]
+    return filled
+
+
+def panel_returns(dates, tickers, prices, kind="log", missing="pairwise", max_gap=DEFAULT_MAX_GAP,
+                  min_coverage=DEFAULT_MIN_COVERAGE):
+    """
+    Turns an aligned price panel into one-period returns.
+
+    Missing-data policies:
+        pairwise  a return is missing unless the ticker has prices on both
+                  dates; each pair of tickers later uses the dates both have
+        ffill     prices are carried forward over gaps of up to `max_gap`
+                  dates first (a zero return while stale), then as pairwise
+        drop      only dates on which every remaining ticker has a return
+                  are kept
+
+    Tickers with returns on fewer than `min_coverage` of the dates are
+    removed first, so one sparse history cannot empty a 'drop' panel.
+
+    Returns:
+        tuple: (dates of the returns, kept tickers, returns array, dict of
+        removed tickers and their coverage).
+    """
+    if missing == "ffill":
+        prices = forward_fill(prices, max_gap)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = prices[1:] / prices[:-1]
+        returns = np.log(ratio) if kind == "log" else ratio - 1.0
+    returns[~np.isfinite(returns)] = np.nan
+    dates = dates[1:]
+
+    coverage = np.isfinite(returns).mean(axis=0) if len(returns) else np.zeros(len(tickers))
+    keep = coverage >= min_coverage
+    removed = {ticker: float(value) for ticker, value, kept in zip(tickers, coverage, keep) if not kept}
+    returns = np.asfortranarray(returns[:, keep])
+    tickers = [ticker for ticker, kept in zip(tickers, keep) if kept]
+
+    if missing == "drop":
+        complete = np.isfinite(returns).all(axis=1)
+        returns, dates = np.asfortranarray(returns[complete]), dates[complete]
+    return dates, tickers, returns, removed
+
+
+def rank_columns(values):
+    """Replaces each column by its ranks (ties averaged), leaving NaN in place."""
+    return pd.DataFrame(values).rank().to_numpy(dtype="float64")
+
+
+def _moments(x, y):
+    """
+    Sums over the rows of blocks x (rows x a) and y (rows x b) for every
+    column pair: count, sums, sums of squares and cross products. A row
+    counts for a pair only where both values are present. Complete blocks
+    need a single matrix product; blocks with gaps use masked products.
+    """
+    present_x, present_y = np.isfinite(x), np.isfinite(y)
+    if present_x.all() and present_y.all():
+        return (float(len(x)), x.sum(axis=0)[:, None], y.sum(axis=0)[None, :],
+                (x * x).sum(axis=0)[:, None], (y * y).sum(axis=0)[None, :], x.T @ y)
+    x0, y0 = np.where(present_x, x, 0.0), np.where(present_y, y, 0.0)
+    fx, fy = present_x.astype("float64"), present_y.astype("float64")
+    return fx.T @ fy, x0.T @ fy, fx.T @ y0, (x0 * x0).T @ fy, fx.T @ (y0 * y0), x0.T @ y0
+
+
+def _finish(method, moments, min_periods):
+    """Pearson correlation or sample covariance from summed moments; NaN below `min_periods` rows."""
+    n, sx, sy, sxx, syy, sxy = moments
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cross = sxy - sx * sy / n
+        if method == "covariance":
+            result = cross / (n - 1)
+        else:
+            result = np.clip(cross / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n)), -1.0, 1.0)
+    return np.where(np.broadcast_to(n, result.shape) >= min_periods, result, np.nan)
+
+
+def _blocks(count, block_size):
+    return [(start, min(start + block_size, count)) for start in range(0, count, block_size)]
+
+
+def correlation_matrix(returns, method="pearson", out=None, block_size=DEFAULT_CORRELATION_BLOCK,
+                       min_periods=DEFAULT_MIN_PERIODS):
+    """
+    Computes the tickers x tickers Pearson or Spearman correlation or
+    covariance matrix of `returns` (dates x tickers, NaN where missing).
+
+    The matrix is built from blocks of `block_size` tickers, each pair of
+    blocks one set of matrix products, so the working memory is about
+    dates x block_size values whatever the universe size. Only blocks on or
+    above the diagonal are computed; the rest are mirrored. Pairs are
+    computed over the dates both tickers have; Spearman ranks each ticker
+    over its own dates.
+
+    Args:
+        out: Array (for example a memory-mapped .npy file) receiving the
+            matrix; allocated when None.
+
+    Returns:
+        The filled `out` array.
+    """
+    count = returns.shape[1]
+    if out is None:
+        out = np.empty((count, count))
+    if method == "spearman":
+        returns = np.asfortranarray(rank_columns(returns))
+    blocks = _blocks(count, block_size)
+    for position, (a0, a1) in enumerate(blocks):
+        x = returns[:, a0:a1]
+        for b0, b1 in blocks[position:]:
+            block = _finish(method, _moments(x, returns[:, b0:b1]), min_periods)
+            out[a0:a1, b0:b1] = block
+            if b0 != a0:
+                out[b0:b1, a0:a1] = block.T
+    return out
+
+
+def window_ends(rows, window, step=1):
+    """End rows (exclusive) of the rolling windows over `rows` rows, the last one ending at the last row."""
+    if window > rows:
+        return []
+    return list(range(window + (rows - window) % step, rows + 1, step))
+
+
+def rolling_matrices(returns, window, method="pearson", step=1, out=None, block_size=DEFAULT_CORRELATION_BLOCK,
+                     min_periods=DEFAULT_MIN_PERIODS):
+    """
+    Computes one matrix per rolling window of `window` dates, every `step`
+    dates, into out[k] (windows x tickers x tickers).
+
+    Pearson and covariance slide the summed moments of each pair of blocks
+    from one window to the next, adding the dates that enter and removing
+    those that leave, so each step costs matrix products over `step` rows
+    rather than `window` rows; the sums are recomputed from scratch once
+    per window length to keep rounding from accumulating. Spearman ranks
+    change with every window, so each window is computed in full.
+
+    Returns:
+        The filled `out` array.
+    """
+    ends = window_ends(len(returns), window, step)
+    count = returns.shape[1]
+    if out is None:
+        out = np.empty((len(ends), count, count))
+    if method == "spearman":
+        for position, end in enumerate(ends):
+            correlation_matrix(returns[end - window:end], method, out[position], block_size, min_periods)
+        return out
+
+    blocks = _blocks(count, block_size)
+    for position, (a0, a1) in enumerate(blocks):
+        x = returns[:, a0:a1]
+        for b0, b1 in blocks[position:]:
+            y = returns[:, b0:b1]
+            moments, synced = None, None
+            for index, end in enumerate(ends):
+                start = end - window
+                if moments is None or end - synced >= window:
+                    moments, synced = _moments(x[start:end], y[start:end]), end
+                else:
+                    previous = ends[index - 1]
+                    entering = _moments(x[previous:end], y[previous:end])
+                    leaving = _moments(x[previous - window:start], y[previous - window:start])
+                    moments = tuple(total + new - old for total, new, old in zip(moments, entering, leaving))
+                block = _finish(method, moments, min_periods)
+                out[index, a0:a1, b0:b1] = block
+                if b0 != a0:
+                    out[index, b0:b1, a0:a1] = block.T
+    return out
+
+
+def open_matrix(path, shape, dtype="float64"):
+    """Creates a memory-mapped .npy file of `shape`, so a matrix larger than memory can be filled block by block."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+
+def labels_path(path):
+    """Path of the JSON file naming the rows, columns and windows of a matrix file."""
+    return os.path.splitext(path)[0] + ".json"
+
+
+def save_labels(path, tickers, dates, **details):
+    with open(labels_path(path), "w") as handle:
+        json.dump({"tickers": list(tickers), "dates": [str(date) for date in dates], **details}, handle, indent=1)
+
+
+def load_matrix(path):
+    """
+    Opens a matrix written by `guard correlate` without reading it into
+    memory.
+
+    Returns:
+        tuple: (read-only memory-mapped array, dict with 'tickers' naming
+        the rows and columns, 'dates' holding the last date of each window
+        of a rolling matrix or the first and last date of the sample, and
+        the options used).
+    """
+    with open(labels_path(path)) as handle:
+        labels = json.load(handle)
+    return np.load(path, mmap_mode="r"), labels
+
+
+def extreme_pairs(matrix, tickers, count=10, block_size=DEFAULT_CORRELATION_BLOCK):
+    """
+    Finds the `count` highest and lowest values above the diagonal, reading
+    the matrix one block of rows at a time.
+
+    Returns:
+        DataFrame: 'Ticker', 'Other' and 'Value' columns, highest first.
+    """
+    values, rows, columns = [], [], []
+    for a0, a1 in _blocks(len(tickers), block_size):
+        block = np.asarray(matrix[a0:a1])
+        row, column = np.nonzero(np.triu(np.ones(block.shape, dtype=bool), k=a0 + 1))
+        found = block[row, column]
+        finite = np.isfinite(found)
+        found, row, column = found[finite], row[finite], column[finite]
+        if len(found) > 2 * count:
+            picked = np.argsort(found)
+            picked = np.concatenate([picked[:count], picked[-count:]])
+            found, row, column = found[picked], row[picked], column[picked]
+        values.append(found)
+        rows.append(row + a0)
+        columns.append(column)
+
+    values, rows, columns = np.concatenate(values), np.concatenate(rows), np.concatenate(columns)
+    order = np.argsort(values)[::-1]
+    if len(order) > 2 * count:
+        order = np.concatenate([order[:count], order[-count:]])
+    names = np.asarray(tickers, dtype=object)
+    return pd.DataFrame({"Ticker": names[rows[order]], "Other": names[columns[order]], "Value": values[order]})
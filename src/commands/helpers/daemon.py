@@ -0,0 +1,170 @@
+# Client side and wire protocol of `guard serve`. The CLI imports this module
+# before deciding whether to run a command itself, so it must stay limited to
+# the standard library.
+#
+# One request per connection, as JSON lines. The client sends
+#   {"argv": [...], "cwd": "...", "isatty": true}   or   {"control": "status" | "stop"}
+# and the daemon answers with any number of
+#   {"out": "..."} / {"err": "..."}
+# followed by {"exit": code} (commands) or {"status": {...}} (control requests).
+import contextvars
+import json
+import os
+import socket
+import sys
+import threading
+
+from .defaults import DEFAULT_SOCKET_PATH
+
+# Commands the CLI hands to a running daemon; watch keeps a live terminal and serve is the daemon
+FORWARDED_COMMANDS = ("fetch", "analyze", "screen", "query", "correlate")
+
+# Set INVEST_GUARD_NO_DAEMON=1 to always run commands in-process
+NO_DAEMON_ENV = "INVEST_GUARD_NO_DAEMON"
+
+
+def should_forward(args):
+    """Whether the parsed command line can run in the daemon instead of this process."""
+    if os.environ.get(NO_DAEMON_ENV) or args.command not in FORWARDED_COMMANDS:
+        return False
+    # The pager reads keys from this terminal; profiles describe this process
+    return not (getattr(args, "pager", False) or getattr(args, "profile", None))
+
+
+def connect(path=DEFAULT_SOCKET_PATH, timeout=None):
+    """Returns a socket connected to the daemon, or None when none is listening."""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def send_message(sock, message):
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+def read_messages(sock):
+    """Yields the JSON messages arriving on `sock` until it closes."""
+    with sock.makefile("rb") as reader:
+        for line in reader:
+            yield json.loads(line)
+
+
+def forward(argv, path=DEFAULT_SOCKET_PATH):
+    """
+    Runs `guard <argv>` in the daemon, copying its output to this process.
+
+    Returns:
+        int: The command's exit code, or None if no daemon is running, in
+        which case nothing was run.
+    """
+    client = connect(path)
+    if client is None:
+        return None
+    with client:
+        try:
+            send_message(client, {"argv": argv, "cwd": os.getcwd(), "isatty": sys.stdout.isatty()})
+        except OSError:
+            return None
+        try:
+            for message in read_messages(client):
+                if "out" in message:
+                    sys.stdout.write(message["out"])
+                    sys.stdout.flush()
+                elif "err" in message:
+                    sys.stderr.write(message["err"])
+                    sys.stderr.flush()
+                elif "exit" in message:
+                    return message["exit"]
+        except (OSError, ValueError):
+            pass
+    # The command may have run partly, so it is not retried in-process
+    sys.stderr.write("guard: the daemon closed the connection before the command finished\n")
+    return 1
+
+
+def control(command, path=DEFAULT_SOCKET_PATH):
+    """
+    Sends a control request ("status" or "stop").
+
+    Returns:
+        dict: The daemon's status, or None when no daemon is running.
+    """
+    client = connect(path, timeout=5)
+    if client is None:
+        return None
+    with client:
+        send_message(client, {"control": command})
+        for message in read_messages(client):
+            if "status" in message:
+                return message["status"]
+    return None
+
+
+# Output sink of the request the current thread or task is serving, if any
+_request_output = contextvars.ContextVar("request_output", default=None)
+
+
+class RequestOutput:
+    """Sends one request's stdout and stderr to its client."""
+
+    def __init__(self, sock, isatty):
+        self.sock = sock
+        self.isatty = isatty
+        self.connected = True
+        # Fetch callbacks may log from the engine loop while the command thread prints
+        self._lock = threading.Lock()
+
+    def write(self, key, text):
+        if not text or not self.connected:
+            return
+        with self._lock:
+            try:
+                send_message(self.sock, {key: text})
+            except OSError:
+                # The client went away; let the command finish without output
+                self.connected = False
+
+    def activate(self):
+        """Routes sys.stdout/sys.stderr in the current context to this request. Returns a reset token."""
+        return _request_output.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _request_output.reset(token)
+
+
+class RoutedStream:
+    """
+    Stand-in for sys.stdout or sys.stderr in the daemon: writes go to the
+    client of the request being served in the current context, and to the
+    daemon's own stream otherwise.
+    """
+
+    def __init__(self, stream, key):
+        self.stream = stream
+        self.key = key
+
+    def write(self, text):
+        output = _request_output.get()
+        if output is None:
+            return self.stream.write(text)
+        output.write(self.key, text)
+        return len(text)
+
+    def flush(self):
+        if _request_output.get() is None:
+            self.stream.flush()
+
+    def isatty(self):
+        output = _request_output.get()
+        return self.stream.isatty() if output is None else output.isatty
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
@@ -0,0 +1,323 @@
+import ast
+import functools
+import operator
+import os
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from .cache import to_date
+from .readers import require_pyarrow
+from .render import LABEL_COLUMNS
+
+# Rows per Parquet row group. Partitions are sorted by date, so the per-group
+# min/max statistics let a date or value predicate skip whole groups.
+ROW_GROUP_ROWS = 65_536
+
+PART_FILE = "part.parquet"
+# Schema metadata key holding the exchange timezone of a partition's bars
+TZ_KEY = b"invest_guard.tz"
+# Column names older releases wrote, renamed when a partition is rewritten
+# ("Market Cap" held price * volume, which is dollar volume)
+LEGACY_COLUMNS = {"Market Cap": "Dollar Volume"}
+
+_COMPARISONS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_ARITHMETIC = {ast.Add: "add", ast.Sub: "subtract", ast.Mult: "multiply", ast.Div: "divide"}
+
+
+def interval_root(root, interval):
+    """Directory holding the partitions of one bar interval."""
+    return os.path.join(os.path.expanduser(root), f"interval={interval}")
+
+
+def partition_path(root, interval, ticker, year):
+    """
+    Path of the file holding `ticker`'s bars for `year`. Tickers are
+    URL-encoded, as Hive partitioning expects, so symbols such as EURUSD=X
+    are valid directory names.
+    """
+    return os.path.join(interval_root(root, interval), f"ticker={quote(ticker, safe='')}", f"year={year}", PART_FILE)
+
+
+def dataset_tickers(root, interval):
+    """Tickers stored in the dataset for `interval`."""
+    base = interval_root(root, interval)
+    if not os.path.isdir(base):
+        return []
+    return sorted(unquote(name.split("=", 1)[1]) for name in os.listdir(base) if name.startswith("ticker="))
+
+
+def partition_years(root, interval, ticker, first=None, last=None):
+    """Years stored for `ticker`, optionally limited to [first, last]."""
+    base = os.path.dirname(os.path.dirname(partition_path(root, interval, ticker, 0)))
+    if not os.path.isdir(base):
+        return []
+    years = sorted(int(name.split("=", 1)[1]) for name in os.listdir(base) if name.startswith("year="))
+    return [year for year in years if (first is None or year >= first) and (last is None or year <= last)]
+
+
+def _last_per_date(table, dates):
+    """Sorts `table` by date, keeping only the last row written for each date."""
+    order = np.argsort(dates, kind="stable")
+    ordered = dates[order]
+    keep = np.append(ordered[1:] != ordered[:-1], True)
+    return table.take(order[keep])
+
+
+class DatasetWriter:
+    """
+    Upserts bars into a dataset partitioned by interval, ticker and year:
+
+        ROOT/interval=1d/ticker=AAPL/year=2023/part.parquet
+
+    Each partition is one Parquet file sorted by date, without the Ticker
+    column (it is in the path), dates stored in UTC and the exchange timezone
+    kept in the file's metadata. Rows are buffered per partition and merged
+    into it once the ticker's data moves on to a later year, or on close:
+    the existing file is read, rows with the same date are replaced by the
+    new ones, and the result is swapped in atomically. Only the partitions
+    the new rows fall in are touched.
+
+    Used as a context manager with the same write()/rows_written interface
+    as the chunked export writers.
+    """
+
+    def __init__(self, root, interval="1d", ticker=None, compression=None):
+        self.root = os.path.expanduser(root)
+        self.interval = interval
+        self.ticker = ticker
+        self.compression = compression or "snappy"
+        self.rows_written = 0
+        self.partitions_written = 0
+        self._pending = {}
+
+    def __enter__(self):
+        self._pa = require_pyarrow()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, frame):
+        """
+        Buffers the rows of `frame`, which has a 'Date' column and either a
+        'Ticker' column or belongs to the writer's `ticker`.
+
+        Raises:
+            ValueError: If the rows have no ticker.
+        """
+        if frame is None or frame.empty:
+            return
+        if "Ticker" in frame.columns:
+            groups = frame.groupby("Ticker", sort=False)
+        elif self.ticker:
+            groups = [(self.ticker, frame)]
+        else:
+            raise ValueError("Dataset rows need a 'Ticker' column.")
+        for ticker, rows in groups:
+            self._buffer(ticker, rows.drop(columns="Ticker", errors="ignore"))
+
+    def _buffer(self, ticker, rows):
+        dates = pd.DatetimeIndex(rows["Date"])
+        years = dates.year.to_numpy()
+        # Windows arrive in date order, so earlier years of this ticker are complete
+        for key in [key for key in self._pending if key[0] == ticker and key[1] < years.min()]:
+            self._flush(key)
+        tz = str(dates.tz) if dates.tz is not None else "UTC"
+        utc = dates.tz_convert("UTC") if dates.tz is not None else dates.tz_localize("UTC")
+        rows = rows.assign(Date=utc)
+        distinct = np.unique(years)
+        for year in distinct:
+            piece = rows if len(distinct) == 1 else rows[years == year]
+            self._pending.setdefault((ticker, int(year)), (tz, []))[1].append(piece)
+
+    def _flush(self, key):
+        import pyarrow.parquet as pq
+
+        tz, pieces = self._pending.pop(key)
+        ticker, year = key
+        new = self._pa.Table.from_pandas(pd.concat(pieces, ignore_index=True), preserve_index=False)
+        new = new.replace_schema_metadata(None)
+        new = new.set_column(new.schema.get_field_index("Date"), "Date",
+                             new["Date"].cast(self._pa.timestamp("us", tz="UTC")))
+        path = partition_path(self.root, self.interval, ticker, year)
+        table = new
+        if os.path.exists(path):
+            stored = pq.read_table(path).replace_schema_metadata(None)
+            stored = stored.rename_columns([LEGACY_COLUMNS.get(name, name) for name in stored.column_names])
+            table = self._pa.concat_tables([stored, new], promote_options="permissive")
+        dates = table["Date"].to_numpy()
+        if not np.all(dates[1:] > dates[:-1]):
+            table = _last_per_date(table, dates)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = path + ".partial"
+        pq.write_table(table.replace_schema_metadata({TZ_KEY: tz.encode()}), partial, row_group_size=ROW_GROUP_ROWS,
+                       compression=None if self.compression == "uncompressed" else self.compression)
+        os.replace(partial, path)
+        self.rows_written += new.num_rows
+        self.partitions_written += 1
+
+    def close(self):
+        for key in sorted(self._pending):
+            self._flush(key)
+
+
+def column_aliases(names):
+    """
+    Maps the ways a column may be written in a query (its name in any case,
+    with spaces as underscores, or a LABELS key such as stock_price) to the
+    column name.
+    """
+    aliases = {}
+    for name in names:
+        aliases[name.lower()] = name
+        aliases[name.lower().replace(" ", "_")] = name
+    for key, name in LABEL_COLUMNS.items():
+        if name in names:
+            aliases[key] = name
+    return aliases
+
+
+def parse_where(text, aliases):
+    """
+    Compiles a row predicate such as "volume > 5e7 and close > open" into a
+    pyarrow dataset expression, which the Parquet scan checks against each
+    row group's statistics before reading it.
+
+    Predicates use Python syntax restricted to column names, numbers,
+    arithmetic, comparisons and and/or/not.
+
+    Raises:
+        ValueError: If the text is not a valid predicate.
+    """
+    import pyarrow.compute as pc
+
+    def error(node, message):
+        return ValueError(f"Invalid --where {text!r}: {message} at column {node.col_offset + 1}")
+
+    def compile_node(node):
+        if isinstance(node, ast.BoolOp):
+            operands = [compile_node(value) for value in node.values]
+            return functools.reduce(operator.and_ if isinstance(node.op, ast.And) else operator.or_, operands)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~compile_node(node.operand)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return pc.negate(compile_node(node.operand))
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            return getattr(pc, _ARITHMETIC[type(node.op)])(compile_node(node.left), compile_node(node.right))
+        if isinstance(node, ast.Compare):
+            operands = [compile_node(value) for value in [node.left, *node.comparators]]
+            if any(type(op) not in _COMPARISONS for op in node.ops):
+                raise error(node, "unsupported comparison")
+            results = [_COMPARISONS[type(op)](left, right) for op, left, right in zip(node.ops, operands, operands[1:])]
+            return functools.reduce(operator.and_, results)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return pc.scalar(float(node.value))
+        if isinstance(node, ast.Name):
+            column = aliases.get(node.id.lower())
+            if column is None or column == "Date":
+                raise error(node, f"unknown column {node.id!r} (columns: {', '.join(sorted(set(aliases.values()) - {'Date'}))})")
+            return pc.field(column)
+        raise error(node, f"unsupported syntax {type(node).__name__}")
+
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid --where {text!r}: {e.msg}")
+    return compile_node(tree.body)
+
+
+def query_dataset(root, interval="1d", tickers=None, start_date=None, end_date=None, columns=None, where=()):
+    """
+    Reads bars from the dataset, touching only what the query needs:
+    partitions outside `tickers` and the years of [start_date, end_date) are
+    never opened, only the requested columns (plus those the predicates use)
+    are decoded, and row groups whose statistics rule out the date range or
+    the `where` predicates are skipped.
+
+    Args:
+        tickers: Tickers to read (default: all in the dataset).
+        columns: Column names or aliases to return besides Ticker and Date
+            (default: all).
+        where: Predicate strings that must all hold (see parse_where()).
+
+    Returns:
+        tuple: (DataFrame with Ticker and Date first, dates in the exchange
+        timezone when all tickers share one and in UTC otherwise; dict of
+        scan statistics).
+
+    Raises:
+        ValueError: If a column or predicate is invalid.
+    """
+    pa = require_pyarrow()
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    start = to_date(start_date) if start_date else None
+    end = to_date(end_date) if end_date else None
+    last_year = (end - pd.Timedelta(days=1)).year if end else None
+    tickers = tickers or dataset_tickers(root, interval)
+
+    # Partition pruning: list only the files of the requested tickers and years
+    files, zones = [], {}
+    for ticker in tickers:
+        paths = [partition_path(root, interval, ticker, year)
+                 for year in partition_years(root, interval, ticker, start.year if start else None, last_year)]
+        if paths:
+            metadata = pq.read_schema(paths[0]).metadata or {}
+            zones.setdefault(metadata.get(TZ_KEY, b"UTC").decode(), []).append(ticker)
+            files.extend(paths)
+    stats = {"tickers": sum(len(group) for group in zones.values()), "files": len(files)}
+    if not files:
+        return pd.DataFrame(), stats
+
+    partitioning = ds.partitioning(pa.schema([("ticker", pa.string()), ("year", pa.int32())]), flavor="hive")
+    dataset = ds.dataset(files, format="parquet", partitioning=partitioning,
+                         partition_base_dir=interval_root(root, interval))
+    names = [name for name in dataset.schema.names if name not in ("ticker", "year")]
+    aliases = column_aliases(names)
+
+    selected = ["ticker", "Date"]
+    for entry in columns or names:
+        if entry.strip().lower() == "ticker":
+            continue
+        column = aliases.get(entry.strip().lower())
+        if column is None:
+            raise ValueError(f"Unknown column '{entry}'. Available: {', '.join(names)}")
+        if column not in selected:
+            selected.append(column)
+
+    # Dates bound each ticker's local calendar days, like the cache does
+    conditions = [parse_where(text, aliases) for text in where]
+    date_type = dataset.schema.field("Date").type
+    ranges = []
+    for tz, group in zones.items():
+        bounds = []
+        if start:
+            bounds.append(pc.field("Date") >= pa.scalar(pd.Timestamp(start, tz=tz), type=date_type))
+        if end:
+            bounds.append(pc.field("Date") < pa.scalar(pd.Timestamp(end, tz=tz), type=date_type))
+        if bounds and len(zones) > 1:
+            bounds.append(pc.field("ticker").isin(group))
+        if bounds:
+            ranges.append(functools.reduce(operator.and_, bounds))
+    if ranges:
+        conditions.append(functools.reduce(operator.or_, ranges))
+
+    condition = functools.reduce(operator.and_, conditions) if conditions else None
+    table = dataset.to_table(columns=selected, filter=condition)
+    stats["rows"] = table.num_rows
+    data = table.to_pandas().rename(columns={"ticker": "Ticker"})
+    if len(zones) == 1:
+        data["Date"] = data["Date"].dt.tz_convert(next(iter(zones)))
+    return data, stats
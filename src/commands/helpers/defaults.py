@@ -0,0 +1,72 @@
+# Defaults and choice lists shared by the argument parsers and the command
+# implementations. This module must stay free of third-party imports so that
+# building the CLI parser never loads the data stack.
+import os
+
+ASSET_TYPES = ["stock", "etf", "crypto", "currency", "commodity"]
+# Must match the adapters registered in helpers/sources.py
+SOURCE_NAMES = ["stub", "yahoo", "yfinance"]
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_WORKERS = 4
+
+# Upstream resilience: retries of transient failures with exponential backoff,
+# and the per-source circuit breaker that fails fast while a source is down
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds before the first retry, doubling per retry
+DEFAULT_MAX_BACKOFF = 8.0  # longest single backoff
+DEFAULT_RETRY_BUDGET = 20.0  # most backoff one request may accumulate
+DEFAULT_BREAKER_THRESHOLD = 5  # consecutive transient failures that open the circuit
+DEFAULT_BREAKER_COOLDOWN = 30.0  # seconds the open circuit rejects calls before a probe
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "INVEST_GUARD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "invest_guard")
+)
+DEFAULT_LIVE_TTL = 300  # seconds before bars for the current session are re-fetched
+DEFAULT_REFERENCE_TTL = 7 * 24 * 3600  # seconds before company name, exchange and share counts are re-fetched
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# guard fetch --dataset / guard query: root of the ticker/year-partitioned Parquet dataset
+DEFAULT_DATASET_DIR = os.environ.get(
+    "INVEST_GUARD_DATASET_DIR", os.path.join(os.path.expanduser("~"), "Documents", "invest_guard", "dataset")
+)
+
+# Exports in these formats keep typed datetime and numeric columns
+ARROW_FORMATS = ("parquet", "feather", "arrow")
+EXPORT_FORMATS = ["csv", "json", "jsonl", "xlsx", *ARROW_FORMATS]
+
+# Codecs accepted by --compression; "uncompressed" keeps Arrow/Feather files memory-mappable
+COMPRESSION_CHOICES = ["snappy", "zstd", "gzip", "brotli", "lz4", "uncompressed"]
+DEFAULT_COMPRESSION = {"parquet": "snappy", "feather": "uncompressed", "arrow": "uncompressed"}
+
+# Bar intervals accepted by watch and analyze; polling cadence of guard watch (seconds)
+BAR_INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "1h", "1d"]
+DEFAULT_WATCH_INTERVAL = "1m"
+# guard fetch --interval: native bar intervals plus coarser ones built by resampling
+FETCH_INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "2h", "4h", "1d", "1wk", "1mo"]
+DEFAULT_POLL_SECONDS = 15
+DEFAULT_MAX_POLL_SECONDS = 900
+
+# Terminal rendering: how fetched tables are shown
+RENDER_VIEWS = ["preview", "head", "tail", "summary", "all"]
+DEFAULT_PREVIEW_ROWS = 10
+
+# guard analyze: default history when no dates are given
+DEFAULT_ANALYZE_DAYS = 365
+
+# guard screen: default ranking of matches (percent change over 20 bars, strongest first)
+DEFAULT_RANK_BY = "change(20)"
+
+# guard correlate: matrix kinds, return definitions and treatments of missing bars
+CORRELATION_METHODS = ["pearson", "spearman", "covariance"]
+RETURN_KINDS = ["log", "simple"]
+MISSING_POLICIES = ["pairwise", "drop", "ffill"]
+DEFAULT_MAX_GAP = 5  # sessions a price is carried forward with --missing ffill
+DEFAULT_MIN_COVERAGE = 0.8  # share of panel dates a ticker needs returns for
+DEFAULT_MIN_PERIODS = 20  # overlapping returns a pair needs for a value
+DEFAULT_CORRELATION_BLOCK = 256  # tickers per block of the matrix computation
+
+# guard serve: Unix socket the daemon listens on and requests it runs at once
+DEFAULT_SOCKET_PATH = os.environ.get("INVEST_GUARD_SOCKET", os.path.join(DEFAULT_CACHE_DIR, "guard.sock"))
+DEFAULT_SERVE_WORKERS = 8
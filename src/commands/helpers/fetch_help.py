@@ -20,11 +20,37 @@ def display_help():
     table.add_column("[bold]Options[/bold]", style="cyan", justify="left")
     table.add_column("[bold]Description[/bold]", style="magenta", justify="left")
 
-    table.add_row("[yellow]-t, --ticker TICKER[/yellow]", "Ticker symbol (required)")
-    table.add_row("[yellow]-s, --source {yahoo}[/yellow]", "Data source (default: yahoo)")
+    table.add_row("[yellow]-t, --ticker TICKER[/yellow]", "Ticker symbol")
+    table.add_row("[yellow]--tickers TICKERS[/yellow]", "Comma separated ticker symbols, e.g. AAPL,MSFT")
+    table.add_row("[yellow]--tickers-file FILE[/yellow]", "File with ticker symbols, one per line")
+    table.add_row("[yellow]-s, --source {stub,yahoo,yfinance}[/yellow]", "Data source (default: yahoo)")
     table.add_row("[yellow]-z, --timezone TIMEZONE[/yellow]", "Timezone")
     table.add_row("[yellow]--asset-type {stock,etf,crypto,currency,commodity}[/yellow]",
                   "Asset type to fetch data for (required)")
+    table.add_row("[yellow]--quote[/yellow]", "Fetch a current quote snapshot per ticker (bid/ask, ranges, PE, EPS, market cap, ...) instead of history")
+    table.add_row("[yellow]--reference-ttl SECONDS[/yellow]", "Seconds before cached company name, exchange and share counts are re-fetched (default: 604800)")
+    table.add_row("[yellow]--batch-size N[/yellow]", "Tickers per upstream request in multi-ticker mode (default: 50)")
+    table.add_row("[yellow]--max-workers N[/yellow]", "Maximum upstream requests in flight in multi-ticker mode (default: 4)")
+    table.add_row("[yellow]--rate-limit R[/yellow]", "Requests per second allowed to the source (default: per source)")
+    table.add_row("[yellow]--retries N[/yellow]", "Retries of a timed-out or throttled request, with exponential backoff and jitter (default: 3)")
+    table.add_row("[yellow]--hedge [SECONDS][/yellow]", "Re-send requests still unanswered after SECONDS; first answer wins (default: recent p95 latency)")
+    table.add_row("[yellow]--export-format {csv,json,jsonl,xlsx,parquet,feather,arrow}[/yellow]", "Export format for fetched data")
+    table.add_row("[yellow]--compression CODEC[/yellow]", "Compression for parquet/feather/arrow exports")
+    table.add_row("[yellow]--export-filename FILE[/yellow]", "Export filename for fetched data")
+    table.add_row("[yellow]--dataset [DIR][/yellow]", "Upsert bars into a ticker/year-partitioned Parquet dataset (default: ~/Documents/invest_guard/dataset); read it with guard query")
+    table.add_row("[yellow]--stream[/yellow]", "Write the export in chunks as data arrives (all formats except json)")
+    table.add_row("[yellow]--append[/yellow]", "Append to an existing export file (implies --stream)")
+    table.add_row("[yellow]--chunk-size N[/yellow]", "Rows per chunk when streaming an export (default: 10000)")
+    table.add_row("[yellow]--no-cache[/yellow]", "Bypass the local OHLCV cache")
+    table.add_row("[yellow]--refresh[/yellow]", "Re-download the requested range and update the cache")
+    table.add_row("[yellow]--cache-ttl SECONDS[/yellow]", "Seconds before cached bars for the current session expire (default: 300)")
+    table.add_row("[yellow]--view {preview,head,tail,summary,all}[/yellow]", "How the result is printed (default: preview, first/last rows and a summary)")
+    table.add_row("[yellow]--rows N[/yellow]", "Rows shown by the preview, head and tail views (default: 10)")
+    table.add_row("[yellow]--columns COLUMNS[/yellow]", "Comma separated columns to show, by name or label key, e.g. close,volume,dollar_volume")
+    table.add_row("[yellow]--pager[/yellow]", "Page through the result interactively")
+    table.add_row("[yellow]--plain[/yellow]", "Plain text output without grid lines or ANSI colors")
+    table.add_row("[yellow]--profile [PREFIX][/yellow]", "Write per-phase timings (PREFIX.json) and a Chrome trace (PREFIX.trace.json)")
+    table.add_row("[yellow]--cprofile[/yellow]", "With --profile, also dump cProfile stats (PREFIX.pstats)")
 
     console.print("\n[bold yellow]Usage:[/bold yellow]\n")
     console.print("guard fetch [OPTIONS]\n")
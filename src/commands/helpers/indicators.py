@@ -0,0 +1,246 @@
+import json
+
+import numpy as np
+
+INDICATORS = ["sma", "ema", "rsi", "macd", "vwap", "atr", "volatility"]
+
+DEFAULT_PARAMS = {
+    "sma": 20,
+    "ema": 20,
+    "rsi": 14,
+    "macd": (12, 26, 9),
+    "atr": 14,
+    "volatility": 20,
+    "periods_per_year": 252,
+}
+
+# Largest growth factor allowed inside one closed-form EMA block; keeps the
+# rescaled cumulative sum well inside float64 precision
+_EMA_BLOCK_GROWTH = 1e150
+
+
+def ema(values, alpha, previous=None):
+    """
+    Exponential moving average y[t] = alpha * x[t] + (1 - alpha) * y[t-1] in
+    vectorized O(n).
+
+    The recursion is solved in closed form over blocks, using a cumulative sum
+    of rescaled inputs. Block length is bounded so the rescaling factor stays
+    small enough for float64. Without `previous`, the average is seeded with
+    the first value, like pandas' ewm(adjust=False).
+
+    Returns:
+        ndarray: One average per input value.
+    """
+    values = np.asarray(values, dtype="float64")
+    out = np.empty_like(values)
+    if not len(values):
+        return out
+    start = 0
+    if previous is None:
+        out[0] = previous = values[0]
+        start = 1
+    decay = 1.0 - alpha
+    if decay <= 0:
+        # Period 1: the average is the value itself, and the rescaling below would divide by zero
+        out[start:] = values[start:]
+        return out
+    block = max(1, int(np.log(_EMA_BLOCK_GROWTH) / -np.log(decay)))
+    for offset in range(start, len(values), block):
+        chunk = values[offset:offset + block]
+        powers = decay ** np.arange(len(chunk))
+        result = powers * (decay * previous + alpha * np.cumsum(chunk / powers))
+        out[offset:offset + len(chunk)] = result
+        previous = result[-1]
+    return out
+
+
+def _rolling_sum(values, tail, window):
+    """Sums of every `window` consecutive values of tail+values that end in `values`."""
+    joined = np.concatenate((tail, values))
+    sums = np.cumsum(np.concatenate(([0.0], joined)))
+    ends = np.arange(len(tail) + 1, len(joined) + 1)
+    starts = np.maximum(ends - window, 0)
+    return sums[ends] - sums[starts], ends - starts
+
+
+class IndicatorState:
+    """
+    Everything needed to continue the indicators after the last bar seen:
+    bar count, last close, the trailing windows and each running average.
+    Serializes to JSON so `guard analyze --state` can resume across runs.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.count = 0
+        self.last_time = None
+        self.last_close = None
+        self.close_tail = np.empty(0)
+        self.return_tail = np.empty(0)
+        self.averages = {}
+        self.vwap = None  # (session date, cumulative price*volume, cumulative volume)
+
+    def to_dict(self):
+        return {
+            "params": {key: list(value) if isinstance(value, tuple) else value for key, value in self.params.items()},
+            "count": self.count,
+            "last_time": self.last_time,
+            "last_close": self.last_close,
+            "close_tail": self.close_tail.tolist(),
+            "return_tail": self.return_tail.tolist(),
+            "averages": self.averages,
+            "vwap": self.vwap,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        params = {key: tuple(value) if isinstance(value, list) else value for key, value in data["params"].items()}
+        state = cls(params)
+        state.count = data["count"]
+        state.last_time = data["last_time"]
+        state.last_close = data["last_close"]
+        state.close_tail = np.asarray(data["close_tail"], dtype="float64")
+        state.return_tail = np.asarray(data["return_tail"], dtype="float64")
+        state.averages = data["averages"]
+        state.vwap = tuple(data["vwap"]) if data["vwap"] else None
+        return state
+
+
+def compute(frame, params=None, indicators=INDICATORS, state=None):
+    """
+    Computes the indicators for the bars of `frame` (OHLCV columns, datetime
+    index) that are newer than `state`, in a fixed number of vectorized passes.
+
+    Passing the state returned by a previous call continues from where it
+    stopped: only the new bars are processed and the results match a full
+    recomputation over the whole history.
+
+    Returns:
+        tuple: (DataFrame of indicator columns for the new bars, updated IndicatorState)
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {})) if state is None else state.params
+    state = state or IndicatorState(params)
+    # UTC datetime64 values in the index's own unit; converting 1M stamps to ns is not free
+    times = frame.index.values
+    if state.last_time is not None:
+        newer = times > np.datetime64(state.last_time, "ns")
+        frame, times = frame[newer], times[newer]
+    result = frame[[]].copy()  # same index, no columns; keeps pandas out of screening workers
+    if frame.empty:
+        return result, state
+
+    close = frame["Close"].to_numpy(dtype="float64")
+    high = frame["High"].to_numpy(dtype="float64")
+    low = frame["Low"].to_numpy(dtype="float64")
+    volume = frame["Volume"].to_numpy(dtype="float64")
+    position = state.count + np.arange(len(close))  # bar number since the first bar ever seen
+    previous_close = np.concatenate(([state.last_close if state.last_close is not None else np.nan], close[:-1]))
+    averages = state.averages
+
+    def running(name, values, alpha):
+        out = ema(values, alpha, averages.get(name))
+        averages[name] = float(out[-1]) if len(out) else averages.get(name)
+        return out
+
+    if "sma" in indicators:
+        window = params["sma"]
+        sums, counts = _rolling_sum(close, state.close_tail[-(window - 1):] if window > 1 else np.empty(0), window)
+        result[f"SMA {window}"] = np.where(position >= window - 1, sums / counts, np.nan)
+
+    if "ema" in indicators:
+        window = params["ema"]
+        result[f"EMA {window}"] = np.where(position >= window - 1, running("ema", close, 2 / (window + 1)), np.nan)
+
+    if "macd" in indicators:
+        fast, slow, signal = params["macd"]
+        line = running("macd_fast", close, 2 / (fast + 1)) - running("macd_slow", close, 2 / (slow + 1))
+        signal_line = running("macd_signal", line, 2 / (signal + 1))
+        result["MACD"] = np.where(position >= slow - 1, line, np.nan)
+        valid_signal = position >= slow + signal - 2
+        result["MACD Signal"] = np.where(valid_signal, signal_line, np.nan)
+        result["MACD Hist"] = np.where(valid_signal, line - signal_line, np.nan)
+
+    if "rsi" in indicators:
+        window = params["rsi"]
+        delta = close - previous_close
+        has_delta = ~np.isnan(delta)  # the very first bar has no previous close
+        gain = running("rsi_gain", np.maximum(delta[has_delta], 0), 1 / window)
+        loss = running("rsi_loss", np.maximum(-delta[has_delta], 0), 1 / window)
+        rsi = np.full(len(close), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi[has_delta] = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+        result[f"RSI {window}"] = np.where(position >= window, rsi, np.nan)
+
+    if "atr" in indicators:
+        window = params["atr"]
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+        result[f"ATR {window}"] = np.where(position >= window - 1, running("atr", true_range, 1 / window), np.nan)
+
+    if "volatility" in indicators:
+        window = params["volatility"]
+        returns = np.log(close / previous_close)
+        has_return = ~np.isnan(returns)
+        returns = returns[has_return]
+        tail = state.return_tail[-(window - 1):] if window > 1 else np.empty(0)
+        sums, counts = _rolling_sum(returns, tail, window)
+        squares, _ = _rolling_sum(returns ** 2, tail ** 2, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = np.maximum(squares - sums ** 2 / counts, 0) / (counts - 1)
+        volatility = np.full(len(close), np.nan)
+        volatility[has_return] = np.sqrt(variance * params["periods_per_year"])
+        result[f"Volatility {window}"] = np.where(position >= window, volatility, np.nan)
+        state.return_tail = np.concatenate((tail, returns))[-(window - 1):] if window > 1 else np.empty(0)
+
+    if "vwap" in indicators:
+        result["VWAP"] = _session_vwap(frame, high, low, close, volume, state)
+
+    keep = params["sma"] - 1
+    state.close_tail = np.concatenate((state.close_tail, close))[-keep:] if keep else np.empty(0)
+    state.count += len(close)
+    state.last_time = int(times[-1].astype("datetime64[ns]").astype("int64"))
+    state.last_close = float(close[-1])
+    return result, state
+
+
+def _session_vwap(frame, high, low, close, volume, state):
+    """
+    Volume-weighted average of the typical price, reset at each session (local
+    calendar date of the bar). Daily bars are their own session.
+    """
+    local = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+    sessions = local.values.astype("datetime64[D]").astype("int64")
+    price_volume = (high + low + close) / 3 * volume
+
+    cumulative_pv = np.cumsum(price_volume)
+    cumulative_volume = np.cumsum(volume)
+    starts = np.flatnonzero(np.concatenate(([True], sessions[1:] != sessions[:-1])))
+    session_of_bar = np.repeat(starts, np.diff(np.concatenate((starts, [len(sessions)]))))
+    base_pv = np.where(session_of_bar > 0, cumulative_pv[session_of_bar - 1], 0.0)
+    base_volume = np.where(session_of_bar > 0, cumulative_volume[session_of_bar - 1], 0.0)
+    session_pv = cumulative_pv - base_pv
+    session_volume = cumulative_volume - base_volume
+
+    if state.vwap is not None and state.vwap[0] == sessions[0]:
+        # The first bars continue the session the saved state stopped in
+        first = session_of_bar == 0
+        session_pv[first] += state.vwap[1]
+        session_volume[first] += state.vwap[2]
+    state.vwap = (int(sessions[-1]), float(session_pv[-1]), float(session_volume[-1]))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(session_volume > 0, session_pv / session_volume, np.nan)
+
+
+def load_states(path):
+    """Reads saved indicator states keyed by ticker; a missing file means no state."""
+    try:
+        with open(path) as handle:
+            return {ticker: IndicatorState.from_dict(data) for ticker, data in json.load(handle).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def save_states(path, states):
+    with open(path, "w") as handle:
+        json.dump({ticker: state.to_dict() for ticker, state in states.items()}, handle)
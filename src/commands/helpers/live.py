@@ -0,0 +1,179 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Columns kept by BarSeries, in buffer order
+BAR_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class BarSeries:
+    """
+    In-memory OHLCV series for one ticker that grows by appending bars.
+
+    Bars are held in preallocated NumPy buffers that double when full, so an
+    update costs time proportional to the bars it carries rather than to the
+    length of the series. Running high, low and volume totals are kept
+    alongside for the same reason.
+    """
+
+    def __init__(self, capacity=512):
+        self.times = np.empty(capacity, dtype="int64")
+        self.values = np.empty((capacity, len(BAR_COLUMNS)), dtype="float64")
+        self.size = 0
+        self.timezone = None
+        self.high = -np.inf
+        self.low = np.inf
+        self.volume = 0.0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_time(self):
+        """Timestamp of the newest bar held, or None."""
+        if not self.size:
+            return None
+        return pd.Timestamp(int(self.times[self.size - 1]), tz="UTC").tz_convert(self.timezone)
+
+    def update(self, frame):
+        """
+        Merges freshly fetched bars. Bars older than the newest one held are
+        ignored, a bar with the same timestamp replaces it (it may still have
+        been forming), and later bars are appended.
+
+        Returns:
+            int: Number of bars added or revised.
+        """
+        if frame is None or frame.empty:
+            return 0
+        if self.timezone is None:
+            self.timezone = frame.index.tz or "UTC"
+        times = frame.index.as_unit("ns").asi8
+        values = frame[list(BAR_COLUMNS)].to_numpy(dtype="float64")
+
+        changed = 0
+        if self.size:
+            last = self.times[self.size - 1]
+            keep = times >= last
+            times, values = times[keep], values[keep]
+            if len(times) and times[0] == last:
+                if not np.array_equal(values[0], self.values[self.size - 1]):
+                    self.volume -= self.values[self.size - 1, 4]
+                    self.values[self.size - 1] = values[0]
+                    self._accumulate(values[:1])
+                    changed = 1
+                times, values = times[1:], values[1:]
+
+        if len(times):
+            self._reserve(self.size + len(times))
+            self.times[self.size:self.size + len(times)] = times
+            self.values[self.size:self.size + len(times)] = values
+            self.size += len(times)
+            self._accumulate(values)
+        return changed + len(times)
+
+    def _accumulate(self, values):
+        self.high = max(self.high, np.nanmax(values[:, 1]))
+        self.low = min(self.low, np.nanmin(values[:, 2]))
+        self.volume += np.nansum(values[:, 4])
+
+    def _reserve(self, size):
+        if size <= len(self.times):
+            return
+        capacity = max(size, 2 * len(self.times))
+        times = np.empty(capacity, dtype="int64")
+        values = np.empty((capacity, len(BAR_COLUMNS)), dtype="float64")
+        times[:self.size] = self.times[:self.size]
+        values[:self.size] = self.values[:self.size]
+        self.times, self.values = times, values
+
+    def last_bar(self):
+        """The newest bar as a column -> value dict, or None."""
+        if not self.size:
+            return None
+        return dict(zip(BAR_COLUMNS, self.values[self.size - 1]))
+
+    def first_open(self):
+        return self.values[0, 0] if self.size else np.nan
+
+    def to_frame(self):
+        """Returns the held bars as a DataFrame indexed by 'Date'."""
+        index = pd.DatetimeIndex(pd.to_datetime(self.times[:self.size], utc=True), name="Date")
+        if self.timezone is not None:
+            index = index.tz_convert(self.timezone)
+        return pd.DataFrame(self.values[:self.size].copy(), index=index, columns=list(BAR_COLUMNS))
+
+
+class LiveTable:
+    """
+    Fixed-layout terminal table that redraws only the rows that changed.
+
+    On a terminal, changed rows are rewritten in place with ANSI cursor
+    movement; otherwise (pipes, files, --plain) each changed row is printed
+    as a new line. Cells are padded to fixed widths so in-place rewrites never
+    shift neighbouring columns.
+    """
+
+    def __init__(self, keys, headers, widths, stream=None, ansi=None):
+        self.keys = list(keys)
+        self.headers = headers
+        self.widths = widths
+        self.stream = stream or sys.stdout
+        self.ansi = self.stream.isatty() if ansi is None else ansi
+        self.rows = {key: None for key in self.keys}
+        self.dirty = set()
+        self.status = ""
+        self.drawn = False
+        self.rows_redrawn = 0
+
+    def format_cells(self, cells):
+        return " ".join(str(cell)[:width].rjust(width) if index else str(cell)[:width].ljust(width)
+                        for index, (cell, width) in enumerate(zip(cells, self.widths)))
+
+    def set_row(self, key, cells, color=""):
+        """Updates the row for `key`; it is redrawn on the next render() only if it changed."""
+        line = self.format_cells(cells)
+        row = (line, color)
+        if self.rows[key] != row:
+            self.rows[key] = row
+            self.dirty.add(key)
+
+    def set_status(self, status):
+        self.status = status
+
+    def render(self):
+        """Writes the dirty rows (the whole table on the first call) and the status line."""
+        write = self.stream.write
+        if not self.ansi:
+            for key in self.keys:
+                if key in self.dirty:
+                    line, _ = self.rows[key]
+                    write(f"{pd.Timestamp.now():%H:%M:%S} {line}\n")
+                    self.rows_redrawn += 1
+            self.dirty.clear()
+            self.stream.flush()
+            return
+
+        reset = "\x1b[0m"
+        if not self.drawn:
+            write(self.format_cells(self.headers) + "\n")
+            write(" ".join("-" * width for width in self.widths) + "\n")
+            for key in self.keys:
+                line, color = self.rows[key] or (self.format_cells([key]), "")
+                write(f"{color}{line}{reset}\n")
+            write(self.status + "\n")
+            self.rows_redrawn += len(self.keys)
+            self.drawn = True
+        else:
+            count = len(self.keys)
+            for position, key in enumerate(self.keys):
+                if key in self.dirty:
+                    line, color = self.rows[key]
+                    up = count - position + 1
+                    # Jump to the row, rewrite it, and return below the status line
+                    write(f"\x1b[{up}F\x1b[2K{color}{line}{reset}\x1b[{up}E")
+                    self.rows_redrawn += 1
+            write(f"\x1b[1F\x1b[2K{self.status}\n")
+        self.dirty.clear()
+        self.stream.flush()
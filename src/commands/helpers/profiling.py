@@ -0,0 +1,180 @@
+# Span instrumentation behind `--profile`. Only the standard library is used
+# here: span() is called on hot paths of every run, and when profiling is off
+# it returns a shared no-op context manager after a single global lookup.
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_NULL_SPAN = contextlib.nullcontext()
+_recorder = None
+
+
+def span(name, category="phase", **args):
+    """
+    Returns a context manager timing the enclosed block as span `name`.
+
+    Spans are only recorded while a profile is active; otherwise this is a
+    no-op. Works in coroutines too: spans are attributed to the running task,
+    so concurrent requests show up as parallel tracks in the trace.
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return _Span(_recorder, name, category, args)
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "category", "args", "started")
+
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.recorder.record(self.name, self.category, self.started, ended, self.args)
+
+
+def _track_id():
+    """The running asyncio task when there is one, else the thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Recorder:
+    """Collects finished spans, optionally alongside a cProfile run."""
+
+    def __init__(self, cprofile=False):
+        self.events = []
+        self.started = time.perf_counter_ns()
+        self.ended = None
+        self._lock = threading.Lock()
+        self._tracks = {}
+        self.profiler = None
+        if cprofile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def record(self, name, category, started, ended, args):
+        track = _track_id()
+        with self._lock:
+            tid = self._tracks.setdefault(track, len(self._tracks) + 1)
+            self.events.append((name, category, started, ended, tid, args))
+
+    def wall_ns(self):
+        return (self.ended or time.perf_counter_ns()) - self.started
+
+    def summary(self):
+        """
+        Per-span totals. `total_ms` sums every occurrence, so spans that ran
+        concurrently (e.g. network requests) can add up to more than the wall time.
+        """
+        phases = {}
+        for name, category, started, ended, _, _ in self.events:
+            duration = (ended - started) / 1e6
+            phase = phases.setdefault(name, {"category": category, "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            phase["count"] += 1
+            phase["total_ms"] += duration
+            phase["max_ms"] = max(phase["max_ms"], duration)
+        wall_ms = self.wall_ns() / 1e6
+        for phase in phases.values():
+            phase["mean_ms"] = round(phase["total_ms"] / phase["count"], 3)
+            phase["share_of_wall"] = round(phase["total_ms"] / wall_ms, 4) if wall_ms else None
+            phase["total_ms"] = round(phase["total_ms"], 3)
+            phase["max_ms"] = round(phase["max_ms"], 3)
+        return {"wall_ms": round(wall_ms, 3), "phases": dict(sorted(phases.items(), key=lambda item: -item[1]["total_ms"]))}
+
+    def chrome_trace(self):
+        """The spans as Chrome trace-event JSON (load in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        events = [
+            {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+             "ts": (started - self.started) / 1e3, "dur": (ended - started) / 1e3,
+             "args": {key: str(value) for key, value in args.items()}}
+            for name, category, started, ended, tid, args in self.events
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def top_functions(self, limit):
+        import pstats
+
+        stats = pstats.Stats(self.profiler)
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({"function": f"{filename}:{line}({function})", "calls": calls,
+                         "total_s": round(total, 6), "cumulative_s": round(cumulative, 6)})
+        return sorted(rows, key=lambda row: -row["cumulative_s"])[:limit]
+
+
+def start(cprofile=False):
+    """Starts recording spans (and cProfile when asked). Returns the recorder."""
+    global _recorder
+    _recorder = Recorder(cprofile=cprofile)
+    if _recorder.profiler is not None:
+        _recorder.profiler.enable()
+    return _recorder
+
+
+def stop():
+    """Stops recording and returns the recorder, or None if none was active."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.ended = time.perf_counter_ns()
+        if recorder.profiler is not None:
+            recorder.profiler.disable()
+    return recorder
+
+
+def write_reports(recorder, prefix, command=None, top=25):
+    """
+    Writes `<prefix>.json` (per-phase summary), `<prefix>.trace.json` (Chrome
+    trace) and, when cProfile ran, `<prefix>.pstats` with the hottest
+    functions listed in the summary.
+
+    Returns:
+        list: Paths written.
+    """
+    summary = {"command": command, **recorder.summary()}
+    paths = [prefix + ".json", prefix + ".trace.json"]
+    if recorder.profiler is not None:
+        recorder.profiler.dump_stats(prefix + ".pstats")
+        summary["top_functions"] = recorder.top_functions(top)
+        paths.append(prefix + ".pstats")
+
+    with open(paths[0], "w") as handle:
+        json.dump(summary, handle, indent=2)
+    with open(paths[1], "w") as handle:
+        json.dump(recorder.chrome_trace(), handle)
+
+    for name, phase in summary["phases"].items():
+        logger.info("profile: %-28s %5d x %10.2f ms total %9.2f ms max", name, phase["count"], phase["total_ms"], phase["max_ms"])
+    logger.info("profile: wall %.2f ms; reports written to %s", summary["wall_ms"], ", ".join(paths))
+    return paths
+
+
+@contextlib.contextmanager
+def profiled(prefix, cprofile=False, command=None):
+    """Records spans for the enclosed block and writes the reports afterwards."""
+    recorder = start(cprofile=cprofile)
+    try:
+        yield recorder
+    finally:
+        stop()
+        write_reports(recorder, prefix, command=command)
@@ -0,0 +1,99 @@
+import asyncio
+
+import pandas as pd
+
+from .profiling import span
+from .sources import QUOTE_FIELDS, REFERENCE_FIELDS, run_engine
+
+def fetch_quotes(tickers, source, reference=None, refresh=False, max_workers=None, rate_limit=None):
+    """
+    Fetches a quote snapshot for every ticker in as few upstream requests as
+    the source allows.
+
+    Reference fields (company name, exchange, currency, shares outstanding)
+    come from `reference`, a ReferenceCache, when it holds them, so only the
+    quote fields are requested for those tickers; the rest are requested with
+    both and cached.
+
+    Args:
+        refresh: Ignore cached reference data and fetch it again.
+
+    Returns:
+        tuple: (table, failures) where table has one quote_table() row per
+        ticker in input order and failures maps ticker to an error message.
+
+    Raises:
+        ValueError: If the source has no quote endpoint.
+    """
+    if not source.supports_quotes:
+        raise ValueError(f"The {source.name} source does not provide quotes.")
+    known = reference.get(source.name, tickers) if reference is not None and not refresh else {}
+    groups = [
+        ([ticker for ticker in tickers if ticker in known], QUOTE_FIELDS),
+        ([ticker for ticker in tickers if ticker not in known], QUOTE_FIELDS + REFERENCE_FIELDS),
+    ]
+
+    async def work(engine):
+        return await asyncio.gather(*(engine.quotes(group, fields) for group, fields in groups if group))
+
+    results = run_engine(source, work, max_in_flight=max_workers, rate_limit=rate_limit)
+
+    quotes, failures = {}, {}
+    for fetched, failed in results:
+        quotes.update(fetched)
+        failures.update(failed)
+    fresh = {ticker: {field: quotes[ticker].get(field) for field in REFERENCE_FIELDS}
+             for ticker in groups[1][0] if ticker in quotes}
+    if reference is not None and fresh:
+        reference.store(source.name, fresh)
+    for ticker, fields in known.items():
+        if ticker in quotes:
+            quotes[ticker].update(fields)
+    return quote_table([ticker for ticker in tickers if ticker in quotes], quotes), failures
+
+
+def quote_table(tickers, quotes):
+    """
+    Builds the snapshot table from raw quote fields, deriving the display
+    ranges, dividend and date columns, and market cap as price times shares
+    outstanding.
+
+    Returns:
+        DataFrame: 'Ticker', one column per LABELS field and the 'Timestamp'
+        of the snapshot.
+    """
+    with span("transform:quotes", rows=len(tickers)):
+        raw = pd.DataFrame([quotes[ticker] for ticker in tickers],
+                           columns=list(QUOTE_FIELDS + REFERENCE_FIELDS), index=pd.RangeIndex(len(tickers)))
+
+        def number(field):
+            return pd.to_numeric(raw[field], errors="coerce").astype("float64")
+
+        def date(field):
+            return pd.to_datetime(number(field), unit="s", utc=True).dt.strftime("%Y-%m-%d")
+
+        def span_text(low, high):
+            low, high = number(low), number(high)
+            return (low.map("{:.2f}".format) + " - " + high.map("{:.2f}".format)).where(low.notna() & high.notna())
+
+        rate, dividend_yield = number("dividend_rate"), number("dividend_yield")
+        table = pd.DataFrame({
+            "Ticker": list(tickers),
+            "company_name": raw["company_name"],
+            "exchange": raw["exchange"],
+            "currency": raw["currency"],
+            **{field: number(field) for field in ("stock_price", "prev_close_price", "open_price")},
+            "day_range": span_text("low_price", "high_price"),
+            "52_week_range": span_text("52_week_low", "52_week_high"),
+            **{field: number(field) for field in ("bid", "ask", "volume")},
+            "market_cap": number("stock_price").to_numpy() * number("shares_outstanding").to_numpy(),
+            **{field: number(field) for field in ("shares_outstanding", "beta", "pe_ratio", "eps")},
+            "earnings_date": date("earnings_date"),
+            "forward_dividend_yield": (rate.map("{:.2f}".format) + " ("
+                                       + (dividend_yield * 100).map("{:.2f}%)".format)).where(rate.notna() & dividend_yield.notna()),
+            "ex_dividend_date": date("ex_dividend_date"),
+            "1y_target_est": number("1y_target_est"),
+        })
+        table["Timestamp"] = pd.Timestamp.now().floor("s")
+    return table
+
@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+
+from .defaults import DEFAULT_COMPRESSION
+
+
+def require_pyarrow():
+    """
+    Imports pyarrow, which is only needed for the columnar binary formats.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet, Feather and Arrow support requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def check_ipc_compression(compression, export_format):
+    """
+    Raises:
+        ValueError: If `compression` is not a codec of the Arrow IPC file
+        format (Feather V2), which supports only lz4 and zstd.
+    """
+    if compression not in ("lz4", "zstd", "uncompressed"):
+        raise ValueError(f"Compression '{compression}' is not supported for {export_format}; use lz4, zstd or uncompressed.")
+
+
+def write_arrow_format(data, filepath, export_format, compression=None):
+    """
+    Writes a DataFrame as Parquet, Feather or an Arrow IPC file, keeping column types.
+    """
+    pa = require_pyarrow()
+    compression = compression or DEFAULT_COMPRESSION[export_format]
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    if export_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, filepath, compression=None if compression == "uncompressed" else compression)
+    elif export_format in ("feather", "arrow"):
+        check_ipc_compression(compression, export_format)
+        import pyarrow.feather as feather
+        feather.write_feather(table, filepath, compression=compression)
+    else:
+        raise ValueError(f"Invalid export format: {export_format}")
+
+
+def load_table(path, columns=None, memory_map=True):
+    """
+    Loads an export as a pyarrow Table.
+
+    Uncompressed Arrow/Feather files are memory-mapped, so the returned table
+    references the file's pages directly instead of copying them into memory.
+
+    Args:
+        columns: Optional list of columns to read.
+        memory_map: Memory-map Arrow/Feather/Parquet files instead of reading them.
+    """
+    require_pyarrow()
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+
+    if extension == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=memory_map)
+    if extension in ("feather", "arrow", "ipc"):
+        import pyarrow.feather as feather
+        return feather.read_table(path, columns=columns, memory_map=memory_map)
+    raise ValueError(f"Unsupported file type for loading: {path}")
+
+
+def load_export(path, columns=None, memory_map=True):
+    """
+    Loads an export produced by `guard fetch` into a DataFrame.
+
+    Arrow-backed formats come back with their original dtypes; csv, json and
+    jsonl are parsed with pandas.
+    """
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "json":
+        data = pd.read_json(path, orient="records")
+    elif extension == "jsonl":
+        data = pd.read_json(path, orient="records", lines=True)
+    elif extension == "xlsx":
+        data = pd.read_excel(path)
+    elif extension == "csv":
+        data = pd.read_csv(path)
+    else:
+        return load_table(path, columns=columns, memory_map=memory_map).to_pandas()
+    return data[columns] if columns else data
@@ -0,0 +1,181 @@
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from .defaults import DEFAULT_PREVIEW_ROWS
+
+# LABELS keys that name a fetched column, for --columns
+LABEL_COLUMNS = {
+    "stock_price": "Close",
+    "current_price": "Close",
+    "open_price": "Open",
+    "high_price": "High",
+    "low_price": "Low",
+    "volume": "Volume",
+    "dollar_volume": "Dollar Volume",
+}
+
+
+def resolve_columns(data, selection, labels):
+    """
+    Maps a comma separated --columns value to column names of `data`.
+
+    Each entry may be a column name, a LABELS key (e.g. stock_price) or a LABELS
+    display label (e.g. "Stock Price"), compared case-insensitively.
+    'Ticker' and 'Date' stay in front so rows remain identifiable.
+
+    Raises:
+        ValueError: If an entry matches no column.
+    """
+    aliases = {}
+    for column in data.columns:
+        aliases[column.lower()] = column
+        aliases[column.lower().replace(" ", "_")] = column
+    for key, column in LABEL_COLUMNS.items():
+        if column in data.columns:
+            aliases[key] = column
+            aliases[labels.get(key, key).lower()] = column
+
+    selected = [column for column in ("Ticker", "Date") if column in data.columns]
+    for entry in selection.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        column = aliases.get(entry.lower())
+        if column is None:
+            raise ValueError(f"Unknown column '{entry}'. Available: {', '.join(map(str, data.columns))}")
+        if column not in selected:
+            selected.append(column)
+    return selected
+
+
+def format_table(frame, labels, plain=False):
+    """Formats a (small) frame as a grid table, or whitespace-aligned text when `plain`."""
+    headers = [labels.get(key, key) for key in frame.columns]
+    return tabulate(frame, headers=headers, tablefmt="plain" if plain else "grid", showindex=False)
+
+
+def summarize(data, labels, plain=False):
+    """
+    Describes the whole result without formatting its rows: shape, date span,
+    tickers, and min/max/mean/last of every numeric column.
+    """
+    lines = [f"{len(data):,} rows x {len(data.columns)} columns"]
+    if "Date" in data.columns and len(data):
+        dates = data["Date"]
+        lines[0] += f", {dates.min()} to {dates.max()}"
+    if "Ticker" in data.columns:
+        lines[0] += f", {data['Ticker'].nunique():,} tickers"
+
+    numeric = data.select_dtypes(include="number").columns
+    if len(numeric) and len(data):
+        # Column by column, so no float copy of the whole table is made
+        stats = pd.DataFrame([
+            (labels.get(key, key), np.nanmin(values), np.nanmax(values), np.nanmean(values), values[-1])
+            for key in numeric
+            for values in [data[key].to_numpy()]
+        ], columns=["Column", "Min", "Max", "Mean", "Last"])
+        lines.append(tabulate(stats, headers="keys", tablefmt="plain" if plain else "simple", showindex=False))
+    return "\n".join(lines)
+
+
+def render(data, labels, view="preview", rows=DEFAULT_PREVIEW_ROWS, plain=False, stream=None):
+    """
+    Prints `data` according to `view`. Only the rows shown are formatted, so
+    the cost does not grow with the size of the result.
+
+    Views:
+        preview  first and last `rows` rows plus the summary (default)
+        head     first `rows` rows
+        tail     last `rows` rows
+        summary  shape and per-column statistics only
+        all      every row
+    """
+    stream = stream or sys.stdout
+    if view == "summary":
+        print(summarize(data, labels, plain), file=stream)
+    elif view == "all" or (view == "preview" and len(data) <= 2 * rows):
+        print(format_table(data, labels, plain), file=stream)
+    elif view == "head":
+        print(format_table(data.head(rows), labels, plain), file=stream)
+        print(f"... {len(data) - min(rows, len(data)):,} more rows", file=stream)
+    elif view == "tail":
+        print(f"... {len(data) - min(rows, len(data)):,} earlier rows", file=stream)
+        print(format_table(data.tail(rows), labels, plain), file=stream)
+    else:
+        shown = pd.concat([data.head(rows), data.tail(rows)])
+        table = format_table(shown, labels, plain).splitlines()
+        # Split after the header and the head rows; grid rows take two lines each
+        header_lines, row_lines = (1, 1) if plain else (3, 2)
+        cut = header_lines + rows * row_lines
+        table.insert(cut, f"... {len(data) - 2 * rows:,} rows omitted ...")
+        print("\n".join(table), file=stream)
+        print(summarize(data, labels, plain), file=stream)
+
+
+class Pager:
+    """
+    Interactive pager that formats one page of rows at a time on demand.
+
+    Commands at the prompt: Enter/n next page, p previous, g first, G last,
+    a page number to jump to it, q to quit.
+    """
+
+    def __init__(self, data, labels, plain=False, page_size=None, stream=None, read=input):
+        self.data = data
+        self.labels = labels
+        self.plain = plain
+        self.stream = stream or sys.stdout
+        self.read = read
+        if page_size is None:
+            height = shutil.get_terminal_size().lines
+            # grid rows take two lines; leave room for the header and the prompt
+            page_size = height - 3 if plain else (height - 5) // 2
+        self.page_size = max(1, page_size)
+        self.pages = max(1, -(-len(data) // self.page_size))
+        self.pages_formatted = 0
+
+    def page(self, number):
+        start = number * self.page_size
+        self.pages_formatted += 1
+        return format_table(self.data.iloc[start:start + self.page_size], self.labels, self.plain)
+
+    def run(self):
+        number = 0
+        while True:
+            print(self.page(number), file=self.stream)
+            try:
+                command = self.read(f"-- page {number + 1}/{self.pages} (Enter/n next, p prev, g/G first/last, N jump, q quit) ").strip()
+            except EOFError:
+                return
+            if command == "q":
+                return
+            if command in ("", "n"):
+                if number + 1 >= self.pages:
+                    return
+                number += 1
+            elif command == "p":
+                number = max(0, number - 1)
+            elif command == "g":
+                number = 0
+            elif command == "G":
+                number = self.pages - 1
+            elif command.isdigit():
+                number = min(max(int(command), 1), self.pages) - 1
+
+
+def show(data, labels, args):
+    """
+    Renders fetched data as requested by --columns, --view, --rows, --pager
+    and --plain. The pager needs an interactive terminal and falls back to
+    the chosen view otherwise.
+    """
+    if args.columns:
+        data = data[resolve_columns(data, args.columns, labels)]
+    if args.pager and sys.stdin.isatty() and sys.stdout.isatty():
+        Pager(data, labels, plain=args.plain).run()
+    else:
+        render(data, labels, view=args.view, rows=args.rows, plain=args.plain)
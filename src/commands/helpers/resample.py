@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+from .sessions import MARKET_TIMES
+from .sources import INTRADAY_FREQUENCIES
+
+# Bars longer than a session, grouped by calendar period instead of fixed width
+CALENDAR_INTERVALS = ("1d", "1wk", "1mo")
+
+# How each column of a bar is aggregated; columns not listed are dropped
+AGGREGATIONS = {
+    "Open": "first",
+    "High": np.maximum,
+    "Low": np.minimum,
+    "Close": "last",
+    "Volume": np.add,
+    "Dividends": np.add,
+    "Stock Splits": np.maximum,
+}
+
+
+def interval_minutes(interval):
+    """Bar length in minutes of an intraday interval ("5m", "2h", ...), or None for calendar intervals."""
+    if interval in INTRADAY_FREQUENCIES:
+        return int(pd.Timedelta(INTRADAY_FREQUENCIES[interval]).total_seconds() // 60)
+    if interval[:-1].isdigit() and interval[-1] in "mh":
+        return int(interval[:-1]) * (60 if interval[-1] == "h" else 1)
+    if interval in CALENDAR_INTERVALS:
+        return None
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def can_resample(base, target):
+    """Whether bars of `target` can be built exactly from bars of `base`."""
+    if base == target:
+        return True
+    base_minutes, target_minutes = interval_minutes(base), interval_minutes(target)
+    if base_minutes is None:
+        # Days make up weeks; weeks do not make up months
+        return base == "1d" and target in ("1wk", "1mo")
+    if target_minutes is None:
+        return True
+    return target_minutes > base_minutes and target_minutes % base_minutes == 0
+
+
+def source_intervals(target, native):
+    """
+    The native intervals bars of `target` can be built from, coarsest first.
+
+    Raises:
+        ValueError: If none of them can produce `target`.
+    """
+    usable = [interval for interval in native if interval in INTRADAY_FREQUENCIES or interval in CALENDAR_INTERVALS]
+    candidates = sorted((interval for interval in usable if can_resample(interval, target)), key=_coarseness, reverse=True)
+    if not candidates:
+        raise ValueError(f"Bars of {target} cannot be built from the intervals this source offers ({', '.join(native)}).")
+    return candidates
+
+
+def _coarseness(interval):
+    minutes = interval_minutes(interval)
+    return minutes if minutes is not None else 10**6 * (CALENDAR_INTERVALS.index(interval) + 1)
+
+
+def _runs(values):
+    """Start positions of the runs of equal values in a sorted array."""
+    return np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+
+
+def _per_run(values, function):
+    """Applies an expensive elementwise `function` once per run of equal sorted `values`."""
+    starts = _runs(values)
+    return np.repeat(function(values[starts]), np.diff(np.append(starts, len(values))))
+
+
+def _wall_minutes(index, timezone):
+    """Local wall-clock minutes of `index` in `timezone`, as datetime64[m]."""
+    utc = index.asi8 // (np.timedelta64(1, "m") // np.timedelta64(1, index.unit))
+    if timezone is None:
+        return utc.astype("datetime64[m]")
+
+    def offsets(hours):
+        # UTC offsets only change on the hour, so look them up once per distinct hour
+        sample = pd.DatetimeIndex(hours.astype("datetime64[h]"), tz="UTC").as_unit("s")
+        return (sample.tz_convert(timezone).tz_localize(None).asi8 - sample.asi8) // 60
+    return (utc + _per_run(utc // 60, offsets)).astype("datetime64[m]")
+
+
+def _bin_timezone(index, market):
+    """Timezone whose wall clock lays out the bins."""
+    return MARKET_TIMES[market]["timezone"] if market and index.tz is not None else index.tz
+
+
+def _bin_starts(wall, interval, market):
+    """
+    Start of the target bar each wall-clock minute falls in, also as wall time.
+
+    Intraday bars are laid out from the session open in MARKET_TIMES (midnight
+    when `market` is None, for assets that trade around the clock), so e.g.
+    hourly US bars start at 9:30, 10:30, ... and the last one is cut off by the
+    close. Calendar bars start at local midnight of the day, week (Monday) or
+    month.
+    """
+    days = wall.astype("datetime64[D]")
+    if interval == "1d":
+        return days
+    if interval == "1wk":
+        # 1970-01-01 was a Thursday
+        return days - (days.astype("int64") + 3) % 7
+    if interval == "1mo":
+        return _per_run(days, lambda unique: unique.astype("datetime64[M]").astype("datetime64[D]"))
+    minutes = interval_minutes(interval)
+    anchor = days.astype("datetime64[m]")
+    if market:
+        open_time = MARKET_TIMES[market]["open_time"]
+        anchor = anchor + np.timedelta64(open_time.hour * 60 + open_time.minute, "m")
+    return anchor + (wall - anchor) // np.timedelta64(minutes, "m") * np.timedelta64(minutes, "m")
+
+
+def resample_ohlcv(frame, interval, market=None):
+    """
+    Aggregates bars into coarser `interval` bars in one vectorized pass:
+    open=first, high=max, low=min, close=last, volume (and dividends) summed.
+
+    Args:
+        frame: Bars indexed by a sorted, timezone-aware 'Date' index.
+        market: Key of MARKET_TIMES whose timezone and session open align the
+            bars, or None to align to midnight in the frame's own timezone.
+
+    Returns:
+        DataFrame: One row per non-empty target bar, indexed by its start time
+        in the frame's timezone.
+    """
+    columns = [column for column in frame.columns if column in AGGREGATIONS]
+    if frame.empty:
+        return frame[columns]
+    wall = _wall_minutes(frame.index, _bin_timezone(frame.index, market))
+    starts = _bin_starts(wall, interval, market)
+    boundaries = _runs(starts)
+    last = np.concatenate((boundaries[1:], [len(starts)])) - 1
+
+    result = {}
+    for column in columns:
+        values = frame[column].to_numpy()
+        how = AGGREGATIONS[column]
+        if how == "first":
+            result[column] = values[boundaries]
+        elif how == "last":
+            result[column] = values[last]
+        else:
+            result[column] = how.reduceat(values, boundaries)
+
+    # Each bar starts as far before its first timestamp as its wall time says,
+    # which also places bars unambiguously around daylight saving changes
+    unit = np.timedelta64(1, frame.index.unit)
+    offsets = (wall[boundaries] - starts[boundaries]) // unit
+    index = pd.DatetimeIndex((frame.index.asi8[boundaries] - offsets).view(f"datetime64[{frame.index.unit}]"),
+                             name=frame.index.name)
+    if frame.index.tz is not None:
+        index = index.tz_localize("UTC").tz_convert(frame.index.tz)
+    return pd.DataFrame(result, index=index)
+
+
+class StreamingResampler:
+    """
+    Resamples bars arriving in consecutive, time-ordered pieces, such as the
+    windows of a long download. The rows of the last target bar of each piece
+    are held back until the next piece shows whether that bar is complete, so
+    the output matches resampling the whole series at once.
+    """
+
+    def __init__(self, interval, market=None):
+        self.interval = interval
+        self.market = market
+        self.carry = None
+
+    def push(self, frame):
+        """Returns the target bars completed by `frame`."""
+        if self.carry is not None:
+            frame = pd.concat([self.carry, frame])
+        if frame.empty:
+            self.carry = frame
+            return resample_ohlcv(frame, self.interval, self.market)
+        wall = _wall_minutes(frame.index, _bin_timezone(frame.index, self.market))
+        last = _runs(_bin_starts(wall, self.interval, self.market))[-1]
+        self.carry = frame.iloc[last:]
+        return resample_ohlcv(frame.iloc[:last], self.interval, self.market)
+
+    def flush(self):
+        """Returns the last, held-back target bar (or an empty frame)."""
+        frame, self.carry = self.carry, None
+        if frame is None:
+            return pd.DataFrame(columns=list(AGGREGATIONS))
+        return resample_ohlcv(frame, self.interval, self.market)
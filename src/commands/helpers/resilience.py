@@ -0,0 +1,345 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from .defaults import (
+    DEFAULT_BACKOFF,
+    DEFAULT_BREAKER_COOLDOWN,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_RETRIES,
+    DEFAULT_RETRY_BUDGET,
+)
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: timeouts, throttling and gateway or server hiccups
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Exception classes signalling a dropped, refused or timed-out connection. They
+# are matched by name anywhere in the class hierarchy, so the HTTP clients
+# behind the sources (aiohttp, requests, curl_cffi) need not be imported here.
+TRANSIENT_ERRORS = frozenset({"TimeoutError", "ConnectionError", "ClientConnectionError", "ClientPayloadError",
+                              "Timeout", "YFRateLimitError"})
+
+# Successful request latencies kept per source, and how many the adaptive hedge delay needs
+LATENCY_SAMPLES = 256
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a source whose circuit breaker is open."""
+
+
+def response_status(error):
+    """The HTTP status carried by `error` (aiohttp or requests style), or None."""
+    status = getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_transient(error):
+    """
+    Tells whether `error` is worth retrying: a timeout, a dropped connection or
+    an HTTP status in TRANSIENT_STATUSES. Everything else (bad symbols, missing
+    data, parse errors, an open circuit) would fail the same way again.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = response_status(error)
+    if status is not None:
+        return status in TRANSIENT_STATUSES
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def retry_after(error):
+    """Seconds the server asked the client to wait (Retry-After), or None."""
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return max(0.0, float(headers.get("Retry-After")))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    How upstream requests are retried and hedged.
+
+    A request failing transiently is retried up to `retries` times. The pause
+    before retry n is drawn from [d/2, d] with d = backoff * 2**n capped at
+    max_backoff (exponential backoff with jitter, so callers failing together
+    do not retry in lockstep), or the server's Retry-After when longer. A
+    request gives up early rather than accumulate more than `budget` seconds of
+    backoff, which bounds its worst-case latency.
+
+    `hedge` is None (no hedging), a delay in seconds, or 0 for the 95th
+    percentile of the source's recent latencies: a request still running after
+    that long is sent a second time and the first answer wins.
+    """
+
+    def __init__(self, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 budget=DEFAULT_RETRY_BUDGET, hedge=None):
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.hedge = hedge
+
+    def delay(self, attempt, error=None):
+        """Seconds to wait before retry number `attempt` (counted from 0) after `error`."""
+        ceiling = min(self.max_backoff, self.backoff * 2 ** attempt)
+        delay = random.uniform(ceiling / 2, ceiling)
+        hint = retry_after(error)
+        return max(delay, hint) if hint is not None else delay
+
+    def hedge_delay(self, health):
+        """Seconds before a request to the source of `health` is hedged, or None when it is not."""
+        if self.hedge is None:
+            return None
+        return self.hedge or health.percentile(95)
+
+
+_policy = contextvars.ContextVar("retry_policy", default=None)
+
+
+def current_policy():
+    """The RetryPolicy of the running command (defaults outside retry_policy())."""
+    return _policy.get() or RetryPolicy()
+
+
+@contextlib.contextmanager
+def retry_policy(args):
+    """
+    Applies the --retries and --hedge options of `args` to every upstream
+    request made inside the block, including on the daemon's warm engines.
+    """
+    token = _policy.set(RetryPolicy(retries=getattr(args, "retries", DEFAULT_RETRIES), hedge=getattr(args, "hedge", None)))
+    try:
+        yield
+    finally:
+        _policy.reset(token)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a source is down.
+
+    After `threshold` consecutive transient failures the circuit opens and
+    every call is rejected with CircuitOpenError for `cooldown` seconds. Then
+    it turns half-open and lets a single probe through: success closes the
+    circuit, failure opens it again. Errors the source answered with (unknown
+    symbol, no data) show it is up and count as successes.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, name, threshold=DEFAULT_BREAKER_THRESHOLD, cooldown=DEFAULT_BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Admits one call.
+
+        Returns:
+            bool: True if the call is the half-open probe.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with its probe still running.
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} is failing ({self.failures} consecutive errors); "
+                                           f"not calling it for another {remaining:.0f}s")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} is recovering; waiting for a probe request to succeed")
+                self._probing = True
+                return True
+            return False
+
+    def record(self, healthy):
+        """Records the outcome of an admitted call."""
+        with self._lock:
+            self._probing = False
+            if healthy:
+                if self.state != self.CLOSED:
+                    logger.info("%s circuit closed; the source is answering again.", self.name)
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                self.state = self.OPEN
+                self.opened = time.monotonic()
+                self.opens += 1
+                logger.warning("%s circuit opened after %d consecutive failures; failing fast for %.0fs.",
+                               self.name, self.failures, self.cooldown)
+
+    def release(self):
+        """Frees the half-open probe slot after the probe call was cancelled."""
+        with self._lock:
+            self._probing = False
+
+
+class SourceHealth:
+    """
+    Circuit breaker, resilience counters and recent latencies of one source,
+    shared by every engine in the process.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.stats = {"requests": 0, "failures": 0, "retries": 0, "retry_wait": 0.0, "coalesced": 0, "hedged": 0,
+                      "hedge_wins": 0}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def count(self, key, delta=1):
+        with self._lock:
+            self.stats[key] += delta
+
+    def observe(self, seconds):
+        """Records the latency of a successful request."""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def percentile(self, q):
+        """The q-th percentile of recent latencies in seconds, or None before MIN_LATENCY_SAMPLES."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+    def snapshot(self):
+        """Current counters, including the breaker's rejections and openings."""
+        with self._lock:
+            stats = dict(self.stats)
+        return {**stats, "rejected": self.breaker.rejected, "opens": self.breaker.opens}
+
+    def status(self):
+        """Breaker state, counters and latency percentiles, for `guard serve --status`."""
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            **self.snapshot(),
+            "retry_wait": round(self.stats["retry_wait"], 2),
+            "p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+        }
+
+    def summary(self, since=None):
+        """
+        One line on the retries, coalesced and hedged requests and breaker
+        rejections since snapshot `since`, or None when there were none and the
+        circuit is closed.
+        """
+        now = self.snapshot()
+        delta = {key: value - (since or {}).get(key, 0) for key, value in now.items()}
+        parts = []
+        if delta["retries"]:
+            parts.append(f"{delta['retries']} retries after {delta['retry_wait']:.1f}s of backoff")
+        if delta["coalesced"]:
+            parts.append(f"{delta['coalesced']} coalesced into in-flight requests")
+        if delta["hedged"]:
+            parts.append(f"{delta['hedged']} hedged ({delta['hedge_wins']} won by the hedge)")
+        if delta["rejected"]:
+            parts.append(f"{delta['rejected']} rejected by the open circuit")
+        if not parts and self.breaker.state == CircuitBreaker.CLOSED:
+            return None
+        details = f", {', '.join(parts)}" if parts else ""
+        return f"{self.name}: {delta['requests']} upstream requests{details}; circuit {self.breaker.state}."
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def get_health(name):
+    """Returns the process-wide SourceHealth of source `name`."""
+    with _health_lock:
+        health = _health.get(name)
+        if health is None:
+            health = _health[name] = SourceHealth(name)
+        return health
+
+
+def all_health():
+    """Every SourceHealth created so far, keyed by source name."""
+    with _health_lock:
+        return dict(_health)
+
+
+def share(result):
+    """
+    A copy of a coalesced result that one caller may modify without affecting
+    the others waiting on the same request.
+    """
+    if isinstance(result, dict):
+        return {key: share(value) for key, value in result.items()}
+    if isinstance(result, tuple):
+        return tuple(share(value) for value in result)
+    copy = getattr(result, "copy", None)
+    return copy() if callable(copy) else result
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "shared")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+        self.shared = False
+
+
+class Coalescer:
+    """
+    Runs identical concurrent requests once: a call arriving while an equal one
+    (same key) is in flight waits for that request instead of sending its own.
+    The request is cancelled only when every caller waiting on it is. Use one
+    per event loop.
+    """
+
+    def __init__(self, health):
+        self.health = health
+        self.flights = {}
+
+    async def run(self, key, request):
+        """Awaits coroutine function `request()`, or the in-flight request with the same `key`."""
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = self.flights[key] = _Flight(asyncio.ensure_future(request()))
+            flight.task.add_done_callback(lambda _: self.flights.pop(key, None) if self.flights.get(key) is flight else None)
+        else:
+            flight.shared = True
+            self.health.count("coalesced")
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if not flight.waiters:
+                flight.task.cancel()
+            raise
+        return share(result) if flight.shared else result
@@ -0,0 +1,416 @@
+# Declarative screening over many per-ticker histories. Histories are packed
+# once into a single shared-memory panel; for large universes, worker
+# processes attach to it by name and evaluate the filters for a range of
+# tickers, so only the filter text, a ticker range and the per-ticker results
+# cross process boundaries. The workers are started once per process (the
+# daemon included) and reused. They import this module alone, so it depends
+# on NumPy but not pandas.
+import ast
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .indicators import ema
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+FRAME_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Tickers evaluated per worker task
+CHUNK_TICKERS = 500
+# Bars (summed over tickers) below which a screen runs in-process. NumPy
+# evaluates 5-7M bars/s in one process, while starting the workers costs about
+# a second, so smaller panels finish before a pool would pay off
+# (bench_screen.py).
+PARALLEL_ROWS = 10_000_000
+
+_COMPARISONS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_ARITHMETIC = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+}
+
+
+class Panel:
+    """
+    Concatenated OHLCV columns of many tickers. Ticker i owns rows
+    starts[i]:ends[i] of every column. All window functions look back from
+    each ticker's last bar and are computed for every ticker at once.
+    """
+
+    def __init__(self, columns, starts, ends):
+        self.columns = columns
+        self.starts = starts
+        self.ends = ends
+        self._memo = {}
+
+    def memo(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def window_starts(self, bars):
+        """First row of each ticker's trailing `bars` window, and whether the ticker has that many bars."""
+        return np.maximum(self.ends - bars, self.starts), self.ends - self.starts >= bars
+
+    def last(self, field):
+        return self.columns[field][self.ends - 1]
+
+    def sma(self, bars, field="close"):
+        """Mean of the last `bars` bars; NaN for tickers with a missing value in that window."""
+        values = self.columns[field]
+        missing = np.isnan(values)
+        # Prefix sums run across tickers, so missing values count separately instead of poisoning later tickers
+        sums = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, values))))
+        gaps = np.concatenate(([0], np.cumsum(missing)))
+        first, full = self.window_starts(bars)
+        complete = full & (gaps[self.ends] == gaps[first])
+        return np.where(complete, (sums[self.ends] - sums[first]) / bars, np.nan)
+
+    def highest(self, bars, field="high"):
+        return self._window_reduce(np.maximum, bars, field)
+
+    def lowest(self, bars, field="low"):
+        return self._window_reduce(np.minimum, bars, field)
+
+    def _window_reduce(self, ufunc, bars, field):
+        # reduceat over [first_0, end_0, first_1, end_1, ...]: even entries are the windows,
+        # odd entries the gaps between them; the final end is implied by the array length
+        first, full = self.window_starts(bars)
+        bounds = np.column_stack((first, self.ends)).ravel()[:-1]
+        return np.where(full, ufunc.reduceat(self.columns[field], bounds)[::2], np.nan)
+
+    def change(self, bars, field="close"):
+        """Percent change of `field` over the last `bars` bars."""
+        values = self.columns[field]
+        before = self.ends - 1 - bars
+        valid = before >= self.starts
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(valid, (values[self.ends - 1] / values[np.maximum(before, 0)] - 1) * 100, np.nan)
+
+    def ema(self, bars, field="close"):
+        values = self.columns[field]
+        alpha = 2 / (bars + 1)
+        out = np.full(len(self.ends), np.nan)
+        for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+            if end - start >= bars:
+                out[i] = ema(values[start:end], alpha)[-1]
+        return out
+
+    def rsi(self, bars, field="close"):
+        """Wilder's RSI at the last bar, matching `guard analyze`."""
+        values = self.columns[field]
+        out = np.full(len(self.ends), np.nan)
+        for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+            if end - start > bars:
+                delta = np.diff(values[start:end])
+                gain = ema(np.maximum(delta, 0), 1 / bars)[-1]
+                loss = ema(np.maximum(-delta, 0), 1 / bars)[-1]
+                out[i] = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+        return out
+
+
+# Function name -> (Panel method, default field)
+FUNCTIONS = {
+    "sma": ("sma", "close"),
+    "ema": ("ema", "close"),
+    "rsi": ("rsi", "close"),
+    "highest": ("highest", "high"),
+    "lowest": ("lowest", "low"),
+    "change": ("change", "close"),
+}
+
+
+class Expression:
+    """
+    A parsed screening expression, e.g. "close > sma(200) and volume > 2 * sma(20, volume)".
+
+    Expressions use Python syntax restricted to numbers, the fields
+    open/high/low/close/volume (each ticker's last bar), the functions in
+    FUNCTIONS called with a bar count and optional field, arithmetic,
+    comparisons and and/or/not.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression {text!r}: {e.msg}")
+        self.lookback = 1
+        self._evaluate = self._compile(tree.body)
+
+    def evaluate(self, panel):
+        """Returns one value (or boolean) per ticker of `panel`."""
+        return self._evaluate(panel)
+
+    def _error(self, node, message):
+        return ValueError(f"Invalid expression {self.text!r}: {message} at column {node.col_offset + 1}")
+
+    def _compile(self, node):
+        if isinstance(node, ast.BoolOp):
+            operands = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda panel: functools.reduce(combine, (operand(panel) for operand in operands))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+            operand = self._compile(node.operand)
+            negate = np.logical_not if isinstance(node.op, ast.Not) else np.negative
+            return lambda panel: negate(operand(panel))
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            left, right = self._compile(node.left), self._compile(node.right)
+            operator = _ARITHMETIC[type(node.op)]
+
+            def arithmetic(panel):
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    return operator(left(panel), right(panel))
+            return arithmetic
+        if isinstance(node, ast.Compare):
+            operands = [self._compile(value) for value in [node.left, *node.comparators]]
+            try:
+                operators = [_COMPARISONS[type(op)] for op in node.ops]
+            except KeyError:
+                raise self._error(node, "unsupported comparison")
+
+            def compare(panel):
+                values = [operand(panel) for operand in operands]
+                result = operators[0](values[0], values[1])
+                for operator, left, right in zip(operators[1:], values[1:], values[2:]):
+                    result &= operator(left, right)
+                return result
+            return compare
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            value = float(node.value)
+            return lambda panel: value
+        if isinstance(node, ast.Name):
+            if node.id not in FIELDS:
+                raise self._error(node, f"unknown field {node.id!r} (fields: {', '.join(FIELDS)})")
+            field = node.id
+            return lambda panel: panel.last(field)
+        if isinstance(node, ast.Call):
+            return self._compile_call(node)
+        raise self._error(node, f"unsupported syntax {type(node).__name__}")
+
+    def _compile_call(self, node):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name not in FUNCTIONS:
+            raise self._error(node, f"unknown function {name!r} (functions: {', '.join(FUNCTIONS)})")
+        method, field = FUNCTIONS[name]
+        args = node.args
+        if node.keywords or not 1 <= len(args) <= 2:
+            raise self._error(node, f"{name}() takes a bar count and an optional field")
+        bars = args[0].value if isinstance(args[0], ast.Constant) else None
+        if not isinstance(bars, int) or isinstance(bars, bool) or bars < 1:
+            raise self._error(node, f"{name}() needs a positive whole number of bars")
+        if len(args) == 2:
+            if not (isinstance(args[1], ast.Name) and args[1].id in FIELDS):
+                raise self._error(node, f"{name}() field must be one of {', '.join(FIELDS)}")
+            field = args[1].id
+        self.lookback = max(self.lookback, bars + 1)
+        key = (method, bars, field)
+        return lambda panel: panel.memo(key, lambda: getattr(panel, method)(bars, field))
+
+
+@functools.lru_cache(maxsize=None)
+def _parse(text):
+    return Expression(text)
+
+
+def evaluate(panel, filters, rank_by):
+    """
+    Returns (mask of tickers passing every filter, rank value per ticker).
+
+    Raises:
+        ValueError: If a filter does not produce a true/false result.
+    """
+    mask = np.ones(len(panel.ends), dtype=bool)
+    for text in filters:
+        result = np.broadcast_to(_parse(text).evaluate(panel), mask.shape)
+        if result.dtype != bool:
+            raise ValueError(f"Filter {text!r} must be a comparison, e.g. close > sma(50)")
+        mask &= result
+    rank = np.broadcast_to(_parse(rank_by).evaluate(panel), mask.shape).astype("float64") if rank_by else np.zeros(mask.shape)
+    return mask, rank
+
+
+class SharedPanel:
+    """
+    OHLCV histories packed into one shared-memory block: the row offsets
+    (int64, one more than the number of tickers) followed by each FIELDS
+    column (float64, all tickers concatenated).
+    """
+
+    def __init__(self, memory, tickers, rows, owner):
+        self.memory = memory
+        self.tickers = tickers
+        self.rows = rows
+        self.owner = owner
+
+    @classmethod
+    def create(cls, frames):
+        """Packs {ticker: OHLCV DataFrame} into a new shared-memory block."""
+        tickers = list(frames)
+        lengths = np.array([len(frame) for frame in frames.values()], dtype="int64")
+        rows = int(lengths.sum())
+        memory = SharedMemory(create=True, size=max(1, (len(tickers) + 1 + len(FIELDS) * rows) * 8))
+        panel = cls(memory, tickers, rows, owner=True)
+        offsets, columns = panel.arrays(len(tickers))
+        offsets[0] = 0
+        np.cumsum(lengths, out=offsets[1:])
+        # One whole-frame conversion per ticker is far cheaper than selecting each column
+        block = np.ndarray((len(FIELDS), rows), dtype="float64", buffer=memory.buf, offset=(len(tickers) + 1) * 8)
+        positions = {}
+        for start, end, frame in zip(offsets[:-1], offsets[1:], frames.values()):
+            layout = tuple(frame.columns)
+            if layout not in positions:
+                positions[layout] = frame.columns.get_indexer(FRAME_COLUMNS)
+                if (positions[layout] < 0).any():
+                    memory.close()
+                    memory.unlink()
+                    raise ValueError(f"History is missing OHLCV columns: {', '.join(layout)}")
+            block[:, start:end] = frame.to_numpy(dtype="float64")[:, positions[layout]].T
+        return panel
+
+    @classmethod
+    def attach(cls, name, rows):
+        return cls(SharedMemory(name=name), None, rows, owner=False)
+
+    def arrays(self, count):
+        """Views (offsets, {field: column}) over the shared block; nothing is copied."""
+        buffer = self.memory.buf
+        offsets = np.ndarray(count + 1, dtype="int64", buffer=buffer)
+        columns = {}
+        position = (count + 1) * 8
+        for field in FIELDS:
+            columns[field] = np.ndarray(self.rows, dtype="float64", buffer=buffer, offset=position)
+            position += self.rows * 8
+        return offsets, columns
+
+    def chunk(self, count, first, last):
+        """Panel over tickers first:last, viewing only their rows."""
+        offsets, columns = self.arrays(count)
+        low, high = offsets[first], offsets[last]
+        return Panel({field: column[low:high] for field, column in columns.items()},
+                     offsets[first:last] - low, offsets[first + 1:last + 1] - low)
+
+    def close(self):
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_attached = {}
+
+
+def _screen_chunk(name, count, rows, first, last, filters, rank_by):
+    """Worker task: evaluates tickers first:last of the shared panel `name`."""
+    if name not in _attached:
+        # Workers outlive each screen; let go of the previous, already unlinked panel
+        for panel in _attached.values():
+            panel.close()
+        _attached.clear()
+        _attached[name] = SharedPanel.attach(name, rows)
+    return evaluate(_attached[name].chunk(count, first, last), filters, rank_by)
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def worker_pool(workers):
+    """
+    The process-wide pool of `workers` screening processes, started on first
+    use and kept for later screens, so a daemon pays the start-up once.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: workers only import NumPy and this module, and never inherit the parent's threads
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Stops the screening processes, if any were started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def screen(frames, filters, rank_by=None, ascending=False, workers=None, chunk_tickers=CHUNK_TICKERS,
+           parallel_rows=PARALLEL_ROWS):
+    """
+    Evaluates `filters` (all must hold) against the last bar of every history
+    in `frames` and ranks the matches by `rank_by`, highest first unless
+    `ascending`.
+
+    Panels of at least `parallel_rows` bars are split into chunks of
+    `chunk_tickers` tickers evaluated by the shared pool of `workers`
+    processes (default: one per CPU). Smaller panels, or workers=1, are
+    evaluated in this process.
+
+    Returns:
+        list: (ticker, rank value) for each match, best first.
+
+    Raises:
+        ValueError: If an expression is invalid.
+    """
+    for text in [*filters, *([rank_by] if rank_by else [])]:
+        _parse(text)
+    workers = workers or os.cpu_count() or 1
+    tickers = list(frames)
+    masks, ranks = [], []
+    with SharedPanel.create(frames) as shared:
+        count = len(tickers)
+        chunks = [(first, min(first + chunk_tickers, count)) for first in range(0, count, chunk_tickers)]
+        if workers == 1 or len(chunks) == 1 or shared.rows < parallel_rows:
+            for first, last in chunks:
+                mask, rank = evaluate(shared.chunk(count, first, last), filters, rank_by)
+                masks.append(mask)
+                ranks.append(rank)
+        else:
+            pool = worker_pool(workers)
+            futures = [pool.submit(_screen_chunk, shared.memory.name, count, shared.rows, first, last, filters, rank_by)
+                       for first, last in chunks]
+            try:
+                for future in futures:
+                    mask, rank = future.result()
+                    masks.append(mask)
+                    ranks.append(rank)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for the next screen
+                shutdown_pool()
+                raise
+    if not tickers:
+        return []
+    mask, rank = np.concatenate(masks), np.concatenate(ranks)
+    matches = np.flatnonzero(mask)
+    # NaN ranks sort last, ties keep the input order
+    keys = rank[matches] if ascending else -rank[matches]
+    order = matches[np.argsort(np.nan_to_num(keys, nan=np.inf), kind="stable")]
+    return [(tickers[i], float(rank[i])) for i in order]
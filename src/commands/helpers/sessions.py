@@ -0,0 +1,157 @@
+import logging
+from datetime import time
+from functools import lru_cache
+
+import holidays
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Market timezones and open/close times.
+# "holidays" names the holiday calendar for the exchange: ("financial", code) for
+# python-holidays market calendars, ("country", code[, subdivision]) otherwise.
+# "weekmask" overrides the Monday-Friday trading week where it differs.
+MARKET_TIMES = {
+    "United States": {"timezone": "US/Eastern", "open_time": time(9, 30), "close_time": time(16), "holidays": ("financial", "NYSE")},
+    "Europe": {"timezone": "Europe/Berlin", "open_time": time(9), "close_time": time(17, 30), "holidays": ("financial", "ECB")},
+    "Asia": {"timezone": "Asia/Tokyo", "open_time": time(9), "close_time": time(15), "holidays": ("country", "JP")},
+    "Australia": {"timezone": "Australia/Sydney", "open_time": time(10), "close_time": time(16), "holidays": ("country", "AU", "NSW")},
+    "Hong Kong": {"timezone": "Asia/Hong_Kong", "open_time": time(9, 30), "close_time": time(16), "holidays": ("country", "HK")},
+    "India": {"timezone": "Asia/Kolkata", "open_time": time(9, 15), "close_time": time(15, 30), "holidays": ("country", "IN")},
+    "Canada": {"timezone": "America/Toronto", "open_time": time(9, 30), "close_time": time(16), "holidays": ("country", "CA", "ON")},
+    "Nigeria": {"timezone": "Africa/Lagos", "open_time": time(10), "close_time": time(16), "holidays": ("country", "NG")},
+    "South Africa": {"timezone": "Africa/Johannesburg", "open_time": time(9, 30), "close_time": time(17), "holidays": ("country", "ZA")},
+    "Kenya": {"timezone": "Africa/Nairobi", "open_time": time(9, 30), "close_time": time(15), "holidays": ("country", "KE")},
+    "Ghana": {"timezone": "Africa/Accra", "open_time": time(10), "close_time": time(16), "holidays": ("country", "GH")},
+    "Egypt": {"timezone": "Africa/Cairo", "open_time": time(10), "close_time": time(15), "holidays": ("country", "EG"), "weekmask": "Sun Mon Tue Wed Thu"},
+    "Morocco": {"timezone": "Africa/Casablanca", "open_time": time(9, 30), "close_time": time(16, 30), "holidays": ("country", "MA")},
+    # Add more African markets as needed
+}
+
+DEFAULT_WEEKMASK = "Mon Tue Wed Thu Fri"
+
+
+def market_holidays(market, years):
+    """
+    Returns the holiday calendar of `market` for `years` as a date -> name mapping.
+    Unknown calendars fall back to weekends only, with a warning.
+    """
+    kind, code, *subdivision = MARKET_TIMES[market].get("holidays", ("country", None))
+    try:
+        if kind == "financial":
+            return holidays.financial_holidays(code, years=years, language="en_US")
+        return holidays.country_holidays(code, subdiv=subdivision[0] if subdivision else None, years=years, language="en_US")
+    except (NotImplementedError, KeyError, AttributeError) as e:
+        logger.warning("No holiday calendar for %s (%s); only weekends are treated as closed.", market, e)
+        return {}
+
+
+def _to_utc_ns(timestamps):
+    """Converts timestamps (naive values are taken as UTC) into int64 UTC nanoseconds."""
+    index = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(timestamps)))
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.tz_convert("UTC").as_unit("ns").asi8
+
+
+class SessionCalendar:
+    """
+    Trading sessions of one market over a fixed range of years.
+
+    Sessions are precomputed into sorted arrays of UTC open/close times, so
+    every query is a binary search and accepts many timestamps at once.
+    """
+
+    def __init__(self, market, start_year, end_year):
+        if market not in MARKET_TIMES:
+            raise ValueError(f"Market timezone '{market}' not found.")
+        info = MARKET_TIMES[market]
+        self.market = market
+        self.timezone = info["timezone"]
+        self.start_year, self.end_year = start_year, end_year
+        self.holidays = market_holidays(market, range(start_year, end_year + 1))
+
+        days = np.arange(f"{start_year}-01-01", f"{end_year + 1}-01-01", dtype="datetime64[D]")
+        busdays = np.busdaycalendar(
+            weekmask=info.get("weekmask", DEFAULT_WEEKMASK),
+            holidays=np.array(sorted(self.holidays), dtype="datetime64[D]"),
+        )
+        self.dates = days[np.is_busday(days, busdaycal=busdays)]
+
+        local_days = pd.DatetimeIndex(self.dates)
+        self.opens = self._localize(local_days, info["open_time"])
+        self.closes = self._localize(local_days, info["close_time"])
+
+    def _localize(self, days, at):
+        offset = pd.Timedelta(hours=at.hour, minutes=at.minute)
+        return (days + offset).tz_localize(self.timezone, ambiguous="NaT", nonexistent="shift_forward") \
+            .tz_convert("UTC").as_unit("ns").asi8
+
+    def _timestamps(self, values):
+        return pd.DatetimeIndex(values, tz="UTC").tz_convert(self.timezone)
+
+    def is_session(self, dates):
+        """Returns a boolean array telling which calendar dates are trading days."""
+        days = np.atleast_1d(np.asarray(dates, dtype="datetime64[D]"))
+        positions = np.searchsorted(self.dates, days)
+        return (positions < len(self.dates)) & (self.dates[np.minimum(positions, len(self.dates) - 1)] == days)
+
+    def is_open(self, timestamps):
+        """Returns a boolean array telling whether the market is open at each timestamp."""
+        ts = _to_utc_ns(timestamps)
+        positions = np.searchsorted(self.opens, ts, side="right") - 1
+        valid = positions >= 0
+        return valid & (ts <= self.closes[np.maximum(positions, 0)])
+
+    def next_open(self, timestamps):
+        """Returns the first session open strictly after each timestamp (NaT past the range)."""
+        ts = _to_utc_ns(timestamps)
+        positions = np.searchsorted(self.opens, ts, side="right")
+        return self._timestamps(self._take(self.opens, positions))
+
+    def previous_close(self, timestamps):
+        """Returns the last session close strictly before each timestamp (NaT before the range)."""
+        ts = _to_utc_ns(timestamps)
+        positions = np.searchsorted(self.closes, ts, side="left") - 1
+        return self._timestamps(self._take(self.closes, positions))
+
+    def _take(self, values, positions):
+        valid = (positions >= 0) & (positions < len(values))
+        result = np.full(len(positions), np.datetime64("NaT"), dtype="datetime64[ns]")
+        result[valid] = values[positions[valid]].view("datetime64[ns]")
+        return result
+
+    def sessions_between(self, start, end):
+        """
+        Returns the sessions whose date falls within [start, end).
+
+        Returns:
+            DataFrame: 'open' and 'close' columns in the market timezone, indexed by session date.
+        """
+        lower, upper = np.searchsorted(self.dates, [np.datetime64(pd.Timestamp(start).date()),
+                                                    np.datetime64(pd.Timestamp(end).date())])
+        return pd.DataFrame({
+            "open": self._timestamps(self.opens[lower:upper].view("datetime64[ns]")),
+            "close": self._timestamps(self.closes[lower:upper].view("datetime64[ns]")),
+        }, index=pd.DatetimeIndex(self.dates[lower:upper], name="Date"))
+
+    def holiday_name(self, day):
+        """Returns the holiday name for `day`, or None."""
+        return self.holidays.get(pd.Timestamp(day).date())
+
+
+@lru_cache(maxsize=None)
+def get_calendar(market, start_year, end_year):
+    """Returns the cached calendar of `market` for the given year range."""
+    return SessionCalendar(market, start_year, end_year)
+
+
+def calendar_for(market, start, end=None):
+    """
+    Returns a cached calendar covering [start, end] plus a year of headroom.
+    Ranges are widened to whole decades so nearby queries share one calendar.
+    """
+    start_year = pd.Timestamp(start).year
+    end_year = pd.Timestamp(end if end is not None else start).year + 1
+    return get_calendar(market, start_year - start_year % 10, end_year - end_year % 10 + 9)
@@ -0,0 +1,836 @@
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .defaults import DEFAULT_MAX_WORKERS
+from .profiling import span
+from .resilience import TRANSIENT_STATUSES, Coalescer, current_policy, get_health, is_transient
+
+logger = logging.getLogger(__name__)
+
+# Columns returned by yf.Ticker.history(); every source yields frames in this shape
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+
+# Intervals whose bars are stamped at local midnight, matching yfinance
+DAILY_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+YAHOO_BASE_URL = os.environ.get("INVEST_GUARD_YAHOO_URL", "https://query2.finance.yahoo.com")
+# Answers 404 but sets the session cookie that Yahoo's quote crumbs are bound to
+YAHOO_COOKIE_URL = "https://fc.yahoo.com"
+# Intraday interval -> pandas frequency, for sources that synthesize bars
+INTRADAY_FREQUENCIES = {"1m": "1min", "2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min",
+                        "60m": "60min", "90m": "90min", "1h": "60min"}
+# Intervals served by Yahoo's chart API (and so by yfinance)
+YAHOO_INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo")
+
+# Quote snapshot fields, keyed like LABELS in fetch.py where they match. Reference
+# fields rarely change and are cached for long periods; quote fields are asked
+# for on every snapshot.
+QUOTE_FIELDS = ("stock_price", "open_price", "high_price", "low_price", "prev_close_price", "volume", "bid", "ask",
+                "52_week_low", "52_week_high", "beta", "pe_ratio", "eps", "earnings_date", "dividend_rate",
+                "dividend_yield", "ex_dividend_date", "1y_target_est")
+REFERENCE_FIELDS = ("company_name", "exchange", "currency", "shares_outstanding")
+
+# Field -> key of a Yahoo v7 quote result; dates are epoch seconds
+YAHOO_QUOTE_KEYS = {
+    "stock_price": "regularMarketPrice", "open_price": "regularMarketOpen", "high_price": "regularMarketDayHigh",
+    "low_price": "regularMarketDayLow", "prev_close_price": "regularMarketPreviousClose",
+    "volume": "regularMarketVolume", "bid": "bid", "ask": "ask", "52_week_low": "fiftyTwoWeekLow",
+    "52_week_high": "fiftyTwoWeekHigh", "beta": "beta", "pe_ratio": "trailingPE", "eps": "epsTrailingTwelveMonths",
+    "earnings_date": "earningsTimestamp", "dividend_rate": "dividendRate", "dividend_yield": "dividendYield",
+    "ex_dividend_date": "dividendDate", "1y_target_est": "targetMeanPrice", "company_name": "longName",
+    "exchange": "fullExchangeName", "currency": "currency", "shares_outstanding": "sharesOutstanding",
+}
+# Field -> key of yf.Ticker.info
+YFINANCE_INFO_KEYS = {
+    "stock_price": "currentPrice", "open_price": "open", "high_price": "dayHigh", "low_price": "dayLow",
+    "prev_close_price": "previousClose", "volume": "volume", "bid": "bid", "ask": "ask",
+    "52_week_low": "fiftyTwoWeekLow", "52_week_high": "fiftyTwoWeekHigh", "beta": "beta", "pe_ratio": "trailingPE",
+    "eps": "trailingEps", "earnings_date": "earningsTimestamp", "dividend_rate": "dividendRate",
+    "dividend_yield": "dividendYield", "ex_dividend_date": "exDividendDate", "1y_target_est": "targetMeanPrice",
+    "company_name": "longName", "exchange": "exchange", "currency": "currency", "shares_outstanding": "sharesOutstanding",
+}
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36"
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every request to one source.
+
+    Callers reserve a token synchronously and then sleep off any deficit, so the
+    bucket needs no asyncio lock and can be shared across event loops and threads.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes one token and returns how long the caller must wait before using it."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+            return wait
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait:
+            with span("wait:rate_limit", "wait"):
+                await asyncio.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name, rate, burst=None):
+    """Returns the process-wide token bucket for source `name`."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None or limiter.rate != rate or (burst and limiter.capacity != burst):
+            limiter = _limiters[name] = TokenBucket(rate, burst)
+        return limiter
+
+
+class Source:
+    """
+    Adapter interface for an upstream market data source.
+
+    Subclasses implement fetch_history() for one ticker. Sources with a real
+    bulk endpoint set `supports_batch` and override fetch_batch(); sources with
+    a quote endpoint set `supports_quotes` and override fetch_quotes(). Sources
+    that talk HTTP return a pooled aiohttp session from create_session(); the
+    engine keeps it open across all requests of a run.
+
+    Returned frames are indexed by a timezone-aware 'Date' index and carry the
+    OHLCV_COLUMNS.
+    """
+    name = None
+    rate_limit = None  # requests per second; None means unlimited
+    burst = None
+    max_in_flight = DEFAULT_MAX_WORKERS
+    supports_batch = False
+    intervals = ("1d",)  # bar intervals the source can return natively
+    supports_quotes = False
+    quote_batch_size = 1  # symbols per fetch_quotes() request
+
+    async def create_session(self, limit):
+        return None
+
+    async def close_session(self, session):
+        if session is not None:
+            await session.close()
+
+    async def fetch_history(self, session, ticker, start_date=None, end_date=None, period=None, interval="1d"):
+        raise NotImplementedError
+
+    async def fetch_batch(self, session, tickers, start_date=None, end_date=None, period=None, interval="1d"):
+        """
+        Fetches several tickers in one upstream request.
+
+        Returns:
+            dict: Ticker symbol to DataFrame; tickers without data are omitted.
+        """
+        raise NotImplementedError
+
+    async def fetch_quotes(self, session, tickers, fields):
+        """
+        Fetches quote snapshots for up to `quote_batch_size` tickers in one request.
+
+        Args:
+            fields: QUOTE_FIELDS and REFERENCE_FIELDS keys wanted; others may be returned too.
+
+        Returns:
+            dict: Ticker symbol to a dict of field values; tickers without a quote are omitted.
+        """
+        raise NotImplementedError
+
+
+SOURCES = {}
+
+
+def register_source(source_class):
+    """Class decorator adding a Source adapter to the registry under its name."""
+    SOURCES[source_class.name] = source_class
+    return source_class
+
+
+def get_source(name, **options):
+    """
+    Instantiates the registered source `name`.
+
+    Raises:
+        ValueError: If no adapter is registered under that name.
+    """
+    try:
+        return SOURCES[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown data source '{name}'. Available: {', '.join(sorted(SOURCES))}")
+
+
+def empty_history():
+    return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz="UTC", name="Date"))
+
+
+def parse_chart(payload, interval="1d"):
+    """
+    Converts a Yahoo v8 chart API response into a history frame, back-adjusting
+    OHLC for splits and dividends the way yfinance's auto_adjust does.
+
+    Raises:
+        ValueError: If the response carries an upstream error.
+    """
+    chart = payload.get("chart") or {}
+    if chart.get("error"):
+        error = chart["error"]
+        raise ValueError(error.get("description") or error.get("code") or "Upstream error")
+    result = (chart.get("result") or [None])[0]
+    if not result or not result.get("timestamp"):
+        return empty_history()
+
+    tz = result.get("meta", {}).get("exchangeTimezoneName") or "UTC"
+    index = pd.to_datetime(np.asarray(result["timestamp"], dtype="int64"), unit="s", utc=True).tz_convert(tz)
+    if interval in DAILY_INTERVALS:
+        index = index.normalize()
+    index = pd.DatetimeIndex(index, name="Date")
+
+    quote = result["indicators"]["quote"][0]
+    columns = {
+        name: np.asarray(quote.get(key) or [], dtype="float64")
+        for name, key in (("Open", "open"), ("High", "high"), ("Low", "low"), ("Close", "close"), ("Volume", "volume"))
+    }
+
+    adjclose = (result["indicators"].get("adjclose") or [{}])[0].get("adjclose")
+    if adjclose:
+        ratio = np.asarray(adjclose, dtype="float64") / columns["Close"]
+        for column in ("Open", "High", "Low", "Close"):
+            columns[column] = columns[column] * ratio
+
+    events = result.get("events") or {}
+    columns["Dividends"] = _event_column(events.get("dividends"), index, interval, tz, lambda e: e.get("amount", 0.0))
+    columns["Stock Splits"] = _event_column(events.get("splits"), index, interval, tz,
+                                            lambda e: e.get("numerator", 0.0) / (e.get("denominator") or 1.0))
+
+    # Build the frame once from NumPy arrays; per-column assignment dominates parse time otherwise
+    keep = ~(np.isnan(columns["Open"]) & np.isnan(columns["High"]) & np.isnan(columns["Low"]) & np.isnan(columns["Close"]))
+    columns["Volume"] = np.nan_to_num(columns["Volume"]).astype("int64")
+    if not keep.all():
+        columns = {name: values[keep] for name, values in columns.items()}
+        index = index[keep]
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def parse_quotes(payload, fields):
+    """
+    Converts a Yahoo v7 quote response into field dicts keyed by ticker.
+
+    Raises:
+        ValueError: If the response carries an upstream error.
+    """
+    response = payload.get("quoteResponse") or {}
+    if response.get("error"):
+        error = response["error"]
+        raise ValueError(error.get("description") or error.get("code") or "Upstream error")
+    return {
+        result["symbol"]: {field: result.get(YAHOO_QUOTE_KEYS[field]) for field in fields}
+        for result in response.get("result") or [] if result.get("symbol")
+    }
+
+
+def _as_utc(value):
+    """Converts a date or timestamp to a UTC Timestamp; naive values are taken as UTC."""
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize("UTC") if stamp.tz is None else stamp.tz_convert("UTC")
+
+
+def _event_column(events, index, interval, tz, value):
+    column = np.zeros(len(index))
+    if not events:
+        return column
+    stamps = pd.to_datetime([int(event["date"]) for event in events.values()], unit="s", utc=True).tz_convert(tz)
+    if interval in DAILY_INTERVALS:
+        stamps = stamps.normalize()
+    positions = index.get_indexer(stamps)
+    for position, event in zip(positions, events.values()):
+        if position >= 0:
+            column[position] = value(event)
+    return column
+
+
+@register_source
+class YahooSource(Source):
+    """
+    Yahoo Finance chart API over pooled aiohttp connections, one request per ticker.
+
+    The base URL can be pointed at a local stand-in server through
+    INVEST_GUARD_YAHOO_URL or the `base_url` argument; the stand-in then also
+    hands out the session cookie.
+
+    Quote requests must carry a crumb tied to a session cookie. Each pooled
+    session fetches the cookie and crumb once, on its first quote request, and
+    again if Yahoo refuses the crumb with a 401.
+    """
+    name = "yahoo"
+    intervals = YAHOO_INTERVALS
+    rate_limit = 10.0
+    burst = 20
+    max_in_flight = 8
+    supports_quotes = True
+    quote_batch_size = 100
+
+    def __init__(self, base_url=None):
+        self.base_url = (base_url or YAHOO_BASE_URL).rstrip("/")
+        self.cookie_url = YAHOO_COOKIE_URL if "yahoo.com" in self.base_url else self.base_url + "/"
+        self._crumbs = weakref.WeakKeyDictionary()  # session -> task resolving to its crumb
+
+    async def create_session(self, limit):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit, ttl_dns_cache=300, keepalive_timeout=30)
+        # unsafe=True keeps cookies from IP-address hosts too, such as a local stand-in server
+        return aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT},
+                                     cookie_jar=aiohttp.CookieJar(unsafe=True), timeout=aiohttp.ClientTimeout(total=30))
+
+    async def crumb(self, session, stale=None):
+        """
+        The crumb for quote requests on `session`. Concurrent callers share one
+        cookie and crumb handshake; pass the `stale` crumb Yahoo refused to
+        have a fresh one fetched.
+        """
+        task = self._crumbs.get(session)
+        if task is not None and task.done() and (task.cancelled() or task.exception() or task.result() == stale):
+            task = None
+        if task is None:
+            task = self._crumbs[session] = asyncio.ensure_future(self._handshake(session))
+        return await asyncio.shield(task)
+
+    async def _handshake(self, session):
+        async with session.get(self.cookie_url) as response:
+            await response.read()
+        async with session.get(f"{self.base_url}/v1/test/getcrumb") as response:
+            response.raise_for_status()
+            crumb = (await response.text()).strip()
+        if not crumb or "<" in crumb:
+            raise ValueError("Yahoo did not issue a crumb for quote requests")
+        return crumb
+
+    def chart_params(self, start_date=None, end_date=None, period=None, interval="1d"):
+        params = {"interval": interval, "events": "div,split", "includeAdjustedClose": "true"}
+        if start_date and end_date:
+            params["period1"] = str(int(_as_utc(start_date).timestamp()))
+            params["period2"] = str(int(_as_utc(end_date).timestamp()))
+        else:
+            params["range"] = period or "1d"
+        return params
+
+    @staticmethod
+    async def read_payload(response, key):
+        """
+        Decodes a JSON response. An error status raises ClientResponseError,
+        which carries the status and Retry-After to the retry layer, unless
+        the body is a Yahoo error object under `key` (such as an unknown
+        symbol) and the status is not a transient one.
+        """
+        if response.status < 400:
+            return await response.json(content_type=None)
+        try:
+            payload = await response.json(content_type=None)
+        except ValueError:
+            # Throttling proxies and gateways answer with text or HTML pages
+            payload = None
+        if response.status in TRANSIENT_STATUSES or not isinstance(payload, dict) or not payload.get(key):
+            response.raise_for_status()
+        return payload
+
+    async def fetch_history(self, session, ticker, start_date=None, end_date=None, period=None, interval="1d"):
+        url = f"{self.base_url}/v8/finance/chart/{ticker}"
+        async with session.get(url, params=self.chart_params(start_date, end_date, period, interval)) as response:
+            payload = await self.read_payload(response, "chart")
+        return parse_chart(payload, interval)
+
+    async def fetch_quotes(self, session, tickers, fields):
+        # Asking only for the needed fields keeps each response to a few hundred bytes per symbol
+        params = {"symbols": ",".join(tickers),
+                  "fields": ",".join(YAHOO_QUOTE_KEYS[field] for field in fields if field in YAHOO_QUOTE_KEYS)}
+        crumb = None
+        for attempt in range(2):
+            crumb = await self.crumb(session, stale=crumb)
+            async with session.get(f"{self.base_url}/v7/finance/quote", params={**params, "crumb": crumb}) as response:
+                if response.status == 401 and not attempt:
+                    continue  # the cookie or crumb expired: one new handshake, then a refusal is an error
+                payload = await self.read_payload(response, "quoteResponse")
+            return parse_quotes(payload, fields)
+
+
+@register_source
+class YfinanceSource(Source):
+    """
+    The yfinance library run in worker threads. Batches map to one yf.download() call.
+    """
+    name = "yfinance"
+    intervals = YAHOO_INTERVALS
+    rate_limit = 2.0
+    burst = 4
+    max_in_flight = 4
+    supports_batch = True
+    supports_quotes = True
+
+    async def fetch_history(self, session, ticker, start_date=None, end_date=None, period=None, interval="1d"):
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        if start_date and end_date:
+            return await asyncio.to_thread(stock.history, start=start_date, end=end_date, interval=interval)
+        return await asyncio.to_thread(stock.history, period=period or "1d", interval=interval)
+
+    async def fetch_batch(self, session, tickers, start_date=None, end_date=None, period=None, interval="1d"):
+        import yfinance as yf
+
+        options = dict(group_by="ticker", auto_adjust=True, actions=True, threads=False, progress=False, interval=interval)
+        if start_date and end_date:
+            frame = await asyncio.to_thread(yf.download, tickers, start=start_date, end=end_date, **options)
+        else:
+            frame = await asyncio.to_thread(yf.download, tickers, period=period or "1d", **options)
+        return split_bulk_frame(frame, tickers)
+
+    async def fetch_quotes(self, session, tickers, fields):
+        import yfinance as yf
+
+        # yfinance has no bulk quote call; each Ticker.info is its own request
+        info = await asyncio.to_thread(lambda: yf.Ticker(tickers[0]).info)
+        if not info:
+            return {}
+        return {tickers[0]: {field: info.get(YFINANCE_INFO_KEYS[field]) for field in fields}}
+
+
+@register_source
+class StubSource(Source):
+    """
+    Deterministic offline source producing synthetic OHLCV bars, daily or
+    intraday depending on the requested interval.
+
+    Every request sleeps for `latency` seconds to stand in for an upstream
+    round-trip, so batching and concurrency gains can be measured without
+    network access. Tickers listed in `fail` raise on download. `now` pins the
+    clock that intraday bars run up to, for reproducible runs.
+
+    To exercise the retry, hedging and circuit breaker paths, a share `slow` of
+    requests takes `slow_latency` seconds longer and a share `flaky` times out.
+    """
+    name = "stub"
+    intervals = (*INTRADAY_FREQUENCIES, "1d")
+    supports_batch = True
+    supports_quotes = True
+    quote_batch_size = 500
+
+    def __init__(self, latency=0.05, seed=0, fail=(), now=None, flaky=0.0, slow=0.0, slow_latency=1.0):
+        self.latency = latency
+        self.seed = seed
+        self.fail = {symbol.upper() for symbol in fail}
+        self.now = None if now is None else _as_utc(now)
+        self.flaky = flaky
+        self.slow = slow
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self._random = random.Random(seed)
+
+    async def respond(self, tickers):
+        """Stands in for one upstream round-trip for `tickers`."""
+        self.requests += 1
+        latency = self.latency
+        if self.slow and self._random.random() < self.slow:
+            latency += self.slow_latency
+        if latency:
+            await asyncio.sleep(latency)
+        if self.flaky and self._random.random() < self.flaky:
+            raise TimeoutError("Stub upstream timed out")
+        failing = [ticker for ticker in tickers if ticker in self.fail]
+        if failing:
+            raise RuntimeError(f"Stub failure for {', '.join(failing)}")
+
+    async def fetch_history(self, session, ticker, start_date=None, end_date=None, period=None, interval="1d"):
+        frames = await self.fetch_batch(session, [ticker], start_date, end_date, period, interval)
+        return frames.get(ticker, empty_history())
+
+    async def fetch_batch(self, session, tickers, start_date=None, end_date=None, period=None, interval="1d"):
+        await self.respond(tickers)
+        index = self.index(start_date, end_date, period, interval)
+        return {ticker: self.history(ticker, index) for ticker in tickers}
+
+    def index(self, start_date=None, end_date=None, period=None, interval="1d"):
+        if interval in INTRADAY_FREQUENCIES:
+            # Bars up to the one currently forming, around the clock
+            freq = INTRADAY_FREQUENCIES[interval]
+            now = (self.now or pd.Timestamp.now(tz="UTC")).floor(freq)
+            if start_date and end_date:
+                index = pd.date_range(_as_utc(start_date).ceil(freq), min(now, _as_utc(end_date)), freq=freq, name="Date")
+            else:
+                days = int((period or "1d").rstrip("d"))
+                index = pd.date_range(end=now, periods=days * 390, freq=freq, name="Date")
+            return index.tz_convert("America/New_York")
+        if start_date and end_date:
+            return pd.bdate_range(start_date, end_date, inclusive="left", tz="America/New_York", name="Date")
+        days = int((period or "1d").rstrip("d"))
+        end = pd.Timestamp.now(tz="America/New_York").normalize()
+        return pd.bdate_range(end=end, periods=days, tz="America/New_York", name="Date")
+
+    async def fetch_quotes(self, session, tickers, fields):
+        await self.respond(tickers)
+        days = self.index(period="252d")
+        return {ticker: {field: value for field, value in self.quote(ticker, days).items() if field in fields}
+                for ticker in tickers}
+
+    def quote(self, ticker, days):
+        """Builds a reproducible quote for `ticker` from its bars over the trading `days` up to today."""
+        now = (self.now or pd.Timestamp.now(tz="UTC")).floor("1min")
+        daily = self.history(ticker, days)
+        price = float(self.history(ticker, pd.DatetimeIndex([now]))["Close"].iloc[0])
+        fraction = zlib.crc32(f"{self.seed}:{ticker}:quote".encode()) / 2**32
+        eps = price / (12 + 25 * fraction)
+        return {
+            "stock_price": price,
+            "open_price": float(daily["Open"].iloc[-1]),
+            "high_price": max(price, float(daily["High"].iloc[-1])),
+            "low_price": min(price, float(daily["Low"].iloc[-1])),
+            "prev_close_price": float(daily["Close"].iloc[-2]),
+            "volume": int(daily["Volume"].iloc[-1]),
+            "bid": round(price * 0.9995, 2),
+            "ask": round(price * 1.0005, 2),
+            "52_week_low": float(daily["Low"].min()),
+            "52_week_high": float(daily["High"].max()),
+            "beta": round(0.5 + 1.5 * fraction, 2),
+            "pe_ratio": price / eps,
+            "eps": eps,
+            "earnings_date": int((days[-1] + pd.Timedelta(days=int(20 + 60 * fraction))).timestamp()),
+            "dividend_rate": round(price * 0.02 * fraction, 2),
+            "dividend_yield": 0.02 * fraction,
+            "ex_dividend_date": int((days[-1] - pd.Timedelta(days=int(10 + 50 * fraction))).timestamp()),
+            "1y_target_est": price * (1.05 + 0.2 * fraction),
+            "company_name": f"{ticker.title()} Holdings Inc.",
+            "exchange": "NasdaqGS",
+            "currency": "USD",
+            "shares_outstanding": int(1e8 * (1 + 50 * fraction)),
+        }
+
+    def history(self, ticker, index):
+        """
+        Builds reproducible bars for `ticker` over `index`. Each bar depends only
+        on the ticker and its timestamp, so overlapping requests agree.
+        """
+        phase = zlib.crc32(f"{self.seed}:{ticker}".encode()) / 2**32 * 2 * np.pi
+        days = pd.DatetimeIndex(index).as_unit("ns").asi8 / 86_400e9
+        close = (50 + phase * 30) * np.exp(0.15 * np.sin(days / 40 + phase) + 0.04 * np.sin(days * 3 + 2 * phase)
+                                           + 0.01 * np.sin(days * 211 + 3 * phase) + 0.002 * np.sin(days * 4000 + phase))
+        open_ = close * (1 + 0.006 * np.sin(days * 37 + phase))
+        spread = 0.004 * (1.2 + np.sin(days * 53 + 2 * phase))
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * (1 + spread),
+            "Low": np.minimum(open_, close) * (1 - spread),
+            "Close": close,
+            "Volume": (1_000_000 * (1.5 + np.sin(days * 17 + phase))).astype("int64"),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        }, index=index)
+
+
+def split_bulk_frame(frame, tickers):
+    """
+    Splits a yf.download() result into one frame per ticker.
+
+    Returns:
+        dict: Ticker symbol to DataFrame; tickers without rows are omitted.
+    """
+    frames = {}
+    if frame is None or frame.empty:
+        return frames
+    if isinstance(frame.columns, pd.MultiIndex):
+        available = frame.columns.get_level_values(0)
+        for ticker in tickers:
+            if ticker in available:
+                piece = frame[ticker].dropna(how="all")
+                if not piece.empty:
+                    frames[ticker] = piece
+    elif len(tickers) == 1:
+        frames[tickers[0]] = frame.dropna(how="all")
+    return frames
+
+
+class FetchEngine:
+    """
+    Runs source requests concurrently on one event loop.
+
+    The engine owns the source's pooled HTTP session, caps in-flight requests
+    with a semaphore and spaces them with the source's shared token bucket.
+    Every request goes through the resilience layer: identical concurrent
+    requests are coalesced into one, transient failures are retried with
+    backoff under the command's RetryPolicy, the source's circuit breaker fails
+    calls fast while it is down, and slow requests are optionally hedged.
+    Use it as an async context manager.
+    """
+
+    def __init__(self, source, max_in_flight=None, rate_limit=None):
+        self.source = source
+        self.max_in_flight = max(1, max_in_flight or source.max_in_flight)
+        self.limiter = get_limiter(source.name, rate_limit if rate_limit is not None else source.rate_limit, source.burst)
+        self.health = get_health(source.name)
+        self.stats = {"requests": 0, "in_flight_peak": 0}
+        self._in_flight = 0
+        self._coalescer = Coalescer(self.health)
+        self.session = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.session = await self.source.create_session(self.max_in_flight)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.source.close_session(self.session)
+        self.session = None
+
+    async def _call(self, method, *args):
+        """Calls `method(session, *args)`, joining an identical request already in flight."""
+        key = (method.__name__, *(tuple(arg) if isinstance(arg, list) else arg for arg in args))
+        try:
+            hash(key)
+        except TypeError:
+            return await self._retried(method, args)
+        return await self._coalescer.run(key, lambda: self._retried(method, args))
+
+    async def _retried(self, method, args):
+        """Sends the request through the circuit breaker, retrying transient failures."""
+        policy = current_policy()
+        breaker = self.health.breaker
+        waited = 0.0
+        attempt = 0
+        while True:
+            probe = breaker.allow()
+            try:
+                result = await self._hedged(method, args, policy.hedge_delay(self.health))
+            except asyncio.CancelledError:
+                if probe:
+                    breaker.release()
+                raise
+            except Exception as e:
+                transient = is_transient(e)
+                breaker.record(not transient)
+                self.health.count("failures")
+                delay = policy.delay(attempt, e) if transient and attempt < policy.retries else None
+                if delay is None or waited + delay > policy.budget:
+                    raise
+                attempt += 1
+                self.health.count("retries")
+                self.health.count("retry_wait", delay)
+                logger.debug("%s %s failed (%s); retry %d of %d in %.2fs.", self.source.name, method.__name__, e,
+                             attempt, policy.retries, delay)
+                with span("retry:backoff", "retry", source=self.source.name, attempt=attempt):
+                    await asyncio.sleep(delay)
+                waited += delay
+            else:
+                breaker.record(True)
+                return result
+
+    async def _hedged(self, method, args, hedge_delay):
+        """
+        Sends the request, and once more if the first is still running
+        `hedge_delay` seconds after it went out; the first success wins and the
+        other request is cancelled.
+        """
+        if hedge_delay is None:
+            return await self._send(method, args)
+        sent = asyncio.get_running_loop().create_future()
+        first = asyncio.ensure_future(self._send(method, args, sent))
+        tasks = [first]
+        try:
+            # The hedge clock starts when the request leaves, not while it queues for a slot
+            await asyncio.wait({first, sent}, return_when=asyncio.FIRST_COMPLETED)
+            await asyncio.wait({first}, timeout=hedge_delay)
+            if not first.done():
+                self.health.count("hedged")
+                tasks.append(asyncio.ensure_future(self._send(method, args)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.health.count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # a losing request's failure needs no report
+
+    async def _send(self, method, args, sent=None):
+        async with self._semaphore:
+            await self.limiter.acquire()
+            if sent is not None:
+                sent.set_result(None)
+            self.stats["requests"] += 1
+            self.health.count("requests")
+            self._in_flight += 1
+            self.stats["in_flight_peak"] = max(self.stats["in_flight_peak"], self._in_flight)
+            started = time.perf_counter()
+            try:
+                with span("network", "network", source=self.source.name, call=method.__name__):
+                    result = await method(self.session, *args)
+            finally:
+                self._in_flight -= 1
+            self.health.observe(time.perf_counter() - started)
+            return result
+
+    async def history(self, ticker, start_date=None, end_date=None, period=None, interval="1d"):
+        """Fetches one ticker."""
+        return await self._call(self.source.fetch_history, ticker, start_date, end_date, period, interval)
+
+    async def batch(self, tickers, start_date=None, end_date=None, period=None, interval="1d"):
+        """
+        Fetches several tickers, as one bulk request when the source supports it
+        and as concurrent single-ticker requests otherwise.
+
+        Returns:
+            tuple: (frames, failures) dictionaries keyed by ticker.
+        """
+        if self.source.supports_batch:
+            return await self._call(self.source.fetch_batch, list(tickers), start_date, end_date, period, interval), {}
+
+        results = await asyncio.gather(
+            *(self.history(ticker, start_date, end_date, period, interval) for ticker in tickers),
+            return_exceptions=True,
+        )
+        frames, failures = {}, {}
+        for ticker, result in zip(tickers, results):
+            if isinstance(result, Exception):
+                failures[ticker] = str(result)
+            elif result is not None and not result.empty:
+                frames[ticker] = result
+        return frames, failures
+
+    async def quotes(self, tickers, fields):
+        """
+        Fetches quote snapshots in concurrent requests of at most the source's
+        `quote_batch_size` symbols each.
+
+        Returns:
+            tuple: (quotes, failures) dictionaries keyed by ticker.
+        """
+        size = max(1, self.source.quote_batch_size)
+        batches = [list(tickers[first:first + size]) for first in range(0, len(tickers), size)]
+        results = await asyncio.gather(*(self._call(self.source.fetch_quotes, batch, fields) for batch in batches),
+                                       return_exceptions=True)
+        quotes, failures = {}, {}
+        for batch, result in zip(batches, results):
+            for ticker in batch:
+                if isinstance(result, Exception):
+                    failures[ticker] = str(result)
+                elif ticker in result:
+                    quotes[ticker] = result[ticker]
+                else:
+                    failures[ticker] = "No quote returned"
+        return quotes, failures
+
+
+class WarmEngines:
+    """
+    A background event loop keeping one open FetchEngine per (source,
+    in-flight cap, rate limit), so pooled HTTP sessions and their keep-alive
+    connections outlive a single command. `guard serve` installs one with
+    use_warm_engines(); engines are keyed by source name, so every caller
+    shares the first instance created for that source.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="warm-engines", daemon=True)
+        self.thread.start()
+        self.engines = {}
+
+    async def _engine(self, source, max_in_flight, rate_limit):
+        key = (source.name, max_in_flight, rate_limit)
+        if key not in self.engines:
+            # Stored before the session opens, so concurrent callers wait for the same engine
+            self.engines[key] = asyncio.ensure_future(FetchEngine(source, max_in_flight, rate_limit).__aenter__())
+        return await self.engines[key]
+
+    def run(self, source, work, max_in_flight=None, rate_limit=None):
+        """
+        Runs coroutine function `work(engine)` on the warm loop and waits for
+        its result. The coroutine sees the caller's context variables.
+        """
+        context = contextvars.copy_context()
+
+        async def call():
+            for variable, value in context.items():
+                variable.set(value)
+            return await work(await self._engine(source, max_in_flight, rate_limit))
+        return asyncio.run_coroutine_threadsafe(call(), self.loop).result()
+
+    def close(self):
+        async def shutdown():
+            for engine in self.engines.values():
+                await (await engine).__aexit__(None, None, None)
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+_warm_engines = None
+
+
+def use_warm_engines(engines):
+    """Routes run_engine() through `engines` (a WarmEngines, or None for short-lived engines)."""
+    global _warm_engines
+    _warm_engines = engines
+
+
+def run_engine(source, work, max_in_flight=None, rate_limit=None):
+    """
+    Synchronously runs coroutine function `work(engine)` with a FetchEngine
+    for `source`: a warm one when installed, else one opened for this call.
+    Retries, coalesced and hedged requests and breaker rejections during the
+    call are logged afterwards.
+    """
+    health = get_health(source.name)
+    before = health.snapshot()
+    try:
+        if _warm_engines is not None:
+            return _warm_engines.run(source, work, max_in_flight, rate_limit)
+
+        async def run():
+            async with FetchEngine(source, max_in_flight=max_in_flight, rate_limit=rate_limit) as engine:
+                return await work(engine)
+        return asyncio.run(run())
+    finally:
+        summary = health.summary(before)
+        if summary:
+            logger.log(logging.INFO if health.breaker.state == health.breaker.CLOSED else logging.WARNING, summary)
+
+
+def fetch_history(source, ticker, start_date=None, end_date=None, period=None, interval="1d"):
+    """Synchronously fetches one ticker's history."""
+    return run_engine(source, lambda engine: engine.history(ticker, start_date, end_date, period, interval), max_in_flight=1)
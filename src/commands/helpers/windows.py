@@ -0,0 +1,161 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from .cache import to_date
+from .sessions import calendar_for
+from .sources import run_engine
+
+# Trading sessions per request window, by bar interval. Intraday windows stay
+# within the span Yahoo serves per request (7 days of 1m bars, 60 days of
+# other minute bars); daily windows bound memory when streaming decades.
+WINDOW_SESSIONS = {"1m": 5, "2m": 20, "5m": 20, "15m": 20, "30m": 20, "60m": 120, "90m": 20, "1h": 120}
+DEFAULT_WINDOW_SESSIONS = 1260
+
+
+def plan_windows(start, end, interval="1d", market=None, sessions=None):
+    """
+    Splits [start, end) into consecutive date windows of about `sessions`
+    trading sessions of `market` (calendar days when market is None, for
+    assets trading around the clock). Windows start on a session, so none is
+    spent on weekends or holidays alone, and together they cover the range
+    without gaps or overlap.
+
+    Returns:
+        list: (start, end) date tuples, end exclusive.
+    """
+    start, end = to_date(start), to_date(end)
+    sessions = sessions or WINDOW_SESSIONS.get(interval, DEFAULT_WINDOW_SESSIONS)
+    if market is None:
+        dates = np.arange(np.datetime64(start), np.datetime64(end), dtype="datetime64[D]")
+    else:
+        dates = calendar_for(market, start, end).sessions_between(start, end).index.values.astype("datetime64[D]")
+    cuts = [pd.Timestamp(day).date() for day in dates[sessions::sessions]]
+    bounds = [start, *cuts, end]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+async def fetch_windows_async(engine, ticker, windows, interval, on_window, ahead=None):
+    """
+    Downloads `windows` concurrently and hands each frame to
+    on_window(window, frame) in window order.
+
+    At most `ahead` windows (twice the engine's in-flight cap by default) are
+    downloaded but not yet delivered, so memory stays bounded by the window
+    size however long the range. Each window is its own request, so the
+    engine retries a transient failure of one window without the others.
+
+    Raises:
+        RuntimeError: If a window still fails after the engine's retries; the
+        windows before it have been delivered.
+    """
+    slots = asyncio.Semaphore(ahead or 2 * engine.max_in_flight)
+    queue = asyncio.Queue()
+
+    async def download(window):
+        try:
+            return await engine.history(ticker, window[0], window[1], None, interval)
+        except Exception as e:
+            raise RuntimeError(f"Window {window[0]} to {window[1]} failed: {e}")
+
+    async def schedule():
+        for window in windows:
+            await slots.acquire()
+            await queue.put((window, asyncio.ensure_future(download(window))))
+
+    scheduler = asyncio.ensure_future(schedule())
+    try:
+        for _ in windows:
+            window, task = await queue.get()
+            frame = await task
+            on_window(window, frame)
+            slots.release()
+    finally:
+        scheduler.cancel()
+        while not queue.empty():
+            queue.get_nowait()[1].cancel()
+
+
+class WindowMerger:
+    """
+    Joins window frames into one time-ordered series: rows not after the last
+    bar already delivered (a bar repeated at a window edge) are dropped.
+    """
+
+    def __init__(self):
+        self.last = None
+
+    def __call__(self, frame):
+        if frame is None or frame.empty:
+            return frame
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index()
+        if frame.index.has_duplicates:
+            frame = frame[~frame.index.duplicated(keep="last")]
+        if self.last is not None:
+            frame = frame[frame.index > self.last]
+        if len(frame):
+            self.last = frame.index[-1]
+        return frame
+
+
+def fetch_windowed(source, ticker, start_date, end_date, on_window, interval="1d", market=None, cache=None,
+                   refresh=False, max_in_flight=None, rate_limit=None):
+    """
+    Fetches [start_date, end_date) as calendar windows downloaded concurrently
+    and hands each window's bars to on_window(frame) in order, without
+    duplicate bars.
+
+    With a cache, only the windows covering missing date gaps are downloaded.
+    Each is stored as soon as it arrives, so after a failure a rerun fetches
+    just the windows that are still missing. A window's bars are read back
+    from the cache and handed on as soon as every download overlapping it is
+    stored, so the first bars are delivered while later windows are still
+    downloading.
+
+    Returns:
+        int: Windows downloaded.
+
+    Raises:
+        RuntimeError: If a window fails after its retries.
+    """
+    merge = WindowMerger()
+    windows = plan_windows(start_date, end_date, interval, market)
+
+    if cache is None:
+        async def stream(engine):
+            await fetch_windows_async(engine, ticker, windows, interval, lambda window, frame: on_window(merge(frame)))
+        run_engine(source, stream, max_in_flight=max_in_flight, rate_limit=rate_limit)
+        return len(windows)
+
+    if refresh:
+        cache.invalidate(source.name, ticker, interval, start_date, end_date)
+    gaps = cache.missing_ranges(source.name, ticker, interval, start_date, end_date)
+    cache.record_lookup(gaps, start_date, end_date)
+    downloads = [window for gap_start, gap_end in gaps for window in plan_windows(gap_start, gap_end, interval, market)]
+    progress = {"stored": 0, "delivered": 0}
+
+    def deliver():
+        # Downloads arrive in order, so a window is complete once the next pending download starts after it
+        stored = progress["stored"]
+        while progress["delivered"] < len(windows):
+            window_start, window_end = windows[progress["delivered"]]
+            if stored < len(downloads) and downloads[stored][0] < window_end:
+                return
+            on_window(merge(cache.load(source.name, ticker, interval, window_start, window_end)))
+            progress["delivered"] += 1
+
+    def store(window, frame):
+        cache.stats["upstream_requests"] += 1
+        cache.store(source.name, ticker, interval, frame, window[0], window[1])
+        progress["stored"] += 1
+        deliver()
+
+    # Windows already cached up to the first gap go out before anything is downloaded
+    deliver()
+    if downloads:
+        async def download(engine):
+            await fetch_windows_async(engine, ticker, downloads, interval, store)
+        run_engine(source, download, max_in_flight=max_in_flight, rate_limit=rate_limit)
+    return len(downloads)
@@ -0,0 +1,197 @@
+import os
+
+import pandas as pd
+
+from .defaults import DEFAULT_CHUNK_SIZE, DEFAULT_COMPRESSION
+from .readers import check_ipc_compression, require_pyarrow
+
+
+class ChunkWriter:
+    """
+    Base class for export writers that receive data in bounded-size chunks.
+
+    Writers are used as context managers; each write() call appends rows to the
+    file immediately so memory stays proportional to the chunk size rather than
+    to the whole export.
+    """
+
+    def __init__(self, path, append=False, chunk_size=DEFAULT_CHUNK_SIZE, compression=None):
+        self.path = path
+        self.compression = compression
+        self.append = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        raise NotImplementedError
+
+    def write_chunk(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def write(self, frame):
+        """Writes `frame` in slices of at most `chunk_size` rows."""
+        for start in range(0, len(frame), self.chunk_size):
+            chunk = frame.iloc[start:start + self.chunk_size]
+            self.write_chunk(chunk)
+            self.rows_written += len(chunk)
+
+
+class CsvChunkWriter(ChunkWriter):
+    """Appends CSV rows, writing the header only when the file is new."""
+
+    def open(self):
+        self._handle = open(self.path, "a" if self.append else "w", newline="")
+        self._header = not self.append
+
+    def write_chunk(self, frame):
+        frame.to_csv(self._handle, header=self._header, index=False)
+        self._header = False
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+
+class JsonLinesChunkWriter(ChunkWriter):
+    """Appends one JSON object per line with ISO-8601 dates."""
+
+    def open(self):
+        self._handle = open(self.path, "a" if self.append else "w")
+
+    def write_chunk(self, frame):
+        text = frame.to_json(orient="records", lines=True, date_format="iso")
+        self._handle.write(text if text.endswith("\n") else text + "\n")
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+
+class XlsxChunkWriter(ChunkWriter):
+    """
+    Streams rows into a write-only openpyxl workbook.
+
+    Appending copies the existing sheet row by row through a read-only workbook
+    into a fresh write-only one, so neither side is ever fully loaded. Excel
+    cannot store timezones, so timezone-aware columns are written as naive
+    local datetimes.
+    """
+
+    def open(self):
+        from openpyxl import Workbook, load_workbook
+
+        self._target = self.path + ".partial" if self.append else self.path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._header = True
+        if self.append:
+            existing = load_workbook(self.path, read_only=True)
+            for row in existing.active.iter_rows(values_only=True):
+                self._sheet.append(row)
+            existing.close()
+            self._header = False
+
+    def write_chunk(self, frame):
+        frame = frame.assign(**{
+            col: frame[col].dt.tz_localize(None)
+            for col in frame.columns
+            if isinstance(frame[col].dtype, pd.DatetimeTZDtype)
+        })
+        if self._header:
+            self._sheet.append(list(frame.columns))
+            self._header = False
+        for row in frame.itertuples(index=False, name=None):
+            self._sheet.append([None if pd.isna(value) else value for value in row])
+
+    def close(self):
+        self._workbook.save(self._target)
+        if self._target != self.path:
+            os.replace(self._target, self.path)
+
+
+class ParquetChunkWriter(ChunkWriter):
+    """
+    Writes each chunk as a Parquet row group. The schema is fixed by the first
+    chunk; Parquet files cannot be appended to.
+    """
+
+    def open(self):
+        if self.append:
+            raise ValueError("Appending to an existing Parquet file is not supported.")
+        self._pa = require_pyarrow()
+        self._writer = None
+
+    def write_chunk(self, frame):
+        import pyarrow.parquet as pq
+
+        table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            compression = self.compression or DEFAULT_COMPRESSION["parquet"]
+            self._writer = pq.ParquetWriter(self.path, table.schema,
+                                            compression=None if compression == "uncompressed" else compression)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ArrowChunkWriter(ChunkWriter):
+    """
+    Writes each chunk as a record batch of an Arrow IPC (Feather V2) file.
+    """
+
+    def open(self):
+        if self.append:
+            raise ValueError("Appending to an existing Arrow file is not supported.")
+        self.compression = self.compression or DEFAULT_COMPRESSION["arrow"]
+        check_ipc_compression(self.compression, os.path.splitext(self.path)[1].lstrip(".") or "arrow")
+        self._pa = require_pyarrow()
+        self._writer = None
+
+    def write_chunk(self, frame):
+        table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            compression = self.compression
+            options = self._pa.ipc.IpcWriteOptions(compression=None if compression == "uncompressed" else compression)
+            self._schema = table.schema
+            self._writer = self._pa.ipc.new_file(self.path, self._schema, options=options)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {
+    "csv": CsvChunkWriter,
+    "jsonl": JsonLinesChunkWriter,
+    "xlsx": XlsxChunkWriter,
+    "parquet": ParquetChunkWriter,
+    "feather": ArrowChunkWriter,
+    "arrow": ArrowChunkWriter,
+}
+
+
+def open_writer(export_format, path, append=False, chunk_size=DEFAULT_CHUNK_SIZE, compression=None):
+    """
+    Returns a chunked writer for `export_format`.
+
+    Raises:
+        ValueError: If the format has no streaming writer.
+    """
+    try:
+        writer_class = WRITERS[export_format]
+    except KeyError:
+        raise ValueError(f"Streaming export is not supported for format: {export_format}")
+    return writer_class(path, append=append, chunk_size=chunk_size, compression=compression)
@@ -0,0 +1,244 @@
+# Argument parsers for every command. Only the standard library and the
+# dependency-free defaults module may be imported here: the CLI builds these
+# parsers on every invocation, including `guard --help`, and the command
+# implementations (with pandas, yfinance, ...) are imported only once a
+# command actually runs.
+from .helpers.defaults import (
+    ASSET_TYPES,
+    BAR_INTERVALS,
+    COMPRESSION_CHOICES,
+    CORRELATION_METHODS,
+    DEFAULT_ANALYZE_DAYS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CORRELATION_BLOCK,
+    DEFAULT_DATASET_DIR,
+    DEFAULT_LIVE_TTL,
+    DEFAULT_MAX_GAP,
+    DEFAULT_MAX_POLL_SECONDS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MIN_COVERAGE,
+    DEFAULT_MIN_PERIODS,
+    DEFAULT_POLL_SECONDS,
+    DEFAULT_PREVIEW_ROWS,
+    DEFAULT_RANK_BY,
+    DEFAULT_REFERENCE_TTL,
+    DEFAULT_RETRIES,
+    DEFAULT_SERVE_WORKERS,
+    DEFAULT_SOCKET_PATH,
+    DEFAULT_WATCH_INTERVAL,
+    EXPORT_FORMATS,
+    FETCH_INTERVALS,
+    MISSING_POLICIES,
+    RENDER_VIEWS,
+    RETURN_KINDS,
+    SOURCE_NAMES,
+)
+
+
+def add_ticker_arguments(parser):
+    ticker_group = parser.add_mutually_exclusive_group(required=True)
+    ticker_group.add_argument("-t", "--ticker", help="Ticker symbol")
+    ticker_group.add_argument("--tickers", help="Comma separated ticker symbols, e.g. AAPL,MSFT")
+    ticker_group.add_argument("--tickers-file", help="File with ticker symbols, one per line")
+    parser.add_argument("-s", "--source", help="Data source", choices=SOURCE_NAMES, default="yahoo")
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--no-cache", help="Bypass the local OHLCV cache", action="store_true")
+    parser.add_argument("--refresh", help="Re-download the requested range and update the cache", action="store_true")
+    parser.add_argument("--cache-ttl", help="Seconds before cached bars for the current session expire", type=int, default=DEFAULT_LIVE_TTL)
+
+
+def add_render_arguments(parser):
+    parser.add_argument("--view", help="How the result is printed: first and last rows with a summary (preview), head, tail, summary or all rows", choices=RENDER_VIEWS, default="preview")
+    parser.add_argument("--rows", help="Rows shown by the preview, head and tail views", type=int, default=DEFAULT_PREVIEW_ROWS)
+    parser.add_argument("--columns", help="Comma separated columns to show, by name or LABELS key, e.g. close,volume,dollar_volume")
+    parser.add_argument("--pager", help="Page through the result interactively", action="store_true")
+    parser.add_argument("--plain", help="Plain text output without grid lines or ANSI colors, for piping", action="store_true")
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", help="Time the network, transform, render and export phases and write PREFIX.json and PREFIX.trace.json (default prefix: guard_profile)",
+                        nargs="?", const="guard_profile", metavar="PREFIX")
+    parser.add_argument("--cprofile", help="With --profile, also run cProfile and write PREFIX.pstats", action="store_true")
+
+
+def add_resilience_arguments(parser):
+    parser.add_argument("--retries", help="Retries per upstream request after a timeout, dropped connection or HTTP 429/5xx, with exponential backoff and jitter",
+                        type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--hedge", help="Send a second copy of any request still unanswered after SECONDS and keep the first answer (default delay: the source's recent 95th percentile latency)",
+                        nargs="?", const=0.0, type=float, metavar="SECONDS")
+
+
+def setup_fetch_parser(subparsers):
+    fetch_parser = subparsers.add_parser("fetch", help="Fetch data")
+    add_ticker_arguments(fetch_parser)
+    fetch_parser.add_argument("-z", "--timezone", help="Timezone")
+    fetch_parser.add_argument("--asset-type", help="Asset type to fetch data for", choices=ASSET_TYPES, required=True)
+    fetch_parser.add_argument("--start-date", help="Start date for historical data fetch")
+    fetch_parser.add_argument("--end-date", help="End date for historical data fetch")
+    fetch_parser.add_argument("--quote", help="Fetch a current quote snapshot (price, bid/ask, ranges, PE, EPS, market cap, ...) per ticker instead of price history", action="store_true")
+    fetch_parser.add_argument("--reference-ttl", help="Seconds before cached company name, exchange and shares outstanding are re-fetched in --quote mode", type=int, default=DEFAULT_REFERENCE_TTL)
+    fetch_parser.add_argument("--interval", help="Bar interval; intervals the source does not serve (e.g. 2h, 4h) are built by resampling finer bars, as are any for which finer bars are already cached", choices=FETCH_INTERVALS, default="1d")
+    export_group = fetch_parser.add_mutually_exclusive_group()
+    export_group.add_argument("--export-format", help="Export format for fetched data", choices=EXPORT_FORMATS)
+    export_group.add_argument("--dataset", help=f"Upsert the fetched bars into a ticker/year-partitioned Parquet dataset under DIR, replacing rows with the same date (default: {DEFAULT_DATASET_DIR})",
+                              nargs="?", const=DEFAULT_DATASET_DIR, metavar="DIR")
+    fetch_parser.add_argument("--compression", help="Compression codec for parquet/feather/arrow exports (default: snappy for parquet, uncompressed otherwise)", choices=COMPRESSION_CHOICES)
+    fetch_parser.add_argument("--export-filename", help="Export filename for fetched data")
+    fetch_parser.add_argument("--batch-size", help="Tickers per upstream request in multi-ticker mode", type=int, default=DEFAULT_BATCH_SIZE)
+    fetch_parser.add_argument("--max-workers", help="Maximum upstream requests in flight in multi-ticker mode", type=int, default=DEFAULT_MAX_WORKERS)
+    fetch_parser.add_argument("--rate-limit", help="Requests per second allowed to the source (default: per-source setting)", type=float)
+    add_resilience_arguments(fetch_parser)
+    fetch_parser.add_argument("--stream", help="Write the export in chunks as data arrives (all formats except json)", action="store_true")
+    fetch_parser.add_argument("--append", help="Append to an existing export file instead of overwriting it (implies --stream)", action="store_true")
+    fetch_parser.add_argument("--chunk-size", help="Rows per chunk when streaming an export", type=int, default=DEFAULT_CHUNK_SIZE)
+    add_cache_arguments(fetch_parser)
+    add_render_arguments(fetch_parser)
+    add_profile_arguments(fetch_parser)
+
+
+def setup_watch_parser(subparsers):
+    watch_parser = subparsers.add_parser("watch", help="Poll tickers and update a live table")
+    add_ticker_arguments(watch_parser)
+    watch_parser.add_argument("-z", "--timezone", help="Market whose hours drive the polling rate (default: United States)")
+    watch_parser.add_argument("--asset-type", help="Asset type; crypto and currency are polled as always open", choices=ASSET_TYPES, default="stock")
+    watch_parser.add_argument("--interval", help="Bar interval", choices=BAR_INTERVALS, default=DEFAULT_WATCH_INTERVAL)
+    watch_parser.add_argument("--lookback", help="History loaded on the first poll, e.g. 1d or 5d", default="1d")
+    watch_parser.add_argument("--poll", help="Seconds between polls while the market is open", type=float, default=DEFAULT_POLL_SECONDS)
+    watch_parser.add_argument("--max-poll", help="Longest back-off between polls while the market is closed", type=float, default=DEFAULT_MAX_POLL_SECONDS)
+    watch_parser.add_argument("--max-workers", help="Maximum upstream requests in flight", type=int, default=DEFAULT_MAX_WORKERS)
+    watch_parser.add_argument("--rate-limit", help="Requests per second allowed to the source (default: per-source setting)", type=float)
+    add_resilience_arguments(watch_parser)
+    watch_parser.add_argument("--iterations", help="Stop after this many polls (default: run until interrupted)", type=int, default=0)
+    watch_parser.add_argument("--plain", help="Print changed rows as lines instead of redrawing the table in place", action="store_true")
+
+
+def setup_analyze_parser(subparsers):
+    analyze_parser = subparsers.add_parser("analyze", help="Compute technical indicators")
+    add_ticker_arguments(analyze_parser)
+    analyze_parser.add_argument("--start-date", help=f"Start of the history to analyze (default: {DEFAULT_ANALYZE_DAYS} days before the end date)")
+    analyze_parser.add_argument("--end-date", help="End of the history to analyze (default: tomorrow)")
+    analyze_parser.add_argument("--interval", help="Bar interval", choices=BAR_INTERVALS, default="1d")
+    analyze_parser.add_argument("--indicators", help="Comma separated subset of sma,ema,rsi,macd,vwap,atr,volatility (default: all)")
+    analyze_parser.add_argument("--sma", help="SMA window", type=int, default=20)
+    analyze_parser.add_argument("--ema", help="EMA span", type=int, default=20)
+    analyze_parser.add_argument("--rsi", help="RSI period", type=int, default=14)
+    analyze_parser.add_argument("--macd", help="MACD fast,slow,signal spans", default="12,26,9")
+    analyze_parser.add_argument("--atr", help="ATR period", type=int, default=14)
+    analyze_parser.add_argument("--volatility", help="Rolling volatility window", type=int, default=20)
+    analyze_parser.add_argument("--state", help="JSON file with saved indicator state; only bars newer than the saved state are computed, and the state is updated")
+    analyze_parser.add_argument("--export-format", help="Export format for the indicator table", choices=EXPORT_FORMATS)
+    analyze_parser.add_argument("--compression", help="Compression codec for parquet/feather/arrow exports", choices=COMPRESSION_CHOICES)
+    analyze_parser.add_argument("--export-filename", help="Export filename for the indicator table")
+    analyze_parser.add_argument("--append", help="Append to an existing export file (use with --state to add only new rows)", action="store_true")
+    analyze_parser.add_argument("--batch-size", help="Tickers per upstream request", type=int, default=DEFAULT_BATCH_SIZE)
+    analyze_parser.add_argument("--max-workers", help="Maximum upstream requests in flight", type=int, default=DEFAULT_MAX_WORKERS)
+    analyze_parser.add_argument("--rate-limit", help="Requests per second allowed to the source (default: per-source setting)", type=float)
+    add_resilience_arguments(analyze_parser)
+    add_cache_arguments(analyze_parser)
+    add_render_arguments(analyze_parser)
+    add_profile_arguments(analyze_parser)
+
+
+def setup_screen_parser(subparsers):
+    screen_parser = subparsers.add_parser("screen", help="Screen a universe of tickers with filter expressions")
+    add_ticker_arguments(screen_parser)
+    screen_parser.add_argument("--filter", help="Filter expression every match must satisfy, e.g. \"close > sma(200) and volume > 2 * sma(20, volume)\"; repeat to require several",
+                               action="append", required=True, dest="filters", metavar="EXPR")
+    screen_parser.add_argument("--rank-by", help=f"Expression ranking the matches, highest first (default: {DEFAULT_RANK_BY})", default=DEFAULT_RANK_BY, metavar="EXPR")
+    screen_parser.add_argument("--ascending", help="Rank lowest first", action="store_true")
+    screen_parser.add_argument("--limit", help="Show at most this many matches", type=int)
+    screen_parser.add_argument("--interval", help="Bar interval", choices=BAR_INTERVALS, default="1d")
+    screen_parser.add_argument("--start-date", help="Start of the history to load (default: enough for the longest lookback in the expressions)")
+    screen_parser.add_argument("--end-date", help="End of the history to load (default: tomorrow)")
+    screen_parser.add_argument("--workers", help="Processes evaluating the filters on universes of over 10M bars (default: one per CPU)", type=int)
+    screen_parser.add_argument("--batch-size", help="Tickers per upstream request", type=int, default=DEFAULT_BATCH_SIZE)
+    screen_parser.add_argument("--max-workers", help="Maximum upstream requests in flight", type=int, default=DEFAULT_MAX_WORKERS)
+    screen_parser.add_argument("--rate-limit", help="Requests per second allowed to the source (default: per-source setting)", type=float)
+    add_resilience_arguments(screen_parser)
+    screen_parser.add_argument("--export-format", help="Export format for the matches", choices=EXPORT_FORMATS)
+    screen_parser.add_argument("--compression", help="Compression codec for parquet/feather/arrow exports", choices=COMPRESSION_CHOICES)
+    screen_parser.add_argument("--export-filename", help="Export filename for the matches")
+    add_cache_arguments(screen_parser)
+    add_render_arguments(screen_parser)
+    add_profile_arguments(screen_parser)
+
+
+def setup_correlate_parser(subparsers):
+    correlate_parser = subparsers.add_parser("correlate", help="Compute return correlation or covariance matrices")
+    add_ticker_arguments(correlate_parser)
+    correlate_parser.add_argument("-z", "--timezone", help="Market whose session calendar aligns the dates (default: United States)")
+    correlate_parser.add_argument("--asset-type", help="Asset type; crypto and currency are aligned on calendar days", choices=ASSET_TYPES, default="stock")
+    correlate_parser.add_argument("--start-date", help=f"Start of the history (default: {DEFAULT_ANALYZE_DAYS} days before the end date)")
+    correlate_parser.add_argument("--end-date", help="End of the history (default: tomorrow)")
+    correlate_parser.add_argument("--interval", help="Bar interval", choices=BAR_INTERVALS, default="1d")
+    correlate_parser.add_argument("--method", help="Matrix to compute", choices=CORRELATION_METHODS, default="pearson")
+    correlate_parser.add_argument("--returns", help="Log or simple one-period returns", choices=RETURN_KINDS, default="log")
+    correlate_parser.add_argument("--missing", help="Missing bars: use the dates each pair shares (pairwise), carry prices forward over short gaps (ffill) or keep only dates every ticker has (drop)",
+                                  choices=MISSING_POLICIES, default="pairwise")
+    correlate_parser.add_argument("--max-gap", help="Longest gap, in dates, that --missing ffill carries a price over", type=int, default=DEFAULT_MAX_GAP)
+    correlate_parser.add_argument("--min-coverage", help="Drop tickers with returns on less than this share of the dates", type=float, default=DEFAULT_MIN_COVERAGE)
+    correlate_parser.add_argument("--min-periods", help="Fewest shared returns a pair needs for a value", type=int, default=DEFAULT_MIN_PERIODS)
+    correlate_parser.add_argument("--window", help="Compute one matrix per rolling window of this many dates", type=int)
+    correlate_parser.add_argument("--step", help="Dates between consecutive rolling windows", type=int, default=1)
+    correlate_parser.add_argument("--block-size", help="Tickers per block of the matrix computation; bounds working memory", type=int, default=DEFAULT_CORRELATION_BLOCK)
+    correlate_parser.add_argument("--dtype", help="Precision of the matrix file", choices=["float64", "float32"], default="float64")
+    correlate_parser.add_argument("--output", help="Matrix file (.npy, with a .json file naming rows, columns and windows; default: under ~/Documents/invest_guard)")
+    correlate_parser.add_argument("--batch-size", help="Tickers per upstream request", type=int, default=DEFAULT_BATCH_SIZE)
+    correlate_parser.add_argument("--max-workers", help="Maximum upstream requests in flight", type=int, default=DEFAULT_MAX_WORKERS)
+    correlate_parser.add_argument("--rate-limit", help="Requests per second allowed to the source (default: per-source setting)", type=float)
+    add_resilience_arguments(correlate_parser)
+    add_cache_arguments(correlate_parser)
+    add_render_arguments(correlate_parser)
+    add_profile_arguments(correlate_parser)
+
+
+def setup_query_parser(subparsers):
+    query_parser = subparsers.add_parser("query", help="Query bars stored with guard fetch --dataset")
+    ticker_group = query_parser.add_mutually_exclusive_group()
+    ticker_group.add_argument("-t", "--ticker", help="Ticker symbol")
+    ticker_group.add_argument("--tickers", help="Comma separated ticker symbols, e.g. AAPL,MSFT (default: every ticker in the dataset)")
+    ticker_group.add_argument("--tickers-file", help="File with ticker symbols, one per line")
+    query_parser.add_argument("--start-date", help="First date to read (inclusive)")
+    query_parser.add_argument("--end-date", help="Date to read up to (exclusive)")
+    query_parser.add_argument("--interval", help="Bar interval the dataset was written at", choices=FETCH_INTERVALS, default="1d")
+    query_parser.add_argument("--where", help="Row predicate, e.g. \"volume > 5e7 and close > open\"; repeat to require several",
+                              action="append", default=[], metavar="EXPR")
+    query_parser.add_argument("--dataset", help=f"Dataset directory (default: {DEFAULT_DATASET_DIR})", default=DEFAULT_DATASET_DIR, metavar="DIR")
+    query_parser.add_argument("--export-format", help="Export format for the result", choices=EXPORT_FORMATS)
+    query_parser.add_argument("--compression", help="Compression codec for parquet/feather/arrow exports", choices=COMPRESSION_CHOICES)
+    query_parser.add_argument("--export-filename", help="Export filename for the result")
+    add_render_arguments(query_parser)
+    add_profile_arguments(query_parser)
+
+
+def setup_serve_parser(subparsers):
+    serve_parser = subparsers.add_parser("serve", help="Run a resident daemon that fetch, analyze, screen, query and correlate forward to")
+    serve_parser.add_argument("--socket", help="Unix socket to listen on (clients use INVEST_GUARD_SOCKET to find a non-default one)", default=DEFAULT_SOCKET_PATH)
+    serve_parser.add_argument("--workers", help="Commands run at the same time; more wait for a free slot", type=int, default=DEFAULT_SERVE_WORKERS)
+    control_group = serve_parser.add_mutually_exclusive_group()
+    control_group.add_argument("--status", help="Print the running daemon's status and exit", action="store_true")
+    control_group.add_argument("--stop", help="Stop the running daemon", action="store_true")
+
+
+# Command name -> (parser setup, module implementing execute(args), relative to this package)
+COMMANDS = {
+    "fetch": (setup_fetch_parser, ".fetch"),
+    "watch": (setup_watch_parser, ".watch"),
+    "analyze": (setup_analyze_parser, ".analyze"),
+    "screen": (setup_screen_parser, ".screen"),
+    "query": (setup_query_parser, ".query"),
+    "correlate": (setup_correlate_parser, ".correlate"),
+    "serve": (setup_serve_parser, ".serve"),
+}
+
+# Options naming cwd-relative files, resolved against the caller's directory when a command runs
+# in the daemon. --export-filename is not one: exports land under ~/Documents/invest_guard either way.
+PATH_OPTIONS = ("tickers_file", "state", "dataset", "output")
+
+
+def setup_subparsers(subparsers):
+    for setup, _ in COMMANDS.values():
+        setup(subparsers)
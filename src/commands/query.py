@@ -0,0 +1,44 @@
+import logging
+from datetime import datetime
+
+from .fetch import display_data, disable_colors, export_data
+from .helpers.batch import parse_tickers
+from .helpers.dataset import query_dataset
+from .helpers.profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+def query_command(args):
+    """
+    Reads bars written by `guard fetch --dataset`, opening only the
+    partitions of the requested tickers and years and decoding only the
+    requested columns, with --where predicates pushed down to the scan.
+    """
+    if args.plain:
+        disable_colors()
+    # No tickers given means every ticker in the dataset
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file) or None
+    columns = [column for column in args.columns.split(",") if column.strip()] if args.columns else None
+
+    started = datetime.now()
+    with span("query", tickers=len(tickers) if tickers else "all"):
+        data, stats = query_dataset(args.dataset, args.interval, tickers, args.start_date, args.end_date,
+                                    columns, args.where)
+    logger.info("Read %d rows from %d partition files of %d tickers in %.2fs.", stats.get("rows", 0), stats["files"],
+                stats["tickers"], (datetime.now() - started).total_seconds())
+    if data.empty:
+        logger.warning("No rows in %s match the query.", args.dataset)
+        return
+
+    display_data(data, args)
+    if args.export_format:
+        label = tickers[0] if tickers and len(tickers) == 1 else "query"
+        export_data(data, label, args.start_date, args.end_date, args.export_format, args.export_filename, args.compression)
+
+
+def execute(args):
+    try:
+        query_command(args)
+    except ValueError as e:
+        logger.error(str(e))
@@ -0,0 +1,90 @@
+import logging
+import math
+from datetime import datetime
+
+import pandas as pd
+
+from .analyze import SESSION_MINUTES
+from .fetch import colors, disable_colors, display_data, export_data, open_cache
+from .helpers.batch import fetch_many, parse_tickers
+from .helpers.profiling import span
+from .helpers.screening import Expression, screen
+from .helpers.sources import INTRADAY_FREQUENCIES, get_source
+
+logger = logging.getLogger(__name__)
+
+
+def history_range(args, lookback):
+    """
+    Resolves the history to download: from --start-date if given, else
+    enough calendar days to cover `lookback` bars of `args.interval`.
+
+    Returns:
+        tuple: (start_date, end_date) as YYYY-MM-DD strings
+    """
+    end = pd.Timestamp(args.end_date) if args.end_date else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+    if args.start_date:
+        start = pd.Timestamp(args.start_date)
+    else:
+        sessions = lookback
+        if args.interval in INTRADAY_FREQUENCIES:
+            minutes = pd.Timedelta(INTRADAY_FREQUENCIES[args.interval]).total_seconds() / 60
+            sessions = math.ceil(lookback * minutes / SESSION_MINUTES)
+        # Trading sessions to calendar days, with slack for holidays
+        start = end - pd.Timedelta(days=math.ceil(sessions * 365 / 252) + 10)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def screen_command(args):
+    if args.plain:
+        disable_colors()
+    expressions = [Expression(text) for text in [*args.filters, args.rank_by]]
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file)
+    if not tickers:
+        logger.warning("No ticker symbols provided.")
+        return
+
+    start_date, end_date = history_range(args, max(expression.lookback for expression in expressions))
+    cache = open_cache(args)
+    source = get_source(args.source)
+    logger.info("Fetching %d tickers from %s (%s to %s, %s bars)...",
+                len(tickers), args.source, start_date, end_date, args.interval)
+    started = datetime.now()
+    try:
+        frames, failures = fetch_many(tickers, source, start_date, end_date, interval=args.interval,
+                                      batch_size=args.batch_size, max_workers=args.max_workers,
+                                      cache=cache, refresh=args.refresh, rate_limit=args.rate_limit)
+    finally:
+        if cache is not None:
+            logger.info(cache.summary())
+            cache.close()
+    for ticker, reason in failures.items():
+        logger.warning(colors().red + "Failed to fetch data for %s: %s" + colors().reset, ticker, reason)
+    fetched = datetime.now()
+
+    with span("screen:evaluate", tickers=len(frames)):
+        matches = screen(frames, args.filters, args.rank_by, ascending=args.ascending, workers=args.workers)
+    logger.info("%d of %d tickers match (fetch %.2fs, screen %.2fs).", len(matches), len(frames),
+                (fetched - started).total_seconds(), (datetime.now() - fetched).total_seconds())
+    if args.limit:
+        matches = matches[:args.limit]
+    if not matches:
+        return
+
+    rows = []
+    for rank, (ticker, value) in enumerate(matches, 1):
+        last = frames[ticker].iloc[-1]
+        rows.append({"Rank": rank, "Ticker": ticker, "Date": last.name, "Close": last["Close"],
+                     "Volume": last["Volume"], args.rank_by: value})
+    data = pd.DataFrame(rows)
+    display_data(data, args)
+
+    if args.export_format:
+        export_data(data, "screen", start_date, end_date, args.export_format, args.export_filename, args.compression)
+
+
+def execute(args):
+    try:
+        screen_command(args)
+    except ValueError as e:
+        logger.error(str(e))
@@ -0,0 +1,200 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from . import parsers
+from .helpers.daemon import FORWARDED_COMMANDS, RequestOutput, RoutedStream, connect, control, send_message
+from .helpers.resilience import all_health, retry_policy
+from .helpers.screening import shutdown_pool
+from .helpers.sources import WarmEngines, use_warm_engines
+
+logger = logging.getLogger(__name__)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="guard", description="Investment data CLI")
+    parsers.setup_subparsers(parser.add_subparsers(title="commands", dest="command"))
+    return parser
+
+
+def resolve_paths(args, cwd):
+    """Makes the file options of a forwarded command relative to the client's directory."""
+    for name in parsers.PATH_OPTIONS:
+        value = getattr(args, name, None)
+        if value:
+            setattr(args, name, os.path.join(cwd, os.path.expanduser(value)))
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline() or "null")
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            return
+        if "control" in request:
+            send_message(self.request, {"status": self.server.status()})
+            if request["control"] == "stop":
+                threading.Thread(target=self.server.shutdown).start()
+            return
+
+        output = RequestOutput(self.request, bool(request.get("isatty")))
+        started = time.perf_counter()
+        with self.server.slots:
+            code = self.server.run_command(request.get("argv") or [], request.get("cwd") or "/", output)
+        logger.info("guard %s -> exit %s in %.1f ms", " ".join(request.get("argv") or []), code,
+                    (time.perf_counter() - started) * 1000)
+        try:
+            send_message(self.request, {"exit": code})
+        except OSError:
+            pass
+
+
+class GuardServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Runs forwarded guard commands concurrently, one thread per connection and
+    at most `workers` commands at a time, with every command module already
+    imported and fetch engines kept warm between requests.
+    """
+    daemon_threads = True
+
+    def __init__(self, path, workers, engines):
+        self.parser = build_parser()
+        self.engines = engines
+        self.slots = threading.BoundedSemaphore(workers)
+        self.workers = workers
+        self.started = time.time()
+        self.stats = {"requests": 0, "failed": 0, "active": 0}
+        self._stats_lock = threading.Lock()
+        super().__init__(path, RequestHandler)
+
+    def count(self, key, delta=1):
+        with self._stats_lock:
+            self.stats[key] += delta
+
+    def run_command(self, argv, cwd, output):
+        """Runs `guard <argv>` with its output sent to the client. Returns the exit code."""
+        self.count("requests")
+        self.count("active")
+        token = output.activate()
+        try:
+            args = self.parser.parse_args(argv)
+            if args.command not in FORWARDED_COMMANDS:
+                self.parser.error(f"guard serve runs {', '.join(FORWARDED_COMMANDS)}, not {args.command}")
+            resolve_paths(args, cwd)
+            _, module_name = parsers.COMMANDS[args.command]
+            with retry_policy(args):
+                importlib.import_module(module_name, parsers.__package__).execute(args)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            logger.exception("guard %s failed", " ".join(argv))
+            code = 1
+        finally:
+            RequestOutput.deactivate(token)
+            self.count("active", -1)
+        if code:
+            self.count("failed")
+        return code
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "socket": self.server_address,
+            "uptime_s": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            **self.stats,
+            "engines": [f"{name} (in flight {cap or 'default'}, rate {rate or 'default'})"
+                        for name, cap, rate in self.engines.engines],
+            "sources": {name: health.status() for name, health in all_health().items()},
+        }
+
+
+def route_output():
+    """Sends stdout, stderr and log output of each request to its client."""
+    sys.stdout = RoutedStream(sys.stdout, "out")
+    sys.stderr = RoutedStream(sys.stderr, "err")
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and handler.stream in (sys.__stdout__, sys.__stderr__):
+            handler.setStream(sys.stderr if handler.stream is sys.__stderr__ else sys.stdout)
+
+
+def bind(path, workers, engines):
+    """
+    Creates the server on `path`, replacing a stale socket file.
+
+    Raises:
+        RuntimeError: If another daemon is already listening there.
+    """
+    existing = connect(path, timeout=1)
+    if existing is not None:
+        existing.close()
+        raise RuntimeError(f"A guard daemon is already listening on {path}")
+    if os.path.exists(path):
+        os.unlink(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # The daemon runs commands as this user, so only this user may connect
+    previous = os.umask(0o177)
+    try:
+        return GuardServer(path, workers, engines)
+    finally:
+        os.umask(previous)
+
+
+def stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve_command(args):
+    if args.status or args.stop:
+        status = control("stop" if args.stop else "status", args.socket)
+        if status is None:
+            logger.info("No guard daemon is listening on %s", args.socket)
+        else:
+            print(json.dumps(status, indent=2))
+            if args.stop:
+                logger.info("Stopping the guard daemon (pid %s).", status["pid"])
+        return
+    if not hasattr(socket, "AF_UNIX"):
+        logger.error("guard serve needs Unix domain sockets, which this platform does not provide.")
+        return
+
+    for command in FORWARDED_COMMANDS:
+        importlib.import_module(parsers.COMMANDS[command][1], parsers.__package__)
+    engines = WarmEngines()
+    try:
+        server = bind(args.socket, args.workers, engines)
+    except RuntimeError as e:
+        engines.close()
+        logger.error(str(e))
+        return
+    use_warm_engines(engines)
+    route_output()
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
+    logger.info("guard serve listening on %s (pid %d, %d concurrent requests)", args.socket, os.getpid(), args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        use_warm_engines(None)
+        engines.close()
+        shutdown_pool()
+        logger.info("guard serve stopped after %d requests.", server.stats["requests"])
+
+
+def execute(args):
+    serve_command(args)
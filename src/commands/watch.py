@@ -0,0 +1,157 @@
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+from colorama import just_fix_windows_console
+
+from .fetch import colors, is_market_open, resolve_market
+from .helpers.batch import download_batch, parse_tickers
+from .helpers.live import BarSeries, LiveTable
+from .helpers.sessions import calendar_for
+from .helpers.sources import INTRADAY_FREQUENCIES, FetchEngine, get_source
+
+logger = logging.getLogger(__name__)
+
+HEADERS = ["Ticker", "Bar", "Last", "Change %", "High", "Low", "Volume", "Bars"]
+WIDTHS = [10, 16, 11, 9, 11, 11, 14, 6]
+
+ALWAYS_OPEN_ASSETS = ("crypto", "currency")
+
+
+def bar_duration(interval):
+    """Length of one bar as a Timedelta."""
+    return pd.Timedelta(INTRADAY_FREQUENCIES.get(interval, "1D"))
+
+
+def market_status(args):
+    """
+    Returns whether the watched market is open now and, when it is not, the next open.
+
+    Returns:
+        tuple: (is_open, next_open Timestamp in the market timezone, or None)
+    """
+    if args.asset_type in ALWAYS_OPEN_ASSETS:
+        return True, None
+    default_timezone = args.timezone if args.timezone else "United States"
+    market_open, _ = is_market_open(default_timezone, args.timezone)
+    if market_open:
+        return True, None
+    now = pd.Timestamp.now(tz="UTC")
+    next_open = calendar_for(resolve_market(default_timezone, args.timezone), now).next_open(now)[0]
+    return False, None if pd.isna(next_open) else next_open
+
+
+def next_delay(market_open, next_open, previous_delay, poll, max_poll):
+    """
+    Seconds until the next poll: `poll` while the market is open; otherwise
+    doubling up to `max_poll`, but never sleeping past the next open.
+    """
+    if market_open:
+        return poll
+    delay = min(max(previous_delay * 2, poll), max_poll)
+    if next_open is not None:
+        until_open = (next_open - pd.Timestamp.now(tz="UTC")).total_seconds()
+        delay = min(delay, max(until_open, poll))
+    return delay
+
+
+async def poll_once(engine, series, args):
+    """
+    Requests only the bars from each ticker's newest held bar onwards (the
+    newest one may still be forming) and merges them in. Tickers without any
+    bars yet fetch the --lookback period. Tickers sharing the same newest bar
+    are requested together so batch-capable sources need one call per group.
+
+    Returns:
+        tuple: (tickers whose bars changed, failures dict, number of bars received)
+    """
+    end = pd.Timestamp.now(tz="UTC") + bar_duration(args.interval)
+    groups = {}
+    for ticker, bars in series.items():
+        groups.setdefault(bars.last_time, []).append(ticker)
+
+    requests = [
+        download_batch(engine, group, last, end if last is not None else None,
+                       args.lookback if last is None else None, args.interval)
+        for last, group in groups.items()
+    ]
+    changed, failures, received = set(), {}, 0
+    for frames, errors in await asyncio.gather(*requests):
+        failures.update(errors)
+        for ticker, frame in frames.items():
+            received += len(frame)
+            if series[ticker].update(frame):
+                changed.add(ticker)
+    return changed, failures, received
+
+
+def row_cells(ticker, bars):
+    """Table cells and colour for one ticker."""
+    bar = bars.last_bar()
+    if bar is None:
+        return [ticker, "-", "-", "-", "-", "-", "-", 0], ""
+    change = (bar["Close"] / bars.first_open() - 1) * 100 if bars.first_open() else np.nan
+    color = colors().green if change > 0 else colors().red if change < 0 else ""
+    return [
+        ticker,
+        f"{bars.last_time:%m-%d %H:%M}",
+        f"{bar['Close']:.2f}",
+        f"{change:+.2f}",
+        f"{bars.high:.2f}",
+        f"{bars.low:.2f}",
+        f"{bars.volume:,.0f}",
+        len(bars),
+    ], color
+
+
+async def watch(args, tickers, table, stats):
+    """Polls until --iterations is reached (or forever), redrawing changed rows after each poll."""
+    source = get_source(args.source)
+    series = {ticker: BarSeries() for ticker in tickers}
+    delay = args.poll
+
+    async with FetchEngine(source, max_in_flight=args.max_workers, rate_limit=args.rate_limit) as engine:
+        while True:
+            market_open, next_open = market_status(args)
+            changed, failures, received = await poll_once(engine, series, args)
+            stats["polls"] += 1
+            stats["bars"] += received
+
+            for ticker in changed:
+                table.set_row(ticker, *row_cells(ticker, series[ticker]))
+            for ticker, reason in failures.items():
+                logger.debug("Poll failed for %s: %s", ticker, reason)
+
+            delay = next_delay(market_open, next_open, delay, args.poll, args.max_poll)
+            state = "open" if market_open else "closed"
+            if not market_open and next_open is not None:
+                state += f", next open {next_open:%Y-%m-%d %H:%M %Z}"
+            table.set_status(colors().yellow + f"{pd.Timestamp.now():%H:%M:%S} market {state} | "
+                             f"{received} bars received, {len(changed)} rows changed, {len(failures)} failed | "
+                             f"next poll in {delay:.0f}s" + colors().reset)
+            table.render()
+
+            if args.iterations and stats["polls"] >= args.iterations:
+                break
+            await asyncio.sleep(delay)
+
+
+def watch_command(args):
+    tickers = parse_tickers(args.tickers or args.ticker, args.tickers_file)
+    if not tickers:
+        logger.warning("No ticker symbols provided.")
+        return
+    just_fix_windows_console()
+    table = LiveTable(tickers, HEADERS, WIDTHS, ansi=False if args.plain else None)
+    stats = {"polls": 0, "bars": 0}
+    try:
+        asyncio.run(watch(args, tickers, table, stats))
+    except KeyboardInterrupt:
+        pass
+    logger.info("Stopped after %d polls: %d bars received, %d rows redrawn.",
+                stats["polls"], stats["bars"], table.rows_redrawn)
+
+
+def execute(args):
+    watch_command(args)